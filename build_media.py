@@ -0,0 +1,59 @@
+import argparse
+import os
+
+# 🔑 Build-time step: compressed image variants for the static media folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(SCRIPT_DIR, 'static')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def build_variants(source_dir: str = STATIC_DIR, quality: int = 80, avif: bool = False, max_width: int = 1920) -> list:
+    """Write WebP (and optionally AVIF) copies next to every image in source_dir"""
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError("build_media.py needs Pillow: pip install Pillow")
+
+    formats = [('.webp', 'WEBP', {'method': 6})]
+    if avif:
+        formats.append(('.avif', 'AVIF', {}))
+
+    written = []
+    for file_name in sorted(os.listdir(source_dir)):
+        stem, ext = os.path.splitext(file_name)
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+
+        source_path = os.path.join(source_dir, file_name)
+        with Image.open(source_path) as image:
+            if image.width > max_width:
+                height = round(image.height * max_width / image.width)
+                image = image.resize((max_width, height), Image.LANCZOS)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+
+            for variant_ext, variant_format, options in formats:
+                target_path = os.path.join(source_dir, stem + variant_ext)
+                # Skip variants that are newer than their source
+                if os.path.exists(target_path) and os.path.getmtime(target_path) >= os.path.getmtime(source_path):
+                    continue
+                image.save(target_path, variant_format, quality=quality, **options)
+                written.append((target_path, os.path.getsize(source_path), os.path.getsize(target_path)))
+
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate compressed image variants for static serving')
+    parser.add_argument('--source-dir', default=STATIC_DIR)
+    parser.add_argument('--quality', type=int, default=80)
+    parser.add_argument('--max-width', type=int, default=1920)
+    parser.add_argument('--avif', action='store_true', help='Also write AVIF (needs Pillow with AVIF support)')
+    args = parser.parse_args()
+
+    for target_path, source_size, target_size in build_variants(args.source_dir, args.quality, args.avif, args.max_width):
+        print(f'{os.path.relpath(target_path, SCRIPT_DIR)}: {source_size / 1024:.0f} KB -> {target_size / 1024:.0f} KB')
+
+
+if __name__ == '__main__':
+    main()
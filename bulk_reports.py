@@ -0,0 +1,289 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import random
+import re
+import resource
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from recommendation_engine import ENGINE_SCRIPT_DIR, PersonalizedRecommendationEngine, run_assessment
+
+# 🔑 Offline bulk rendering of per-student and per-department reports across a process pool
+TEMPLATE_DIR = os.path.join(ENGINE_SCRIPT_DIR, 'report_templates')
+DEFAULT_OUTPUT_DIR = os.path.join(ENGINE_SCRIPT_DIR, 'reports')
+
+STRESS_LEVELS = ('Fabulous', 'Good', 'Bad', 'Awful')
+# Students per pool task, and tasks in flight per worker; together they bound memory
+TASK_SIZE = 200
+TASKS_PER_WORKER = 2
+
+# Engine and compiled templates of the current process, set up once by _init_worker
+_worker = {}
+
+
+def compile_templates() -> Dict:
+    """Parse and compile the report templates; done once per process"""
+    try:
+        import jinja2
+        from markupsafe import Markup, escape
+    except ImportError:
+        raise ImportError("Report rendering needs jinja2: pip install jinja2")
+
+    def markdown_bold(text: str):
+        # Recommendation strings use **bold** the way the app's st.markdown renders it
+        return Markup(re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', str(escape(text))))
+
+    environment = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(TEMPLATE_DIR), autoescape=True, trim_blocks=True, lstrip_blocks=True
+    )
+    environment.filters['markdown_bold'] = markdown_bold
+    return {
+        'student': environment.get_template('student_report.html'),
+        'department': environment.get_template('department_report.html'),
+    }
+
+
+def _init_worker(output_dir: str, pdf: bool, generated_at: str):
+    if pdf:
+        try:
+            import weasyprint  # noqa: F401
+        except ImportError:
+            raise ImportError("PDF reports need weasyprint: pip install weasyprint")
+    _worker.update(
+        engine=PersonalizedRecommendationEngine(),
+        templates=compile_templates(),
+        output_dir=output_dir,
+        pdf=pdf,
+        generated_at=generated_at,
+    )
+
+
+def _file_name(name: str) -> str:
+    """Filesystem-safe name; names changed by sanitizing get a hash of the original so they never collide"""
+    safe = re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')
+    if safe and safe == name:
+        return safe
+    return f"{safe or 'report'}_{hashlib.sha1(name.encode('utf-8')).hexdigest()[:10]}"
+
+
+def _write(html: str, path_stem: str) -> str:
+    """Write one report to disk as soon as it is rendered"""
+    if _worker['pdf']:
+        import weasyprint
+        path = path_stem + '.pdf'
+        weasyprint.HTML(string=html, base_url=TEMPLATE_DIR).write_pdf(path)
+    else:
+        path = path_stem + '.html'
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+    return path
+
+
+def render_student_report(assessment: Dict, student_id: str) -> Tuple[str, Dict]:
+    """HTML report for one assessment, plus the comprehensive results it was built from"""
+    _, probabilities, profile, results = run_assessment(_worker['engine'], assessment)
+    # Same split of solutions into two columns as the app
+    solutions = results['personalized_solutions']
+    split = len(solutions) // 2 + 1
+    html = _worker['templates']['student'].render(
+        student_id=student_id,
+        course=assessment['course'],
+        state=assessment['state'],
+        city=assessment['city'],
+        profile=profile,
+        results=results,
+        breakdown=results['stress_score_breakdown'],
+        analysis=results['emotional_analysis'],
+        probabilities=list(zip(STRESS_LEVELS, probabilities)),
+        solutions_first=solutions[:split],
+        solutions_rest=solutions[split:],
+        generated_at=_worker['generated_at'],
+    )
+    return html, results
+
+
+def _render_task(task: List[Tuple[str, Dict]]) -> List[Dict]:
+    """Render and write a slice of students; only small summary rows go back to the parent"""
+    student_dir = os.path.join(_worker['output_dir'], 'students')
+    rows = []
+    for student_id, assessment in task:
+        html, results = render_student_report(assessment, student_id)
+        path = _write(html, os.path.join(student_dir, _file_name(student_id)))
+        rows.append({
+            'student_id': student_id,
+            'course': assessment['course'],
+            'level': results['enhanced_stress_level'],
+            'final_score': results['stress_score_breakdown']['final_score'],
+            'trauma_detected': results['emotional_analysis']['trauma_detected'],
+            'emotion': assessment['emotion'],
+            'triggers': assessment['triggers'],
+            'path': os.path.relpath(path, _worker['output_dir']),
+        })
+    return rows
+
+
+class DepartmentSummary:
+    """Running per-department aggregates; constant size whatever the cohort size"""
+
+    def __init__(self):
+        self.students = 0
+        self.score_sum = 0.0
+        self.trauma = 0
+        self.levels = Counter({level: 0 for level in STRESS_LEVELS})
+        self.emotions = Counter()
+        self.triggers = Counter()
+
+    def add(self, row: Dict):
+        self.students += 1
+        self.score_sum += row['final_score']
+        self.trauma += bool(row['trauma_detected'])
+        self.levels[row['level']] += 1
+        self.emotions[row['emotion']] += 1
+        self.triggers.update(row['triggers'])
+
+    def context(self, course_advice: List[str]) -> Dict:
+        return {
+            'students': self.students,
+            'mean_score': self.score_sum / self.students,
+            'trauma': self.trauma,
+            'levels': dict(self.levels),
+            'top_emotions': self.emotions.most_common(5),
+            'top_triggers': self.triggers.most_common(5),
+            'course_advice': course_advice,
+        }
+
+    def typical_level(self) -> str:
+        return max(STRESS_LEVELS, key=lambda level: self.levels[level])
+
+
+def _tasks(assessments: Iterable[Dict], task_size: int, duplicates: Counter) -> Iterator[List[Tuple[str, Dict]]]:
+    """Slices of (student_id, assessment); a repeated student_id is counted in duplicates and skipped
+
+    Report files are named after the student, so a second row with the same id would
+    overwrite the first report; the first row is kept.
+    """
+    task = []
+    seen = set()
+    for index, assessment in enumerate(assessments):
+        student_id = str(assessment.get('student_id', f'student_{index:06d}'))
+        if student_id in seen:
+            duplicates[student_id] += 1
+            continue
+        seen.add(student_id)
+        task.append((student_id, assessment))
+        if len(task) == task_size:
+            yield task
+            task = []
+    if task:
+        yield task
+
+
+def render_reports(assessments: Iterable[Dict], output_dir: str = DEFAULT_OUTPUT_DIR, workers: int = None,
+                   pdf: bool = False, task_size: int = TASK_SIZE) -> Dict:
+    """Render every student report across a process pool, then one summary per department
+
+    Assessments are consumed lazily and only a bounded number of tasks is in flight, so
+    memory holds no more than the ids seen so far, however many reports are written.
+    Rows repeating an earlier student_id are skipped and reported under duplicate_student_ids.
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(os.path.join(output_dir, 'students'), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, 'departments'), exist_ok=True)
+    generated_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
+    departments: Dict[str, DepartmentSummary] = {}
+    duplicates = Counter()
+    start = time.perf_counter()
+
+    with open(os.path.join(output_dir, 'manifest.jsonl'), 'w') as manifest:
+        def collect(rows: List[Dict]):
+            for row in rows:
+                departments.setdefault(row['course'], DepartmentSummary()).add(row)
+                manifest.write(json.dumps({key: row[key] for key in ('student_id', 'course', 'level', 'path')}) + '\n')
+
+        tasks = _tasks(assessments, task_size, duplicates)
+        if workers == 1:
+            _init_worker(output_dir, pdf, generated_at)
+            for task in tasks:
+                collect(_render_task(task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(output_dir, pdf, generated_at)) as executor:
+                pending = set()
+                for task in tasks:
+                    if len(pending) >= workers * TASKS_PER_WORKER:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            collect(future.result())
+                    pending.add(executor.submit(_render_task, task))
+                for future in pending:
+                    collect(future.result())
+            _init_worker(output_dir, pdf, generated_at)
+    student_seconds = time.perf_counter() - start
+
+    course_analyzer = _worker['engine'].course_analyzer
+    for department, summary in sorted(departments.items()):
+        advice = course_analyzer.get_course_specific_advice(department, summary.typical_level())
+        html = _worker['templates']['department'].render(
+            department=department, summary=summary.context(advice), levels=STRESS_LEVELS, generated_at=generated_at
+        )
+        _write(html, os.path.join(output_dir, 'departments', _file_name(department)))
+
+    students = sum(summary.students for summary in departments.values())
+    return {
+        'students': students,
+        'departments': len(departments),
+        'workers': workers,
+        'format': 'pdf' if pdf else 'html',
+        'student_seconds': round(student_seconds, 2),
+        'reports_per_second': round(students / student_seconds, 1) if student_seconds else None,
+        'total_seconds': round(time.perf_counter() - start, 2),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'output_dir': output_dir,
+        # Rows skipped per repeated student_id; their reports would have overwritten the first row's
+        'duplicate_student_ids': dict(duplicates),
+    }
+
+
+def read_assessments(path: str) -> Iterator[Dict]:
+    """Assessments from a JSON-lines file, one object per line in load_test's assessment format"""
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def synthetic_assessments(count: int, seed: int = 0) -> Iterator[Dict]:
+    from load_test import generate_assessment, load_locations
+
+    rng = random.Random(seed)
+    locations = load_locations()
+    for _ in range(count):
+        yield generate_assessment(rng, locations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render per-student and per-department assessment reports')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--assessments', help='JSON-lines file of assessments')
+    source.add_argument('--synthetic', type=int, help='Render this many random assessments instead')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--pdf', action='store_true', help='Write PDF instead of HTML (needs weasyprint)')
+    parser.add_argument('--task-size', type=int, default=TASK_SIZE)
+    args = parser.parse_args()
+
+    if args.assessments:
+        assessments = read_assessments(args.assessments)
+    else:
+        assessments = synthetic_assessments(args.synthetic, args.seed)
+    print(json.dumps(render_reports(assessments, args.output_dir, args.workers, args.pdf, args.task_size), indent=2))
+
+
+if __name__ == '__main__':
+    main()
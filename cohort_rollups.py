@@ -0,0 +1,186 @@
+import datetime
+import itertools
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from recommendation_engine import ENGINE_SCRIPT_DIR
+
+# 🔑 Incrementally maintained cohort rollups: one cell per (state, city, course, emotion, ISO week)
+DEFAULT_DB_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'cohort_rollups.db')
+
+DIMENSIONS = ('state', 'city', 'course', 'emotion', 'iso_week')
+STRESS_LEVELS = ('Fabulous', 'Good', 'Bad', 'Awful')
+# Groups covering fewer assessments than this are withheld from the dashboard (k-anonymity)
+MIN_CELL_COUNT = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    state TEXT NOT NULL,
+    city TEXT NOT NULL,
+    course TEXT NOT NULL,
+    emotion TEXT NOT NULL,
+    iso_week TEXT NOT NULL,
+    fabulous INTEGER NOT NULL DEFAULT 0,
+    good INTEGER NOT NULL DEFAULT 0,
+    bad INTEGER NOT NULL DEFAULT 0,
+    awful INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (state, city, course, emotion, iso_week)
+);
+CREATE INDEX IF NOT EXISTS idx_rollups_week ON rollups (iso_week);
+CREATE INDEX IF NOT EXISTS idx_rollups_course ON rollups (course, iso_week);
+"""
+
+
+def iso_week(moment: datetime.datetime = None) -> str:
+    """UTC ISO week label such as '2024-W07', which sorts chronologically
+
+    Every process buckets by UTC whatever its time zone; naive moments are taken as local time.
+    """
+    moment = (moment or datetime.datetime.now(datetime.timezone.utc)).astimezone(datetime.timezone.utc)
+    year, week, _ = moment.isocalendar()
+    return f'{year}-W{week:02d}'
+
+
+class CohortRollupStore:
+    """SQLite rollup table updated once per recorded assessment"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def record(self, results: Dict, state: str, city: str, course: str, emotion: str,
+               recorded_at: datetime.datetime = None):
+        """Fold one generate_comprehensive_recommendations result into its rollup cell"""
+        level = results['enhanced_stress_level']
+        if level not in STRESS_LEVELS:
+            raise ValueError(f'Unknown stress level: {level}')
+        level_column = level.lower()
+
+        with self._connection() as conn:
+            conn.execute(
+                f'INSERT INTO rollups (state, city, course, emotion, iso_week, {level_column}, score_sum) '
+                f'VALUES (?, ?, ?, ?, ?, 1, ?) '
+                f'ON CONFLICT (state, city, course, emotion, iso_week) DO UPDATE SET '
+                f'{level_column} = {level_column} + 1, score_sum = score_sum + excluded.score_sum',
+                (state, city, course, emotion, iso_week(recorded_at),
+                 results['stress_score_breakdown']['final_score'])
+            )
+
+    def query(self, group_by: Sequence[str] = ('course',), filters: Dict[str, Sequence[str]] = None) -> List[Dict]:
+        """Aggregate rollup cells by the given dimensions with optional filters, without suppression"""
+        for dimension in list(group_by) + list((filters or {}).keys()):
+            if dimension not in DIMENSIONS:
+                raise ValueError(f'Unknown dimension: {dimension}')
+
+        clauses, params = [], []
+        for dimension, values in (filters or {}).items():
+            if values:
+                clauses.append(f'{dimension} IN ({", ".join("?" for _ in values)})')
+                params.extend(values)
+
+        columns = ', '.join(group_by)
+        sql = (
+            f'SELECT {columns + ", " if columns else ""}'
+            f'SUM(fabulous), SUM(good), SUM(bad), SUM(awful), SUM(score_sum) FROM rollups'
+        )
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        if columns:
+            sql += f' GROUP BY {columns} ORDER BY {columns}'
+
+        rows = []
+        for row in self._connection().execute(sql, params):
+            keys, (fabulous, good, bad, awful, score_sum) = row[:len(group_by)], row[len(group_by):]
+            total = (fabulous or 0) + (good or 0) + (bad or 0) + (awful or 0)
+            if not total:
+                continue
+            entry = dict(zip(group_by, keys))
+            entry.update({
+                'Fabulous': fabulous, 'Good': good, 'Bad': bad, 'Awful': awful,
+                'total': total,
+                'awful_rate': awful / total,
+                'mean_score': score_sum / total
+            })
+            rows.append(entry)
+        return rows
+
+    def release(self, group_by: Sequence[str] = ('course',), filters: Dict[str, Sequence[str]] = None,
+                min_count: int = MIN_CELL_COUNT) -> Tuple[List[Dict], int]:
+        """Rows that are safe to show on the dashboard, and how many matching rows were withheld
+
+        Filters may only narrow dimensions that are grouped by: they then pick rows out of
+        one fixed table instead of changing what each row adds up, so two filtered queries
+        cannot be subtracted to isolate a small group. Suppression runs on the unfiltered
+        table for the same reason.
+        """
+        for dimension in list(group_by) + list((filters or {}).keys()):
+            if dimension not in DIMENSIONS:
+                raise ValueError(f'Unknown dimension: {dimension}')
+        filters = {dimension: set(values) for dimension, values in (filters or {}).items() if values}
+        ungrouped = set(filters) - set(group_by)
+        if ungrouped:
+            raise ValueError(f'Filtering on {sorted(ungrouped)} requires grouping by it')
+
+        # Canonical dimension order, so the same table is always suppressed the same way
+        group_by = sorted(group_by, key=DIMENSIONS.index)
+        rows = self.query(group_by)
+        kept, _ = suppress_small_cells(rows, group_by, min_count)
+
+        def matches(row: Dict) -> bool:
+            return all(row[dimension] in values for dimension, values in filters.items())
+
+        kept = [row for row in kept if matches(row)]
+        return kept, sum(1 for row in rows if matches(row)) - len(kept)
+
+    def distinct_values(self, dimension: str) -> List[str]:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f'Unknown dimension: {dimension}')
+        return [row[0] for row in self._connection().execute(
+            f'SELECT DISTINCT {dimension} FROM rollups ORDER BY {dimension}'
+        )]
+
+
+def suppress_small_cells(rows: List[Dict], group_by: Sequence[str],
+                         min_count: int = MIN_CELL_COUNT) -> Tuple[List[Dict], int]:
+    """Query rows that are safe to show, and how many rows were withheld
+
+    Rows under min_count are withheld. So that a withheld row cannot be recovered by
+    subtracting the visible rows from a coarser total (the same query grouped by fewer
+    dimensions), the withheld rows of every coarser group must then add up to 0 or at
+    least min_count; where they do not, the group's smallest visible row is withheld too.
+    """
+    hidden = [row['total'] < min_count for row in rows]
+    for size in range(len(group_by) - 1, -1, -1):
+        for parent in itertools.combinations(group_by, size):
+            groups = defaultdict(list)
+            for index, row in enumerate(rows):
+                groups[tuple(row[dimension] for dimension in parent)].append(index)
+            for members in groups.values():
+                hidden_total = sum(rows[index]['total'] for index in members if hidden[index])
+                visible = [index for index in members if not hidden[index]]
+                # Every visible row has at least min_count, so one more always lifts the sum past it
+                if 0 < hidden_total < min_count and visible:
+                    hidden[min(visible, key=lambda index: rows[index]['total'])] = True
+    kept = [row for row, withheld in zip(rows, hidden) if not withheld]
+    return kept, len(rows) - len(kept)
+
+
+def store_from_environment() -> CohortRollupStore:
+    """Rollup store at COHORT_DB_PATH, or next to the app by default"""
+    return CohortRollupStore(os.environ.get('COHORT_DB_PATH', DEFAULT_DB_PATH))
@@ -0,0 +1,481 @@
+import argparse
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, List
+
+from latency_stats import percentile
+from recommendation_engine import ENGINE_SCRIPT_DIR
+
+# 🔑 Non-blocking crisis alert pipeline: bounded queue, per-student dedup, pluggable sinks
+DEFAULT_ALERT_LOG = os.path.join(ENGINE_SCRIPT_DIR, 'crisis_alerts.jsonl')
+DEFAULT_OUTBOX_DB = os.path.join(ENGINE_SCRIPT_DIR, 'crisis_outbox.db')
+
+CRISIS_LEVELS = ('Awful',)
+
+# Explicit service levels: the request path only pays for the enqueue (p99, including
+# GIL hand-offs with the consumer), and every sink should have the alert within the delivery budget
+ENQUEUE_SLO_US = 250.0
+DELIVERY_SLO_MS = 2000.0
+
+logger = logging.getLogger('crisis_alerts')
+
+
+def is_crisis(results: Dict) -> bool:
+    return (
+        results['enhanced_stress_level'] in CRISIS_LEVELS
+        or bool(results['emotional_analysis'].get('trauma_detected'))
+    )
+
+
+class JsonlFileSink:
+    """Append one JSON line per alert to a local file"""
+
+    name = 'file'
+
+    def __init__(self, path: str = DEFAULT_ALERT_LOG):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def deliver(self, alert: Dict):
+        self._file.write(json.dumps(alert) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class WebhookSink:
+    """POST alerts as JSON; without a URL it is a stub that keeps the payloads it would send"""
+
+    name = 'webhook'
+
+    def __init__(self, url: str = None, timeout: float = 5.0, history: int = 1000):
+        self.url = url
+        self.timeout = timeout
+        self.sent = deque(maxlen=history)
+
+    def deliver(self, alert: Dict):
+        if self.url:
+            request = urllib.request.Request(
+                self.url, data=json.dumps(alert).encode(), headers={'Content-Type': 'application/json'}
+            )
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        self.sent.append(alert)
+
+    def close(self):
+        pass
+
+
+class SQLiteOutboxSink:
+    """Transactional outbox: alerts are stored durably for a relay to forward and mark delivered"""
+
+    name = 'outbox'
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS crisis_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        alert_id TEXT NOT NULL UNIQUE,
+        payload TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        forwarded_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_crisis_outbox_pending ON crisis_outbox (forwarded_at, id);
+    """
+
+    def __init__(self, db_path: str = DEFAULT_OUTBOX_DB):
+        self.db_path = db_path
+        # Only the pipeline's consumer thread writes through this connection
+        self._conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.executescript(self.SCHEMA)
+
+    def deliver(self, alert: Dict):
+        with self._conn:
+            # Retries of the same alert are idempotent
+            self._conn.execute(
+                'INSERT OR IGNORE INTO crisis_outbox (alert_id, payload, created_at) VALUES (?, ?, ?)',
+                (alert['alert_id'], json.dumps(alert), alert['created_at'])
+            )
+
+    def pending(self, limit: int = 100) -> List[Dict]:
+        rows = self._conn.execute(
+            'SELECT payload FROM crisis_outbox WHERE forwarded_at IS NULL ORDER BY id LIMIT ?', (limit,)
+        ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def mark_forwarded(self, alert_ids: List[str]):
+        with self._conn:
+            self._conn.executemany(
+                'UPDATE crisis_outbox SET forwarded_at = ? WHERE alert_id = ?',
+                [(time.time(), alert_id) for alert_id in alert_ids]
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+class _SinkWorker:
+    """Delivers alerts to one sink on its own thread
+
+    Failed deliveries go to a delay queue and are retried with exponential backoff
+    while later alerts keep flowing, so neither a slow nor a failing sink holds up
+    the other sinks. Its backlog (queued plus retrying) never exceeds the pipeline's
+    in-flight limit, since every alert it holds is still outstanding.
+    """
+
+    def __init__(self, sink, pipeline: 'CrisisAlertPipeline'):
+        self.sink = sink
+        self.pipeline = pipeline
+        self._queue = deque()
+        # (due time, sequence, attempt, alert)
+        self._retries = []
+        self._sequence = itertools.count()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'crisis-alert-sink-{sink.name}', daemon=True)
+        self._thread.start()
+
+    def put(self, alert: Dict):
+        self._queue.append(alert)
+        self._wake.set()
+
+    @property
+    def backlog(self) -> int:
+        return len(self._queue) + len(self._retries)
+
+    def _run(self):
+        pipeline = self.pipeline
+        while True:
+            now = time.monotonic()
+            if self._retries and self._retries[0][0] <= now:
+                _, _, attempt, alert = heapq.heappop(self._retries)
+            elif self._queue:
+                attempt, alert = 0, self._queue.popleft()
+            else:
+                if self._stop.is_set() and not self._retries:
+                    return
+                self._wake.wait(self._retries[0][0] - now if self._retries else pipeline.poll_interval)
+                self._wake.clear()
+                continue
+
+            try:
+                self.sink.deliver(alert)
+            except Exception as e:
+                pipeline._count('sink_failures')
+                logger.warning('Crisis alert sink %s failed (attempt %d): %s', self.sink.name, attempt + 1, e)
+                if attempt < pipeline.retries:
+                    heapq.heappush(self._retries, (
+                        time.monotonic() + pipeline.retry_backoff * 2 ** attempt, next(self._sequence), attempt + 1, alert
+                    ))
+                else:
+                    pipeline._sink_finished(alert, self.sink, e)
+                continue
+            pipeline._sink_finished(alert, self.sink, None)
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+
+
+class CrisisAlertPipeline:
+    """Bounded producer/consumer pipeline for crisis alerts
+
+    submit() runs on the user-facing request: it deduplicates, builds the alert
+    and appends it to a bounded deque. When the queue is full the alert is counted
+    as dropped and logged instead of blocking. Producers never wake the consumer
+    (a futex wake per alert costs more than the enqueue itself); one dispatcher
+    thread polls every `poll_interval` and hands each alert to a worker per sink.
+    An alert counts as delivered once every sink has accepted it; when a sink
+    exhausts its retries the alert is dead-lettered instead.
+
+    At most `max_in_flight` alerts are handed to the sinks at a time. When a sink
+    falls behind, the dispatcher stops taking alerts, the bounded queue fills and
+    submit() drops, so memory and delivery latency stay bounded.
+    """
+
+    def __init__(self, sinks: List, max_queue: int = 1000, dedup_seconds: float = 1800.0,
+                 max_tracked_students: int = 100_000, retries: int = 3, retry_backoff: float = 0.2,
+                 latency_samples: int = 10_000, poll_interval: float = 0.05, max_dead_letters: int = 10_000,
+                 max_in_flight: int = 100):
+        self.sinks = list(sinks)
+        self.dedup_seconds = dedup_seconds
+        self.max_tracked_students = max_tracked_students
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.counters = {
+            'submitted': 0, 'not_crisis': 0, 'duplicate': 0, 'queued': 0,
+            'dropped': 0, 'delivered': 0, 'dead_lettered': 0, 'sink_failures': 0
+        }
+        self.enqueue_us = deque(maxlen=latency_samples)
+        self.delivery_ms = deque(maxlen=latency_samples)
+        # Alerts some sink never accepted, with the sinks that failed them
+        self.dead_letters = deque(maxlen=max_dead_letters)
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self._queue = deque()
+        self._dispatching = False
+        # alert_id -> sinks still working on it, sinks that gave up, enqueue time
+        self._outstanding = {}
+        self._stop = threading.Event()
+        # Cheap unique ids: a per-pipeline random prefix and a counter
+        self._id_prefix = uuid.uuid4().hex[:12]
+        self._ids = itertools.count(1)
+        self._last_alert = OrderedDict()
+        # Guards the dedup table, the enqueue and the counters, which every thread updates
+        self._lock = threading.Lock()
+        self._last_drop_logged = 0.0
+        self._workers = [_SinkWorker(sink, self) for sink in self.sinks]
+        self._consumer = threading.Thread(target=self._consume, name='crisis-alert-consumer', daemon=True)
+        self._consumer.start()
+
+    def _count(self, counter: str):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def submit(self, results: Dict, student_key: str, state: str = None, city: str = None,
+               course: str = None) -> str:
+        """Queue an alert for a crisis result; never blocks. Returns what happened to it."""
+        started = time.perf_counter()
+        if not is_crisis(results):
+            with self._lock:
+                self.counters['submitted'] += 1
+                self.counters['not_crisis'] += 1
+            return 'not_crisis'
+
+        now = time.time()
+        with self._lock:
+            self.counters['submitted'] += 1
+            last = self._last_alert.get(student_key)
+            if last is not None and now - last < self.dedup_seconds:
+                self.counters['duplicate'] += 1
+                return 'duplicate'
+            if len(self._queue) >= self.max_queue:
+                self.counters['dropped'] += 1
+                # Not recorded for dedup, so the student's next assessment alerts again
+                if now - self._last_drop_logged >= 1.0:
+                    # Log the first drop of each burst rather than every one
+                    self._last_drop_logged = now
+                    logger.error('Crisis alert queue full; %d alerts dropped so far', self.counters['dropped'])
+                return 'dropped'
+            self._last_alert[student_key] = now
+            self._last_alert.move_to_end(student_key)
+            # Entries are ordered by alert time: expire old ones, then bound the table size
+            while self._last_alert and now - next(iter(self._last_alert.values())) >= self.dedup_seconds:
+                self._last_alert.popitem(last=False)
+            while len(self._last_alert) > self.max_tracked_students:
+                self._last_alert.popitem(last=False)
+
+            self._queue.append({
+                'alert_id': f'{self._id_prefix}-{next(self._ids)}',
+                'student_key': student_key,
+                'stress_level': results['enhanced_stress_level'],
+                'trauma_detected': bool(results['emotional_analysis'].get('trauma_detected')),
+                'final_score': results['stress_score_breakdown']['final_score'],
+                'state': state,
+                'city': city,
+                'course': course,
+                'created_at': now,
+                '_enqueued': time.perf_counter()
+            })
+            self.counters['queued'] += 1
+            self.enqueue_us.append((time.perf_counter() - started) * 1e6)
+        return 'queued'
+
+    def _consume(self):
+        while True:
+            if len(self._outstanding) >= self.max_in_flight:
+                # Backpressure: alerts wait in the bounded queue, where submit() drops once it is full
+                time.sleep(self.poll_interval)
+                continue
+            # Flagged before the pop so drain() never sees an alert in neither place
+            self._dispatching = True
+            try:
+                alert = self._queue.popleft()
+            except IndexError:
+                self._dispatching = False
+                if self._stop.is_set():
+                    return
+                self._stop.wait(self.poll_interval)
+                continue
+            enqueued = alert.pop('_enqueued')
+            with self._lock:
+                self._outstanding[alert['alert_id']] = {'remaining': len(self._workers), 'failed': [], 'enqueued': enqueued}
+            if not self._workers:
+                self._finish(alert)
+            for worker in self._workers:
+                worker.put(alert)
+            self._dispatching = False
+
+    def _sink_finished(self, alert: Dict, sink, error: Exception = None):
+        """Called by a sink worker once the sink accepted the alert or gave up on it"""
+        with self._lock:
+            state = self._outstanding[alert['alert_id']]
+            state['remaining'] -= 1
+            if error is not None:
+                state['failed'].append({'sink': sink.name, 'error': str(error)})
+            if state['remaining'] > 0:
+                return
+        self._finish(alert)
+
+    def _finish(self, alert: Dict):
+        with self._lock:
+            state = self._outstanding.pop(alert['alert_id'])
+            if state['failed']:
+                self.counters['dead_lettered'] += 1
+                self.dead_letters.append({'alert': alert, 'failed_sinks': state['failed']})
+            else:
+                self.counters['delivered'] += 1
+                self.delivery_ms.append((time.perf_counter() - state['enqueued']) * 1000)
+        if state['failed']:
+            logger.error('Crisis alert %s dead-lettered; failed sinks: %s',
+                         alert['alert_id'], ', '.join(failure['sink'] for failure in state['failed']))
+
+    def drain(self, timeout: float = None) -> bool:
+        """Wait until every queued alert has been delivered or dead-lettered"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue or self._dispatching or self._outstanding:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        self.drain(timeout)
+        self._stop.set()
+        self._consumer.join(timeout)
+        for worker in self._workers:
+            worker.stop(timeout)
+        for sink in self.sinks:
+            sink.close()
+
+    def slo_report(self) -> Dict:
+        with self._lock:
+            counters = dict(self.counters)
+            enqueue = sorted(self.enqueue_us)
+            delivery = sorted(self.delivery_ms)
+        enqueue_p99 = percentile(enqueue, 99)
+        delivery_p99 = percentile(delivery, 99)
+        return {
+            'counters': counters,
+            'queue_depth': len(self._queue),
+            'in_flight': len(self._outstanding),
+            'sink_backlog': {worker.sink.name: worker.backlog for worker in self._workers},
+            'enqueue_us': {'p50': percentile(enqueue, 50), 'p99': enqueue_p99, 'slo': ENQUEUE_SLO_US},
+            'delivery_ms': {'p50': percentile(delivery, 50), 'p99': delivery_p99, 'slo': DELIVERY_SLO_MS},
+            'enqueue_slo_met': enqueue_p99 is None or enqueue_p99 <= ENQUEUE_SLO_US,
+            'delivery_slo_met': delivery_p99 is None or delivery_p99 <= DELIVERY_SLO_MS,
+            'dropped': counters['dropped'],
+            'dead_lettered': counters['dead_lettered']
+        }
+
+
+def pipeline_from_environment() -> CrisisAlertPipeline:
+    """File sink always; SQLite outbox and webhook when CRISIS_OUTBOX_DB / CRISIS_WEBHOOK_URL are set"""
+    sinks = [JsonlFileSink(os.environ.get('CRISIS_ALERT_LOG', DEFAULT_ALERT_LOG))]
+    if os.environ.get('CRISIS_OUTBOX_DB'):
+        sinks.append(SQLiteOutboxSink(os.environ['CRISIS_OUTBOX_DB']))
+    if os.environ.get('CRISIS_WEBHOOK_URL'):
+        sinks.append(WebhookSink(os.environ['CRISIS_WEBHOOK_URL']))
+    return CrisisAlertPipeline(sinks)
+
+
+class _SlowSink:
+    """Benchmark sink that simulates a slow downstream system"""
+
+    name = 'slow'
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def deliver(self, alert: Dict):
+        time.sleep(self.delay)
+
+    def close(self):
+        pass
+
+
+def run_benchmark(alerts: int, students: int, producers: int, max_queue: int, sink_delay_ms: float,
+                  output_dir: str, rate: float = 0.0, max_in_flight: int = 100) -> Dict:
+    """Producer threads submit crisis results while a slow sink consumes them
+
+    rate is the total submissions per second across producers; 0 submits as one burst.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    sinks = [
+        JsonlFileSink(os.path.join(output_dir, 'crisis_alerts.jsonl')),
+        SQLiteOutboxSink(os.path.join(output_dir, 'crisis_outbox.db')),
+        WebhookSink(),
+        _SlowSink(sink_delay_ms / 1000)
+    ]
+    pipeline = CrisisAlertPipeline(sinks, max_queue=max_queue, max_in_flight=max_in_flight)
+    results = {
+        'enhanced_stress_level': 'Awful',
+        'emotional_analysis': {'trauma_detected': False},
+        'stress_score_breakdown': {'final_score': 0.91}
+    }
+    submit_us = [[] for _ in range(producers)]
+
+    interval = producers / rate if rate else 0.0
+
+    def produce(index):
+        next_at = time.perf_counter()
+        for i in range(index, alerts, producers):
+            if interval:
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.perf_counter()))
+            start = time.perf_counter()
+            pipeline.submit(results, f'student-{i % students}', 'Karnataka', 'Bangalore', 'Engineering')
+            submit_us[index].append((time.perf_counter() - start) * 1e6)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=produce, args=(index,)) for index in range(producers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    submitted = time.perf_counter() - started
+    pipeline.close(timeout=max(10.0, alerts * sink_delay_ms / 1000 * 2))
+
+    samples = sorted(value for values in submit_us for value in values)
+    report = pipeline.slo_report()
+    report['submit_us'] = {
+        'p50': round(percentile(samples, 50), 2),
+        'p99': round(percentile(samples, 99), 2),
+        'max': round(samples[-1], 2)
+    }
+    report['submit_seconds'] = round(submitted, 3)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Crisis alert pipeline benchmark')
+    parser.add_argument('--alerts', type=int, default=5000, help='Results submitted')
+    parser.add_argument('--students', type=int, default=5000, help='Distinct students (others are deduplicated)')
+    parser.add_argument('--producers', type=int, default=4)
+    parser.add_argument('--max-queue', type=int, default=1000)
+    parser.add_argument('--max-in-flight', type=int, default=100, help='Alerts handed to the sinks at a time')
+    parser.add_argument('--sink-delay-ms', type=float, default=0.5, help='Simulated downstream latency per alert')
+    parser.add_argument('--rate', type=float, default=500.0, help='Total submissions per second (0 for one burst)')
+    parser.add_argument('--output-dir', default='crisis_benchmark')
+    args = parser.parse_args()
+
+    print(json.dumps(run_benchmark(
+        args.alerts, args.students, args.producers, args.max_queue, args.sink_delay_ms, args.output_dir, args.rate,
+        args.max_in_flight
+    ), indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,334 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from recommendation_engine import ENGINE_SCRIPT_DIR
+
+# 🔑 Clean the survey once (notebook cleaning + feature engineering) and cache it as Feather keyed by source hash
+DATA_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'Student Attitude and Behavior.csv')
+CACHE_DIR = os.path.join(ENGINE_SCRIPT_DIR, 'data_cache')
+
+# Bump when the preparation below changes so stale caches are never reused
+PREP_VERSION = '2'
+CHUNK_ROWS = 200_000
+
+NUMERICAL_COLS = ['Height(CM)', 'Weight(KG)', '10th Mark', '12th Mark', 'college mark', 'salary expectation']
+CATEGORICAL_COLS = [
+    'Certification Course', 'Gender', 'Department', 'hobbies', 'daily studing time',
+    'prefer to study in', 'Do you like your degree?', 'willingness to pursue a career based on their degree',
+    'social medai & video', 'Travelling Time', 'Stress Level', 'Financial Status', 'part-time job'
+]
+YES_NO_COLS = ['Certification Course', 'Do you like your degree?', 'part-time job']
+STRESS_MAPPING = {'Fabulous': 0, 'Good': 1, 'Bad': 2, 'Awful': 3}
+OUTLIER_QUANTILES = (0.05, 0.95)
+# Start of the C parser's ValueError for a non-numeric entry in a numeric column
+NUMERIC_PARSE_ERROR = 'could not convert string to float'
+
+RENAME_COLUMNS = {
+    'Certification Course': 'certifications', 'Gender': 'gender', 'Department': 'dept',
+    'Height(CM)': 'height', 'Weight(KG)': 'weight', '10th Mark': 'marks_10', '12th Mark': 'marks_12',
+    'college mark': 'marks_grad', 'daily studing time': 'study_time', 'prefer to study in': 'preferred_time',
+    'salary expectation': 'sal_expect', 'Do you like your degree?': 'like_degree',
+    'willingness to pursue a career based on their degree': 'career_pursue', 'social medai & video': 'watch_time',
+    'Travelling Time': 'travel_time', 'Stress Level': 'stress_levels', 'Financial Status': 'money_status',
+    'part-time job': 'part_time_job'
+}
+# Label-encoded exactly like the notebook's LabelEncoder (sorted string classes)
+ENCODED_COLUMNS = {'gender': 'gender_encoded', 'money_status': 'money_status_encoded', 'dept': 'dept_encoded'}
+FEATURE_COLUMNS = [
+    'academic_score', 'bmi', 'improvement_ratio', 'gender_encoded', 'money_status_encoded',
+    'dept_encoded', 'marks_10', 'marks_12', 'marks_grad', 'sal_expect'
+]
+TARGET_COLUMN = 'stress_levels_encoded'
+
+
+def _read_chunks(csv_path: str, chunk_rows: int, coerce_numerics: bool = False):
+    """Raw chunks with stripped column names, categoricals as strings and numerics as floats
+
+    By default the C parser reads numerics directly, which raises ValueError on a
+    non-numeric entry; coerce_numerics reads them as text and coerces them to NaN.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns
+    dtypes = {col: str for col in header}
+    if not coerce_numerics:
+        dtypes.update({col: np.float64 for col in header if col.strip() in NUMERICAL_COLS})
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, dtype=dtypes):
+        chunk.columns = chunk.columns.str.strip()
+        if coerce_numerics:
+            for col in NUMERICAL_COLS:
+                if col in chunk.columns:
+                    chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+        yield chunk
+
+
+def _add_counts(totals: Dict[str, pd.Series], col: str, counts: pd.Series):
+    totals[col] = counts if col not in totals else totals[col].add(counts, fill_value=0)
+
+
+def _quantile_from_counts(counts: pd.Series, q: float) -> float:
+    """Series.quantile(q) (linear interpolation) from a value -> count table"""
+    counts = counts[counts > 0].sort_index()
+    cumulative = counts.cumsum().to_numpy()
+    values = counts.index.to_numpy(dtype=float)
+    position = (cumulative[-1] - 1) * q
+    lower = values[np.searchsorted(cumulative, np.floor(position) + 1)]
+    upper = values[np.searchsorted(cumulative, np.ceil(position) + 1)]
+    return float(lower + (upper - lower) * (position - np.floor(position)))
+
+
+def fit_statistics(csv_path: str, chunk_rows: int = CHUNK_ROWS) -> Dict:
+    """First pass: medians, modes, outlier caps and category sets from value counts
+
+    Value-count tables are bounded by the number of distinct values, not rows,
+    so this pass streams files of any length. A file with non-numeric entries in a
+    numeric column is read again with those entries coerced to NaN.
+    """
+    try:
+        return _fit_statistics(csv_path, chunk_rows, coerce_numerics=False)
+    except pd.errors.EmptyDataError:
+        raise ValueError(f'{csv_path} has no data rows')
+    except ValueError as e:
+        if not str(e).startswith(NUMERIC_PARSE_ERROR):
+            raise
+        return _fit_statistics(csv_path, chunk_rows, coerce_numerics=True)
+
+
+def _fit_statistics(csv_path: str, chunk_rows: int, coerce_numerics: bool) -> Dict:
+    numeric_counts, missing, category_counts = {}, {}, {}
+    rows = 0
+    for chunk in _read_chunks(csv_path, chunk_rows, coerce_numerics):
+        rows += len(chunk)
+        for col in NUMERICAL_COLS:
+            if col in chunk.columns:
+                _add_counts(numeric_counts, col, chunk[col].value_counts())
+                missing[col] = missing.get(col, 0) + int(chunk[col].isna().sum())
+        for col in CATEGORICAL_COLS:
+            if col in chunk.columns:
+                _add_counts(category_counts, col, chunk[col].value_counts())
+
+    if not rows:
+        raise ValueError(f'{csv_path} has no data rows')
+
+    stats = {
+        'coerce_numerics': coerce_numerics,
+        'median': {}, 'caps': {}, 'dtype': {}, 'mode': {}, 'categories': {}
+    }
+    for col, counts in numeric_counts.items():
+        counts = counts[counts > 0]
+        if counts.empty:
+            raise ValueError(f'{csv_path} has no values in column {col!r}')
+        median = _quantile_from_counts(counts, 0.5)
+        # Capping quantiles are taken after median imputation, as in the notebook
+        imputed = counts.add(pd.Series({median: missing[col]}), fill_value=0) if missing[col] else counts
+        caps = tuple(_quantile_from_counts(imputed, q) for q in OUTLIER_QUANTILES)
+        values = imputed.index.to_numpy(dtype=float)
+        if np.all(np.mod(values, 1) == 0):
+            # Interpolated caps of integral data can carry float noise (6400.000000000002)
+            caps = tuple(float(round(cap)) if abs(cap - round(cap)) < 1e-6 else cap for cap in caps)
+        stats['median'][col] = median
+        stats['caps'][col] = caps
+        stats['dtype'][col] = _numeric_dtype(np.clip(values, *caps))
+    for col, counts in category_counts.items():
+        # Series.mode()[0]: the smallest of the most frequent values
+        top = counts[counts == counts.max()]
+        stats['mode'][col] = sorted(top.index)[0] if len(top) else 'Unknown'
+        stats['categories'][col] = sorted(counts.index)
+    return stats
+
+
+def _clean_categorical(col: str, values: pd.Series) -> pd.Series:
+    if col in YES_NO_COLS:
+        return values.astype(str).str.strip().str.title()
+    if col == 'Stress Level':
+        return values.astype(str).str.strip().str.title()
+    return values
+
+
+def _category_dtypes(stats: Dict) -> Dict[str, pd.CategoricalDtype]:
+    """Fixed categories per column so every chunk shares one schema"""
+    dtypes = {}
+    for col, categories in stats['categories'].items():
+        cleaned = _clean_categorical(col, pd.Series(categories, dtype=object))
+        dtypes[RENAME_COLUMNS.get(col, col)] = pd.CategoricalDtype(sorted(set(cleaned.astype(str))))
+    return dtypes
+
+
+def _int_dtype(low: float, high: float):
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+def _numeric_dtype(values: np.ndarray) -> str:
+    """Smallest dtype holding every prepared value exactly: an integer sized to their range, else a float"""
+    if np.all(np.mod(values, 1) == 0):
+        return np.dtype(_int_dtype(values.min(), values.max())).name
+    if np.array_equal(values.astype(np.float32).astype(np.float64), values):
+        return 'float32'
+    return 'float64'
+
+
+def prepare_chunk(chunk: pd.DataFrame, stats: Dict, category_dtypes: Dict, float32: bool = False) -> pd.DataFrame:
+    """Impute, cap, standardize, rename, engineer features and downcast one chunk"""
+    df = chunk.copy()
+    for col in NUMERICAL_COLS:
+        if col in df.columns:
+            lower, upper = stats['caps'][col]
+            df[col] = df[col].fillna(stats['median'][col]).clip(lower=lower, upper=upper)
+    for col in CATEGORICAL_COLS:
+        if col in df.columns:
+            df[col] = _clean_categorical(col, df[col].fillna(stats['mode'][col]))
+
+    df[TARGET_COLUMN] = df['Stress Level'].map(STRESS_MAPPING)
+    df = df.dropna(subset=[TARGET_COLUMN])
+    df = df.rename(columns=RENAME_COLUMNS)
+
+    # Feature engineering from the notebook, on the full precision values
+    df['bmi'] = df['weight'] / (df['height'] / 100) ** 2
+    df['academic_score'] = df[['marks_10', 'marks_12', 'marks_grad']].mean(axis=1)
+    df['improvement_ratio'] = df['marks_grad'] / (df['marks_12'] + 0.01)
+
+    for col, dtype in category_dtypes.items():
+        if col in df.columns:
+            df[col] = df[col].astype(str).astype(dtype)
+    for col, encoded in ENCODED_COLUMNS.items():
+        # Codes run from -1 (missing) to the category count, so size them to it
+        df[encoded] = df[col].cat.codes.astype(_int_dtype(-1, len(df[col].cat.categories) - 1))
+    df[TARGET_COLUMN] = df[TARGET_COLUMN].astype(np.int8)
+
+    # Downcast each column to the smallest dtype that holds its prepared values exactly. On the
+    # survey only sal_expect narrows (int32): height, weight and the marks have decimal entries
+    # such as 61.67 that float32 cannot hold, so they stay float64 unless float32 is requested
+    for col in NUMERICAL_COLS:
+        name = RENAME_COLUMNS[col]
+        if name in df.columns:
+            dtype = stats['dtype'][col]
+            df[name] = df[name].astype('float32' if float32 and dtype == 'float64' else dtype)
+    if float32:
+        for col in ('bmi', 'academic_score', 'improvement_ratio'):
+            df[col] = df[col].astype(np.float32)
+    return df.reset_index(drop=True)
+
+
+def source_hash(csv_path: str) -> str:
+    digest = hashlib.sha256(PREP_VERSION.encode())
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(csv_path: str, cache_dir: str = CACHE_DIR, float32: bool = False) -> str:
+    suffix = '_f32' if float32 else ''
+    return os.path.join(cache_dir, f'training_{source_hash(csv_path)[:16]}{suffix}.feather')
+
+
+def build_cache(csv_path: str = DATA_PATH, cache_dir: str = CACHE_DIR, float32: bool = False,
+                chunk_rows: int = CHUNK_ROWS) -> str:
+    """Two streaming passes over the CSV; the second writes Arrow record batches as it goes"""
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError("The columnar training cache needs pyarrow: pip install pyarrow")
+
+    target = cache_path(csv_path, cache_dir, float32)
+    os.makedirs(cache_dir, exist_ok=True)
+    stats = fit_statistics(csv_path, chunk_rows)
+    category_dtypes = _category_dtypes(stats)
+
+    # Write to a temporary file and rename, so readers never see a partial cache
+    partial = target + '.partial'
+    writer = None
+    try:
+        try:
+            for chunk in _read_chunks(csv_path, chunk_rows, stats['coerce_numerics']):
+                table = pa.Table.from_pandas(
+                    prepare_chunk(chunk, stats, category_dtypes, float32), preserve_index=False
+                )
+                if writer is None:
+                    writer = pa.ipc.new_file(partial, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    except BaseException:
+        # Leave no partial file behind for the next build
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, target)
+    return target
+
+
+def load_training_frame(csv_path: str = DATA_PATH, cache_dir: str = CACHE_DIR, float32: bool = False,
+                        columns: List[str] = None) -> pd.DataFrame:
+    """The cleaned, feature-engineered frame, building the cache on first use"""
+    target = cache_path(csv_path, cache_dir, float32)
+    if not os.path.exists(target):
+        build_cache(csv_path, cache_dir, float32)
+    return pd.read_feather(target, columns=columns)
+
+
+def training_arrays(frame: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """X in the packaged model's feature_columns order and the encoded stress target"""
+    return frame[FEATURE_COLUMNS], frame[TARGET_COLUMN]
+
+
+def synthesize_csv(output_path: str, rows: int, source_path: str = DATA_PATH, seed: int = 0,
+                   chunk_rows: int = CHUNK_ROWS):
+    """Write a large survey-shaped CSV by resampling source rows with jittered numerics"""
+    source = pd.read_csv(source_path, dtype=str)
+    rng = np.random.default_rng(seed)
+    numeric = [col for col in source.columns if col.strip() in NUMERICAL_COLS]
+    for start in range(0, rows, chunk_rows):
+        count = min(chunk_rows, rows - start)
+        sample = source.iloc[rng.integers(0, len(source), count)].reset_index(drop=True)
+        for col in numeric:
+            values = pd.to_numeric(sample[col], errors='coerce')
+            sample[col] = (values * rng.normal(1.0, 0.05, count)).round(1)
+        sample.to_csv(output_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prepare and cache the training dataset')
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--float32', action='store_true', help='Also downcast non-integral numerics (lossy)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('prepare', help='Build (or rebuild) the cache for the data file')
+    subparsers.add_parser('load', help='Load the cached frame and report timings')
+    synth_parser = subparsers.add_parser('synthesize', help='Write a large synthetic survey CSV')
+    synth_parser.add_argument('output')
+    synth_parser.add_argument('--rows', type=int, default=1_000_000)
+    synth_parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'synthesize':
+        synthesize_csv(args.output, args.rows, args.data, args.seed)
+        report = {'output': args.output, 'rows': args.rows}
+    elif args.command == 'prepare':
+        report = {'cache': build_cache(args.data, args.cache_dir, args.float32)}
+    else:
+        frame = load_training_frame(args.data, args.cache_dir, args.float32)
+        report = {
+            'rows': len(frame),
+            'columns': len(frame.columns),
+            'memory_mb': round(frame.memory_usage(deep=True).sum() / 1024 / 1024, 2),
+            'dtypes': {col: str(dtype) for col, dtype in frame.dtypes.items()}
+        }
+    report['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
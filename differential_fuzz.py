@@ -0,0 +1,325 @@
+import argparse
+import importlib
+import json
+import math
+import os
+import random
+import time
+import types
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from recommendation_engine import (
+    ENGINE_SCRIPT_DIR, COURSE_OPTIONS, EMOTION_OPTIONS, TRIGGER_OPTIONS, SOLUTION_RULES,
+    EmotionalAnalyzer, predict_stress_level
+)
+from load_test import load_locations
+
+# 🔑 Differential fuzzing of an optimized engine against a frozen reference engine
+# The reference is a vendored copy of recommendation_engine.py as of user-035; never edit it
+REFERENCE_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'fuzz_reference', 'recommendation_engine.py')
+CANDIDATE = 'recommendation_engine:PersonalizedRecommendationEngine'
+SCORE_TOLERANCE = 1e-9
+
+SENTIMENT_WORDS = [
+    'sad', 'angry', 'frustrated', 'terrible', 'awful', 'hate', 'depressed', 'hopeless', 'worthless',
+    'failure', 'disappointed', 'stressed', 'overwhelmed', 'exhausted', 'tired', 'worried', 'scared',
+    'happy', 'good', 'great', 'excellent', 'wonderful', 'amazing', 'love', 'excited', 'confident',
+    'optimistic', 'hopeful', 'peaceful'
+]
+FILLER_WORDS = ['i', 'feel', 'my', 'the', 'and', 'about', 'lately', 'because', 'of', 'college', 'home', 'week']
+# Text that trips naive matchers: substrings inside other words, case folding that changes length,
+# invisible characters, boundary lengths around the context keyword threshold and very long inputs
+ADVERSARIAL_FRAGMENTS = [
+    'grapes', 'therapist', 'abusedly', 'İSTANBUL', 'ﬁnal exams', 'straße', 'ÉTUDE', 'Σίσυφος',
+    'sle​ep', 'exam stress', 'tired\n\nof\tit', '😢😢😢', 'EXAM', 'Sleep', 'FRIENDS',
+    "'); DROP TABLE students;--", '<script>alert(1)</script>', '%s%s%n', '\\x00', '   ', '‮evil'
+]
+
+
+def load_reference_module(path: str = REFERENCE_PATH) -> types.ModuleType:
+    """The frozen engine loaded from its file, importable without touching the live module"""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    module = types.ModuleType('reference_recommendation_engine')
+    # Resolve the engine's data files from this checkout
+    module.__file__ = os.path.join(ENGINE_SCRIPT_DIR, 'recommendation_engine.py')
+    exec(compile(source, path, 'exec'), module.__dict__)
+    return module
+
+
+def load_candidate(spec: str = CANDIDATE):
+    module_name, class_name = spec.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _context_vocabulary() -> List[str]:
+    words = list(SENTIMENT_WORDS) + list(EmotionalAnalyzer().trauma_keywords)
+    for rule in SOLUTION_RULES:
+        words.extend(rule.get('context_keywords', []))
+    return words
+
+
+def _probabilities(rng: random.Random) -> List[float]:
+    choice = rng.random()
+    if choice < 0.2:
+        # The fixed vectors the rule-based predictor actually serves
+        return predict_stress_level(
+            rng.randint(30, 100), rng.randint(30, 100), rng.randint(30, 100),
+            rng.randint(0, 100), rng.randint(0, 24), rng.choice(['Awful', 'Bad', 'Good', 'Fabulous'])
+        )[1]
+    if choice < 0.3:
+        probabilities = [0.0] * 4
+        probabilities[rng.randrange(4)] = 1.0
+        return probabilities
+    if choice < 0.35:
+        return [0.25] * 4
+    weights = [rng.expovariate(1.0) for _ in range(4)]
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+def _context(rng: random.Random, vocabulary: List[str]) -> str:
+    choice = rng.random()
+    if choice < 0.3:
+        return ''
+    if choice < 0.35:
+        return ' ' * rng.randint(1, 30)
+    words = []
+    for _ in range(rng.randint(1, 40)):
+        pick = rng.random()
+        if pick < 0.35:
+            word = rng.choice(vocabulary)
+        elif pick < 0.5:
+            word = rng.choice(ADVERSARIAL_FRAGMENTS)
+        else:
+            word = rng.choice(FILLER_WORDS)
+        if rng.random() < 0.2:
+            word = word.upper() if rng.random() < 0.5 else word.title()
+        words.append(word)
+    text = rng.choice([' ', '  ', ', ', '\n']).join(words)
+    if rng.random() < 0.15:
+        # Lengths around the 21-character threshold for context keyword rules
+        text = text[:rng.randint(18, 23)]
+    elif rng.random() < 0.02:
+        text = (text + ' ') * rng.randint(50, 200)
+    return text
+
+
+def generate_case(seed: int, index: int, locations: List[tuple], vocabulary: List[str]) -> Dict:
+    """Case `index` of a run; the same (seed, index) always produces the same input"""
+    rng = random.Random(seed * 1_000_003 + index)
+    state, city = rng.choice(locations)
+    if rng.random() < 0.03:
+        city = rng.choice(['Unknown City', '', city.upper()])
+    if rng.random() < 0.01:
+        state = rng.choice(['Atlantis', ''])
+
+    trigger_count = rng.choice([0, 1, 1, 1, 2, 2, 3, 4, len(TRIGGER_OPTIONS)])
+    triggers = rng.sample(TRIGGER_OPTIONS, trigger_count)
+    if triggers and rng.random() < 0.05:
+        triggers.append(triggers[0])
+    if rng.random() < 0.03:
+        triggers.append(rng.choice(['Exam', 'Family problems and more', 'bullying', 'Other']))
+
+    probabilities = _probabilities(rng)
+    return {
+        'ml_prediction': ['Fabulous', 'Good', 'Bad', 'Awful'][max(range(4), key=probabilities.__getitem__)],
+        'ml_probabilities': probabilities,
+        'course': rng.choice(COURSE_OPTIONS) if rng.random() > 0.02 else 'Astrology',
+        'emotion': rng.choice(EMOTION_OPTIONS) if rng.random() > 0.02 else 'Meh',
+        'trigger_events': triggers,
+        'context_text': _context(rng, vocabulary),
+        'state': state,
+        'city': city,
+        'user_profile': {}
+    }
+
+
+def _close(a, b, tolerance: float) -> bool:
+    # Exact equality is the common case and is checked in C; tolerance only matters otherwise
+    if a == b:
+        return True
+    if isinstance(a, float) or isinstance(b, float):
+        return isinstance(a, (int, float)) and isinstance(b, (int, float)) and math.isclose(
+            a, b, rel_tol=0.0, abs_tol=tolerance
+        )
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_close(a[key], b[key], tolerance) for key in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(_close(x, y, tolerance) for x, y in zip(a, b))
+    return False
+
+
+def compare(reference: Dict, candidate: Dict, tolerance: float = SCORE_TOLERANCE) -> List[Dict]:
+    """Every field where the candidate result diverges from the reference"""
+    divergences = []
+    if reference['enhanced_stress_level'] != candidate.get('enhanced_stress_level'):
+        divergences.append({
+            'field': 'enhanced_stress_level',
+            'reference': reference['enhanced_stress_level'],
+            'candidate': candidate.get('enhanced_stress_level')
+        })
+    ref_score = reference['stress_score_breakdown']['final_score']
+    cand_score = candidate.get('stress_score_breakdown', {}).get('final_score')
+    if not _close(ref_score, cand_score, tolerance):
+        divergences.append({'field': 'final_score', 'reference': ref_score, 'candidate': cand_score})
+
+    # Recommendation order is presentation; the sets are the clinical output
+    ref_solutions = set(reference['personalized_solutions'])
+    cand_solutions = set(candidate.get('personalized_solutions', []))
+    if ref_solutions != cand_solutions:
+        divergences.append({
+            'field': 'personalized_solutions',
+            'missing': sorted(ref_solutions - cand_solutions),
+            'extra': sorted(cand_solutions - ref_solutions)
+        })
+    for field in ('immediate_actions', 'course_specific_advice', 'long_term_strategies'):
+        ref_items, cand_items = list(reference[field]), list(candidate.get(field, []))
+        if ref_items != cand_items:
+            ref_counts, cand_counts = Counter(ref_items), Counter(cand_items)
+            divergences.append({
+                'field': field,
+                'missing': sorted((ref_counts - cand_counts).elements()),
+                'extra': sorted((cand_counts - ref_counts).elements()),
+                'reordered': ref_counts == cand_counts
+            })
+    for field in ('original_ml_prediction', 'emotional_analysis', 'location_based_facilities',
+                  'stress_score_breakdown'):
+        if not _close(reference[field], candidate.get(field), tolerance):
+            divergences.append({'field': field, 'reference': reference[field], 'candidate': candidate.get(field)})
+    return divergences
+
+
+_worker_state = {}
+
+
+def _init_worker(reference_path: str, candidate_spec: str):
+    reference_module = load_reference_module(reference_path)
+    _worker_state['reference'] = reference_module.PersonalizedRecommendationEngine()
+    _worker_state['candidate'] = load_candidate(candidate_spec)()
+    _worker_state['locations'] = load_locations()
+    _worker_state['vocabulary'] = _context_vocabulary()
+
+
+def _run_shard(seed: int, start: int, end: int, tolerance: float, max_examples: int) -> Dict:
+    reference = _worker_state['reference']
+    candidate = _worker_state['candidate']
+    locations = _worker_state['locations']
+    vocabulary = _worker_state['vocabulary']
+    report = {'cases': 0, 'diverged': 0, 'fields': {}, 'errors': 0, 'examples': [],
+              'reference_seconds': 0.0, 'candidate_seconds': 0.0}
+
+    for index in range(start, end):
+        case = generate_case(seed, index, locations, vocabulary)
+        # Alternate which engine runs first so cache warmth does not favour either
+        engines = [('reference', reference), ('candidate', candidate)]
+        if index % 2:
+            engines.reverse()
+        results = {}
+        for name, engine in engines:
+            started = time.perf_counter()
+            try:
+                results[name] = engine.generate_comprehensive_recommendations(**case)
+            except Exception as e:
+                results[name] = {'error': f'{type(e).__name__}: {e}'}
+            report[f'{name}_seconds'] += time.perf_counter() - started
+        report['cases'] += 1
+
+        if 'error' in results['reference'] or 'error' in results['candidate']:
+            divergences = [] if results['reference'] == results['candidate'] else [{
+                'field': 'exception',
+                'reference': results['reference'].get('error'),
+                'candidate': results['candidate'].get('error')
+            }]
+            report['errors'] += 'error' in results['candidate']
+        else:
+            divergences = compare(results['reference'], results['candidate'], tolerance)
+
+        if divergences:
+            report['diverged'] += 1
+            for divergence in divergences:
+                report['fields'][divergence['field']] = report['fields'].get(divergence['field'], 0) + 1
+            if len(report['examples']) < max_examples:
+                report['examples'].append({'index': index, 'input': case, 'divergences': divergences})
+    return report
+
+
+def run_fuzz(cases: int, seed: int = 0, workers: int = None, shard_size: int = 5000,
+             reference_path: str = REFERENCE_PATH, candidate_spec: str = CANDIDATE,
+             tolerance: float = SCORE_TOLERANCE, max_examples: int = 20, report_path: str = None) -> Dict:
+    """Fuzz `cases` inputs across processes and merge the shard reports"""
+    workers = workers or os.cpu_count() or 1
+    summary = {'cases': 0, 'diverged': 0, 'fields': {}, 'errors': 0,
+               'reference_seconds': 0.0, 'candidate_seconds': 0.0}
+    examples = []
+    started = time.perf_counter()
+    report_file = open(report_path, 'w', encoding='utf-8') if report_path else None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(reference_path, candidate_spec)
+        ) as pool:
+            futures = [
+                pool.submit(_run_shard, seed, start, min(start + shard_size, cases), tolerance, max_examples)
+                for start in range(0, cases, shard_size)
+            ]
+            for future in futures:
+                shard = future.result()
+                for key in ('cases', 'diverged', 'errors', 'reference_seconds', 'candidate_seconds'):
+                    summary[key] += shard[key]
+                for field, count in shard['fields'].items():
+                    summary['fields'][field] = summary['fields'].get(field, 0) + count
+                for example in shard['examples']:
+                    if report_file:
+                        report_file.write(json.dumps(example, ensure_ascii=False) + '\n')
+                    if len(examples) < max_examples:
+                        examples.append(example)
+    finally:
+        if report_file:
+            report_file.close()
+
+    elapsed = time.perf_counter() - started
+    summary.update({
+        'seed': seed,
+        'workers': workers,
+        'reference': os.path.relpath(reference_path, ENGINE_SCRIPT_DIR),
+        'candidate': candidate_spec,
+        'elapsed_seconds': round(elapsed, 2),
+        'cases_per_second': round(summary['cases'] / elapsed, 1) if elapsed else None,
+        'reference_us_per_case': round(summary['reference_seconds'] * 1e6 / max(1, summary['cases']), 2),
+        'candidate_us_per_case': round(summary['candidate_seconds'] * 1e6 / max(1, summary['cases']), 2),
+        'throughput_ratio': round(summary['reference_seconds'] / summary['candidate_seconds'], 3)
+                            if summary['candidate_seconds'] else None,
+        'examples': examples
+    })
+    summary['reference_seconds'] = round(summary['reference_seconds'], 3)
+    summary['candidate_seconds'] = round(summary['candidate_seconds'], 3)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Differential fuzzing of an engine against the frozen reference')
+    parser.add_argument('--cases', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--shard-size', type=int, default=5000)
+    parser.add_argument('--candidate', default=CANDIDATE, help='module:Class of the engine under test')
+    parser.add_argument('--reference', default=REFERENCE_PATH, help='Engine source file used as the reference')
+    parser.add_argument('--tolerance', type=float, default=SCORE_TOLERANCE, help='Absolute tolerance for scores')
+    parser.add_argument('--max-examples', type=int, default=20, help='Divergent inputs kept per shard')
+    parser.add_argument('--report', help='JSONL file receiving every kept divergence')
+    args = parser.parse_args()
+
+    summary = run_fuzz(
+        args.cases, args.seed, args.workers, args.shard_size, args.reference,
+        args.candidate, args.tolerance, args.max_examples, args.report
+    )
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if summary['diverged']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
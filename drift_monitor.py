@@ -0,0 +1,464 @@
+import argparse
+import bisect
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from recommendation_engine import ENGINE_SCRIPT_DIR, EMOTION_OPTIONS, TRIGGER_OPTIONS
+
+# 🔑 Constant-memory drift monitoring of serving inputs against a training-time reference profile
+MODEL_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'stress_prediction_models.pkl')
+DATA_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'Student Attitude and Behavior.csv')
+PROFILE_KEY = 'drift_reference'
+
+logger = logging.getLogger('drift_monitor')
+
+# Numeric features are sketched on fixed bins over the app's widget ranges,
+# with one underflow and one overflow bin, so memory never depends on traffic
+NUMERIC_FEATURES = {
+    'academic_average': (30, 100, 35),
+    'career_willingness': (0, 100, 20),
+}
+FINANCIAL_OPTIONS = ['Awful', 'Bad', 'Good', 'Fabulous']
+
+# The survey records social media time as ranges with an open top ("More than 2 hour"),
+# so serving hours are bucketed into the same ranges and compared as categories.
+# Each range is (upper bound in hours, survey answer); a range includes its upper bound.
+SOCIAL_MEDIA_RANGES = [
+    (0.0, '0 Minute'),
+    (0.5, '1 - 30 Minute'),
+    (1.0, '30 - 60 Minute'),
+    (1.5, '1 - 1.30 hour'),
+    (2.0, '1.30 - 2 hour'),
+    (math.inf, 'More than 2 hour'),
+]
+
+PSI_WARNING = 0.1
+PSI_ALERT = 0.2
+KS_ALPHA_COEFFICIENT = 1.628  # c(alpha) for alpha = 0.01
+CHI2_ALPHA_Z = 2.326  # standard normal quantile for alpha = 0.01
+MIN_BIN_SHARE = 0.05
+# Shares are smoothed with half a count per bin, so an empty bin costs what its sample size
+# supports; EPSILON only guards the logarithm
+PSEUDO_COUNT = 0.5
+EPSILON = 1e-9
+
+
+def _edges(feature: str) -> List[float]:
+    low, high, bins = NUMERIC_FEATURES[feature]
+    return np.linspace(low, high, bins + 1).tolist()
+
+
+def _histogram(values: Sequence[float], edges: List[float]) -> List[int]:
+    counts = [0] * (len(edges) + 1)
+    for value in values:
+        counts[bisect.bisect_right(edges, value)] += 1
+    return counts
+
+
+def social_media_range(hours: float) -> str:
+    """The survey's answer for a number of hours per day"""
+    for upper, answer in SOCIAL_MEDIA_RANGES:
+        if hours <= upper:
+            return answer
+    return SOCIAL_MEDIA_RANGES[-1][1]
+
+
+def serving_features(mark10th: float, mark12th: float, collegemark: float, smtime: float,
+                     carrer_willing: float, financial: str, emotion: str, trigger_events: List[str]) -> Dict:
+    """The monitored view of one assessment from the app's form inputs"""
+    return {
+        'academic_average': (mark10th + mark12th + collegemark) / 3,
+        'social_media_time': social_media_range(smtime),
+        'career_willingness': carrer_willing,
+        'financial_status': financial,
+        'emotion': emotion,
+        'triggers': trigger_events,
+    }
+
+
+def build_reference_profile(data_path: str = DATA_PATH) -> Dict:
+    """Binned reference distributions from the training survey
+
+    Emotion and trigger events are not part of the survey, so their reference
+    is left empty and taken from the first full serving window instead.
+    """
+    with open(data_path, 'rb') as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()
+    df = pd.read_csv(data_path)
+    df.columns = df.columns.str.strip()
+
+    numeric = {
+        'academic_average': df[['10th Mark', '12th Mark', 'college mark']].mean(axis=1),
+        'career_willingness': df['willingness to pursue a career based on their degree'].astype(str)
+                              .str.rstrip('%').astype(float),
+    }
+    financial = df['Financial Status'].astype(str).str.strip().str.capitalize()
+    social_media = df['social medai & video'].astype(str).str.strip()
+
+    def category_counts(values: pd.Series, categories: List[str]) -> List[int]:
+        # One count per category, then one for answers outside the list
+        return [int((values == category).sum()) for category in categories] + [int((~values.isin(categories)).sum())]
+
+    social_media_answers = [answer for _, answer in SOCIAL_MEDIA_RANGES]
+
+    profile = {
+        'source': os.path.basename(data_path),
+        'source_sha256': source_hash,
+        'rows': len(df),
+        'numeric': {
+            feature: {'edges': _edges(feature), 'counts': _histogram(values.dropna(), _edges(feature))}
+            for feature, values in numeric.items()
+        },
+        'categorical': {
+            'social_media_time': {
+                'categories': social_media_answers,
+                'counts': category_counts(social_media, social_media_answers)
+            },
+            'financial_status': {
+                'categories': FINANCIAL_OPTIONS,
+                'counts': category_counts(financial, FINANCIAL_OPTIONS)
+            },
+            'emotion': {'categories': EMOTION_OPTIONS, 'counts': None},
+        },
+        'multilabel': {
+            'triggers': {'categories': TRIGGER_OPTIONS, 'counts': None},
+        },
+    }
+    return profile
+
+
+def load_reference_profile(model_package: Dict = None, model_path: str = MODEL_PATH,
+                           data_path: str = DATA_PATH) -> Dict:
+    """The profile saved with the model, or one built from the survey when none was saved
+
+    Profiles saved before social media time was compared by survey range are rebuilt.
+    """
+    if model_package is None and os.path.exists(model_path):
+        model_package = joblib.load(model_path)
+    if model_package and 'social_media_time' in model_package.get(PROFILE_KEY, {}).get('categorical', {}):
+        return model_package[PROFILE_KEY]
+    return build_reference_profile(data_path)
+
+
+def _psi_groups(reference_counts: List[int]) -> List[int]:
+    """Merge adjacent bins so every group holds at least MIN_BIN_SHARE of the reference"""
+    total = sum(reference_counts) or 1
+    boundaries, running = [], 0
+    for index, count in enumerate(reference_counts):
+        running += count
+        if running / total >= MIN_BIN_SHARE:
+            boundaries.append(index + 1)
+            running = 0
+    if not boundaries:
+        return [len(reference_counts)]
+    boundaries[-1] = len(reference_counts)
+    return boundaries
+
+
+def _group(counts: List[int], boundaries: List[int]) -> List[int]:
+    grouped, start = [], 0
+    for end in boundaries:
+        grouped.append(sum(counts[start:end]))
+        start = end
+    return grouped
+
+
+def population_stability_index(reference: List[int], current: List[int]) -> float:
+    smoothing = PSEUDO_COUNT * len(reference)
+    ref_total = sum(reference) + smoothing
+    cur_total = sum(current) + smoothing
+    psi = 0.0
+    for ref_count, cur_count in zip(reference, current):
+        ref_share = max((ref_count + PSEUDO_COUNT) / ref_total, EPSILON)
+        cur_share = max((cur_count + PSEUDO_COUNT) / cur_total, EPSILON)
+        psi += (cur_share - ref_share) * math.log(cur_share / ref_share)
+    return psi
+
+
+def chi_square_homogeneity(reference: List[int], current: List[int]) -> tuple:
+    """Chi-square statistic that both samples share one category distribution, and its critical value
+
+    Categories empty in both samples are left out. The critical value at CHI2_ALPHA_Z
+    uses the Wilson-Hilferty approximation of the chi-square quantile.
+    """
+    ref_total, cur_total = sum(reference), sum(current)
+    total = ref_total + cur_total
+    statistic, categories = 0.0, 0
+    for ref_count, cur_count in zip(reference, current):
+        column = ref_count + cur_count
+        if column == 0:
+            continue
+        categories += 1
+        for count, row_total in ((ref_count, ref_total), (cur_count, cur_total)):
+            expected = row_total * column / total
+            statistic += (count - expected) ** 2 / expected
+    dof = categories - 1
+    if dof < 1:
+        return 0.0, math.inf
+    critical = dof * (1 - 2 / (9 * dof) + CHI2_ALPHA_Z * math.sqrt(2 / (9 * dof))) ** 3
+    return statistic, critical
+
+
+def ks_statistic(reference: List[int], current: List[int]) -> float:
+    """Two-sample KS distance between binned samples, evaluated at the bin edges"""
+    ref_total = sum(reference) or 1
+    cur_total = sum(current) or 1
+    ref_cdf = cur_cdf = distance = 0.0
+    for ref_count, cur_count in zip(reference, current):
+        ref_cdf += ref_count / ref_total
+        cur_cdf += cur_count / cur_total
+        distance = max(distance, abs(ref_cdf - cur_cdf))
+    return distance
+
+
+class WindowSketch:
+    """Counts for one time window; its size depends only on the profile"""
+
+    def __init__(self, profile: Dict, started: float):
+        self.started = started
+        self.observations = 0
+        self.numeric = {feature: [0] * (len(spec['edges']) + 1) for feature, spec in profile['numeric'].items()}
+        self.categorical = {
+            feature: [0] * (len(spec['categories']) + 1) for feature, spec in profile['categorical'].items()
+        }
+        self.multilabel = {
+            feature: [0] * (len(spec['categories']) + 1) for feature, spec in profile['multilabel'].items()
+        }
+
+
+class DriftMonitor:
+    """Streaming per-window sketches of serving inputs with PSI/KS drift alerts
+
+    Only bin and category counts are kept; raw inputs are never stored.
+    """
+
+    def __init__(self, profile: Dict, window_seconds: float = 3600.0, min_samples: int = 50,
+                 history: int = 48, on_alert: Callable[[Dict], None] = None, clock: Callable[[], float] = time.time):
+        self.profile = profile
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.on_alert = on_alert or (lambda alert: logger.warning('Input drift: %s', json.dumps(alert)))
+        self.clock = clock
+        self.reports = deque(maxlen=history)
+        self.alerts = deque(maxlen=history * 4)
+        self._lock = threading.Lock()
+
+        # Lookup tables built once so each observation is a few dict/bisect operations
+        self._edges = {feature: spec['edges'] for feature, spec in profile['numeric'].items()}
+        self._psi_groups = {
+            feature: _psi_groups(spec['counts']) for feature, spec in profile['numeric'].items()
+        }
+        self._category_index = {
+            feature: {category: index for index, category in enumerate(spec['categories'])}
+            for kind in ('categorical', 'multilabel') for feature, spec in profile[kind].items()
+        }
+        # Features without a training reference adopt their first full window
+        self._baseline = {
+            feature: {'counts': spec['counts'], 'samples': sum(spec['counts'])} if spec['counts'] is not None else None
+            for kind in ('categorical', 'multilabel') for feature, spec in profile[kind].items()
+        }
+        self._window = WindowSketch(profile, self.clock())
+
+    def observe(self, features: Dict):
+        """Fold one assessment into the current window, closing it first if it has expired"""
+        now = self.clock()
+        closed = None
+        with self._lock:
+            if now - self._window.started >= self.window_seconds:
+                closed = self._window
+                self._window = WindowSketch(self.profile, now)
+            window = self._window
+            window.observations += 1
+            for feature, counts in window.numeric.items():
+                value = features.get(feature)
+                if value is not None:
+                    counts[bisect.bisect_right(self._edges[feature], value)] += 1
+            for feature, counts in window.categorical.items():
+                index = self._category_index[feature]
+                counts[index.get(features.get(feature), len(index))] += 1
+            for feature, counts in window.multilabel.items():
+                index = self._category_index[feature]
+                for label in features.get(feature) or ():
+                    counts[index.get(label, len(index))] += 1
+        if closed is not None:
+            self._close(closed, now)
+
+    def flush(self) -> Optional[Dict]:
+        """Close the current window now, e.g. at shutdown or from a scheduler"""
+        now = self.clock()
+        with self._lock:
+            closed, self._window = self._window, WindowSketch(self.profile, now)
+        return self._close(closed, now)
+
+    def _close(self, window: WindowSketch, now: float) -> Optional[Dict]:
+        if window.observations == 0:
+            return None
+        report = {
+            'window_start': window.started,
+            'window_end': now,
+            'observations': window.observations,
+            'features': {}
+        }
+        for feature, counts in window.numeric.items():
+            reference = self.profile['numeric'][feature]['counts']
+            groups = self._psi_groups[feature]
+            report['features'][feature] = self._compare(
+                _group(reference, groups), _group(counts, groups), sum(reference), sum(counts),
+                ks=ks_statistic(reference, counts)
+            )
+        for kind in ('categorical', 'multilabel'):
+            for feature, counts in getattr(window, kind).items():
+                # Samples are assessments; a multi-label feature can hold several labels per assessment
+                baseline = self._baseline[feature]
+                if baseline is None:
+                    if window.observations >= self.min_samples:
+                        self._baseline[feature] = {'counts': list(counts), 'samples': window.observations}
+                    report['features'][feature] = {'samples': window.observations, 'reference': 'pending'}
+                    continue
+                report['features'][feature] = self._compare(
+                    baseline['counts'], counts, baseline['samples'], window.observations,
+                    chi_square=kind == 'categorical'
+                )
+
+        alerts = [
+            dict(result, feature=feature, window_start=window.started, window_end=now)
+            for feature, result in report['features'].items()
+            if result.get('status') == 'alert'
+        ]
+        with self._lock:
+            self.reports.append(report)
+            self.alerts.extend(alerts)
+        for alert in alerts:
+            self.on_alert(alert)
+        return report
+
+    def _compare(self, reference: List[int], current: List[int], ref_samples: int, samples: int,
+                 ks: float = None, chi_square: bool = False) -> Dict:
+        result = {'samples': samples}
+        if samples < self.min_samples or ref_samples == 0:
+            result['status'] = 'insufficient_data'
+            return result
+        psi = population_stability_index(reference, current)
+        result['psi'] = round(psi, 4)
+        status = 'alert' if psi >= PSI_ALERT else 'warning' if psi >= PSI_WARNING else 'ok'
+        if ks is not None:
+            critical = KS_ALPHA_COEFFICIENT * math.sqrt((ref_samples + samples) / (ref_samples * samples))
+            result['ks'] = round(ks, 4)
+            result['ks_critical'] = round(critical, 4)
+            if ks > critical:
+                status = 'alert'
+        if chi_square:
+            statistic, critical = chi_square_homogeneity(reference, current)
+            result['chi2'] = round(statistic, 4)
+            result['chi2_critical'] = round(critical, 4)
+            if statistic > critical:
+                status = 'alert'
+        result['status'] = status
+        return result
+
+
+def _survey_features(rng: random.Random, df: pd.DataFrame) -> Dict:
+    """Serving features of one survey row drawn with replacement, with app-range emotion and triggers"""
+    from load_test import generate_assessment
+
+    row = df.iloc[rng.randrange(len(df))]
+    assessment = generate_assessment(rng, [('', '')])
+    # Any hour count inside the answer's range buckets back to the same answer
+    lower = 0.0
+    for upper, answer in SOCIAL_MEDIA_RANGES:
+        if answer == row['social medai & video'].strip():
+            break
+        lower = upper
+    hours = lower + 1.0 if math.isinf(upper) else upper
+    return serving_features(
+        row['10th Mark'], row['12th Mark'], row['college mark'], hours,
+        float(str(row['willingness to pursue a career based on their degree']).rstrip('%')),
+        str(row['Financial Status']).strip().capitalize(), assessment['emotion'], assessment['triggers']
+    )
+
+
+def simulate(profile: Dict, requests: int, window: int, seed: int = 0, traffic: str = 'survey',
+             data_path: str = DATA_PATH) -> Dict:
+    """Feed synthetic assessments through the monitor, one window per `window` requests
+
+    `survey` traffic resamples the training survey, so it should raise no alerts;
+    `app` traffic draws uniformly over the app's widget ranges, a real shift from the survey.
+    """
+    from load_test import generate_assessment, load_locations
+
+    rng = random.Random(seed)
+    # Simulated time advances by one unit per request
+    now = [0]
+    monitor = DriftMonitor(profile, window_seconds=window, on_alert=lambda alert: None, clock=lambda: now[0])
+    if traffic == 'survey':
+        df = pd.read_csv(data_path)
+        df.columns = df.columns.str.strip()
+        features = [_survey_features(rng, df) for _ in range(requests)]
+    else:
+        locations = load_locations()
+        features = [
+            serving_features(
+                a['mark10th'], a['mark12th'], a['collegemark'], a['smtime'], a['carrer_willing'],
+                a['financial'], a['emotion'], a['triggers']
+            )
+            for a in (generate_assessment(rng, locations) for _ in range(requests))
+        ]
+    start = time.perf_counter()
+    for now[0], row in enumerate(features):
+        monitor.observe(row)
+    elapsed = time.perf_counter() - start
+    now[0] = requests
+    monitor.flush()
+    return {
+        'requests': requests,
+        'traffic': traffic,
+        'observe_us': round(elapsed * 1e6 / requests, 2),
+        'windows': len(monitor.reports),
+        'alerts': len(monitor.alerts),
+        'alerted_features': sorted({alert['feature'] for alert in monitor.alerts}),
+        'last_report': monitor.reports[-1] if monitor.reports else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Input drift monitoring against a training reference profile')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--data', default=DATA_PATH)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    profile_parser = subparsers.add_parser('build-profile', help='Build the reference profile and save it with the model')
+    profile_parser.add_argument('--dry-run', action='store_true', help='Print the profile without saving it')
+    simulate_parser = subparsers.add_parser('simulate', help='Run synthetic app traffic through the monitor')
+    simulate_parser.add_argument('--requests', type=int, default=5000)
+    simulate_parser.add_argument('--window', type=int, default=1000, help='Requests per window')
+    simulate_parser.add_argument('--seed', type=int, default=0)
+    simulate_parser.add_argument('--traffic', choices=['survey', 'app'], default='survey',
+                                 help='Resample the survey (no drift) or draw uniformly over the app widgets')
+    args = parser.parse_args()
+
+    if args.command == 'build-profile':
+        profile = build_reference_profile(args.data)
+        print(json.dumps(profile, indent=2))
+        if not args.dry_run:
+            model_package = joblib.load(args.model)
+            model_package[PROFILE_KEY] = profile
+            joblib.dump(model_package, args.model)
+        return
+
+    print(json.dumps(simulate(load_reference_profile(model_path=args.model, data_path=args.data),
+                              args.requests, args.window, args.seed, args.traffic, args.data), indent=2))
+
+
+if __name__ == '__main__':
+    main()
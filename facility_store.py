@@ -0,0 +1,285 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from recommendation_engine import ENGINE_SCRIPT_DIR, EMERGENCY_NUMBERS, STATE_CAPITALS
+
+# Default locations for the JSON source and the generated SQLite directory
+DEFAULT_JSON_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'india_mental_health_facilities.json')
+DEFAULT_DB_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'india_mental_health_facilities.db')
+
+FACILITY_KINDS = ('hospitals', 'counseling_centers', 'support_groups')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cities (
+    state TEXT NOT NULL,
+    city TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (state, city)
+);
+CREATE TABLE IF NOT EXISTS facilities (
+    id INTEGER PRIMARY KEY,
+    state TEXT NOT NULL,
+    city TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_facilities_location
+    ON facilities (state, city, kind, position);
+CREATE VIRTUAL TABLE IF NOT EXISTS facilities_fts
+    USING fts5(name, address, services, tokenize='unicode61');
+"""
+
+
+def import_facilities_json(json_path: str = DEFAULT_JSON_PATH, db_path: str = DEFAULT_DB_PATH) -> int:
+    """Import the nested state -> city -> facilities JSON into a SQLite directory.
+
+    Returns the number of facilities written.
+    """
+    with open(json_path, 'r') as f:
+        facilities = json.load(f)
+
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+        facility_id = 0
+        with conn:
+            for state, state_data in facilities.items():
+                for city_position, (city, city_data) in enumerate(state_data.items()):
+                    conn.execute(
+                        'INSERT INTO cities (state, city, position) VALUES (?, ?, ?)',
+                        (state, city, city_position)
+                    )
+                    for kind in FACILITY_KINDS:
+                        for position, facility in enumerate(city_data.get(kind, [])):
+                            facility_id += 1
+                            conn.execute(
+                                'INSERT INTO facilities (id, state, city, kind, position, payload) '
+                                'VALUES (?, ?, ?, ?, ?, ?)',
+                                (facility_id, state, city, kind, position, json.dumps(facility))
+                            )
+                            conn.execute(
+                                'INSERT INTO facilities_fts (rowid, name, address, services) VALUES (?, ?, ?, ?)',
+                                (
+                                    facility_id,
+                                    facility.get('name', ''),
+                                    facility.get('address', ''),
+                                    ' '.join(facility.get('services', []))
+                                )
+                            )
+        conn.execute('ANALYZE')
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+
+    return facility_id
+
+
+class _ConnectionPool:
+    """Read-only SQLite connections kept per thread and re-opened after a fork"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            uri = f'file:{os.path.abspath(self.db_path)}?mode=ro'
+            conn = sqlite3.connect(uri, uri=True)
+            conn.execute('PRAGMA query_only = ON')
+            conn.execute('PRAGMA cache_size = -2048')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+
+class SQLiteFacilityProvider:
+    """Drop-in replacement for LocationBasedRecommendations backed by a SQLite directory"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(
+                f"SQLiteFacilityProvider failed to load file: {db_path}. "
+                f"Run 'python facility_store.py import' to build it."
+            )
+        self.db_path = db_path
+        self.state_capitals = STATE_CAPITALS
+        self._pool = _ConnectionPool(db_path)
+
+    def _load_city(self, state: str, city: str) -> Dict:
+        """Load the facility lists of one city, or {} when the city has no facilities, so it falls back"""
+        rows = self._pool.get().execute(
+            'SELECT kind, payload FROM facilities WHERE state = ? AND city = ? ORDER BY kind, position',
+            (state, city)
+        ).fetchall()
+        if not rows:
+            return {}
+
+        city_data = {kind: [] for kind in FACILITY_KINDS}
+        for kind, payload in rows:
+            city_data[kind].append(json.loads(payload))
+        return city_data
+
+    def _first_city(self, state: str) -> Optional[str]:
+        row = self._pool.get().execute(
+            'SELECT city FROM cities WHERE state = ? ORDER BY position LIMIT 1', (state,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_nearby_facilities(self, state: str, city: str) -> Dict:
+        """Get mental health facilities near the user's location with state capital fallback"""
+        city_data = self._load_city(state, city)
+
+        # If exact city not found, try state capital as fallback
+        if not city_data and state in self.state_capitals:
+            capital_city = self.state_capitals[state]
+            city_data = self._load_city(state, capital_city)
+            if city_data:
+                city_data['fallback_note'] = f"Mental health facilities from {capital_city} (state capital) as {city} information not available"
+
+        # If still no data, try to find any available city in the state
+        if not city_data:
+            fallback_city = self._first_city(state)
+            if fallback_city:
+                city_data = self._load_city(state, fallback_city)
+                city_data['fallback_note'] = f"Mental health facilities from {fallback_city} (nearest major city with data) as {city} information not available"
+
+        # If still no data, provide generic emergency contacts
+        if not city_data:
+            city_data = {
+                'hospitals': [],
+                'counseling_centers': [],
+                'support_groups': [],
+                'fallback_note': f"No specific facility data available for {city}, {state}. Please contact state health department or search online for local mental health services."
+            }
+
+        result = {
+            'hospitals': city_data.get('hospitals', []),
+            'counseling_centers': city_data.get('counseling_centers', []),
+            'support_groups': city_data.get('support_groups', []),
+            'emergency_numbers': [dict(entry) for entry in EMERGENCY_NUMBERS]
+        }
+
+        if 'fallback_note' in city_data:
+            result['fallback_note'] = city_data['fallback_note']
+
+        return result
+
+    def search_facilities(self, query: str, state: str = None, limit: int = 20) -> List[Dict]:
+        """Full-text search over facility name, address and services"""
+        # Quote every term so user input cannot inject FTS5 query syntax
+        terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+        if not terms:
+            return []
+
+        sql = (
+            'SELECT f.state, f.city, f.kind, f.payload FROM facilities_fts '
+            'JOIN facilities f ON f.id = facilities_fts.rowid '
+            'WHERE facilities_fts MATCH ?'
+        )
+        params = [' '.join(terms)]
+        if state:
+            sql += ' AND f.state = ?'
+            params.append(state)
+        sql += ' ORDER BY facilities_fts.rank LIMIT ?'
+        params.append(limit)
+
+        return [
+            dict(json.loads(payload), state=row_state, city=row_city, kind=kind)
+            for row_state, row_city, kind, payload in self._pool.get().execute(sql, params)
+        ]
+
+    def close(self):
+        self._pool.close()
+
+
+def _time_lookups(provider, locations, repeats: int) -> float:
+    """Return mean lookup latency in microseconds"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for state, city in locations:
+            provider.get_nearby_facilities(state, city)
+    return (time.perf_counter() - start) / (repeats * len(locations)) * 1e6
+
+
+def _benchmark_provider(name: str, json_path: str, db_path: str, locations: List[tuple], repeats: int) -> Dict:
+    """Memory and latency of one provider, measured in a fresh process"""
+    from memory_profile import read_rss_kb
+    from recommendation_engine import LocationBasedRecommendations
+
+    rss_before = read_rss_kb()
+    tracemalloc.start()
+    provider = LocationBasedRecommendations(json_path) if name == 'json' else SQLiteFacilityProvider(db_path)
+    # One pass over every city so SQLite's page cache is as warm as it gets
+    for state, city in locations:
+        provider.get_nearby_facilities(state, city)
+    python_heap_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    rss_after = read_rss_kb()
+
+    return {
+        # RSS also counts SQLite's page cache and other allocations tracemalloc cannot see
+        'rss_delta_kb': rss_after - rss_before if rss_before is not None else None,
+        'python_heap_kb': round(python_heap_bytes / 1024, 1),
+        'mean_lookup_us': round(_time_lookups(provider, locations, repeats), 2)
+    }
+
+
+def run_benchmark(json_path: str = DEFAULT_JSON_PATH, db_path: str = DEFAULT_DB_PATH, repeats: int = 200) -> Dict:
+    """Compare resident memory and lookup latency of the JSON and SQLite providers"""
+    with open(os.path.join(ENGINE_SCRIPT_DIR, 'state_city_data.json'), 'r') as f:
+        state_cities = json.load(f)
+    locations = [(state, city) for state, cities in state_cities.items() for city in cities]
+
+    report = {'lookups_per_run': len(locations) * repeats}
+    for name in ('json', 'sqlite'):
+        # RSS never shrinks, so each provider starts from a clean process
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            report[name] = executor.submit(
+                _benchmark_provider, name, json_path, db_path, locations, repeats
+            ).result()
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite-backed mental health facility directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Import the facilities JSON into SQLite')
+    import_parser.add_argument('--json', default=DEFAULT_JSON_PATH)
+    import_parser.add_argument('--db', default=DEFAULT_DB_PATH)
+
+    bench_parser = subparsers.add_parser('benchmark', help='Compare JSON and SQLite providers')
+    bench_parser.add_argument('--json', default=DEFAULT_JSON_PATH)
+    bench_parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    bench_parser.add_argument('--repeats', type=int, default=200)
+
+    args = parser.parse_args()
+    if args.command == 'import':
+        count = import_facilities_json(args.json, args.db)
+        print(f'Imported {count} facilities into {args.db}')
+    else:
+        print(json.dumps(run_benchmark(args.json, args.db, args.repeats), indent=2))
+
+
+if __name__ == '__main__':
+    main()
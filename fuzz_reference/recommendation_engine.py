@@ -0,0 +1,798 @@
+import functools
+import json
+import re
+import os # 🔑 FIX: Import os for path handling
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+# 🔑 FIX: Define the base path for robust file loading within this module
+ENGINE_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Input vocabularies offered by the app
+COURSE_OPTIONS = [
+    'Engineering', 'Medical', 'Law', 'Commerce', 'Arts/Humanities',
+    'Science', 'MBA', 'Computer Science'
+]
+
+EMOTION_OPTIONS = [
+    'Very Happy', 'Happy', 'Content', 'Neutral', 'Slightly Stressed',
+    'Stressed', 'Very Stressed', 'Anxious', 'Depressed', 'Overwhelmed',
+    'Panicked', 'Hopeless'
+]
+
+TRIGGER_OPTIONS = [
+    'Academic pressure', 'Parent scolding/disappointment', 'Relationship issues/breakup',
+    'Financial problems', 'Family conflicts', 'Health issues', 'Career uncertainty',
+    'Social isolation', 'Exam failure', 'Peer pressure', 'Loss of loved one',
+    'Trauma/abuse', 'None/No specific trigger'
+]
+
+# Personalized solution rules, compiled by SolutionRuleSet. Each rule fires on any of
+# its conditions; solutions are emitted once, in table order.
+SOLUTION_RULES = [
+    # Base solutions based on stress level
+    {'levels': ['Fabulous'], 'solutions': [
+        'Continue your excellent stress management practices',
+        'Consider mentoring peers who might be struggling',
+        'Maintain your current healthy routines'
+    ]},
+    {'levels': ['Good'], 'solutions': [
+        'Implement daily 10-minute mindfulness sessions',
+        'Create a structured study schedule',
+        'Join study groups for peer support'
+    ]},
+    {'levels': ['Bad'], 'solutions': [
+        'Seek immediate counseling support',
+        'Reduce academic workload if possible',
+        'Practice daily stress relief techniques',
+        'Connect with campus mental health services'
+    ]},
+    {'levels': ['Awful'], 'solutions': [
+        'URGENT: Seek immediate professional mental health support',
+        'Contact crisis helpline numbers provided',
+        'Inform trusted family member or friend about your situation',
+        'Consider temporary academic leave if recommended by counselor'
+    ]},
+    # Emotion-specific solutions
+    {'emotions': ['Anxious', 'Panicked'], 'solutions': [
+        'Practice deep breathing exercises (4-7-8 technique)',
+        'Try progressive muscle relaxation',
+        'Limit caffeine intake which can worsen anxiety'
+    ]},
+    {'emotions': ['Depressed', 'Hopeless'], 'solutions': [
+        'Establish daily sunlight exposure routine',
+        'Engage in physical activity, even light walking',
+        'Reach out to support network regularly'
+    ]},
+    {'emotions': ['Overwhelmed'], 'solutions': [
+        'Break large tasks into smaller, manageable steps',
+        'Use time-blocking technique for better organization',
+        'Practice saying "no" to non-essential commitments'
+    ]},
+    # Trigger-specific solutions; a trigger matches the first rule whose text it contains
+    {'trigger_contains': 'Academic pressure', 'solutions': [
+        'Discuss academic expectations with professors or academic advisor'
+    ]},
+    {'trigger_contains': 'Financial problems', 'solutions': [
+        'Explore financial aid options and scholarship opportunities'
+    ]},
+    {'trigger_contains': 'Relationship issues', 'solutions': [
+        'Consider relationship counseling or focus on self-care during this transition'
+    ]},
+    {'trigger_contains': 'Family conflicts', 'solutions': [
+        'Practice setting healthy boundaries with family members'
+    ]},
+    # Trauma-informed solutions
+    {'trauma': True, 'solutions': [
+        'Consider trauma-informed therapy (EMDR, CBT)',
+        'Explore support groups for trauma survivors',
+        'Practice grounding techniques during flashbacks or triggers',
+        'Create a safety plan with trusted individuals'
+    ]},
+    # Context-specific solutions, only for context longer than 20 characters
+    {'context_keywords': ['sleep', 'tired'], 'solutions': [
+        'Prioritize sleep hygiene - aim for 7-9 hours nightly'
+    ]},
+    {'context_keywords': ['study', 'exam'], 'solutions': [
+        'Implement active study techniques like spaced repetition'
+    ]},
+    {'context_keywords': ['friend', 'social'], 'solutions': [
+        'Nurture existing friendships and consider joining social activities'
+    ]},
+]
+
+# State capital mapping used for facility fallback
+STATE_CAPITALS = {
+    'Andhra Pradesh': 'Amaravati',
+    'Arunachal Pradesh': 'Itanagar',
+    'Assam': 'Dispur',
+    'Bihar': 'Patna',
+    'Chhattisgarh': 'Raipur',
+    'Goa': 'Panaji',
+    'Gujarat': 'Gandhinagar',
+    'Haryana': 'Chandigarh',
+    'Himachal Pradesh': 'Shimla',
+    'Jharkhand': 'Ranchi',
+    'Karnataka': 'Bangalore',
+    'Kerala': 'Thiruvananthapuram',
+    'Madhya Pradesh': 'Bhopal',
+    'Maharashtra': 'Mumbai',
+    'Manipur': 'Imphal',
+    'Meghalaya': 'Shillong',
+    'Mizoram': 'Aizawl',
+    'Nagaland': 'Kohima',
+    'Odisha': 'Bhubaneswar',
+    'Punjab': 'Chandigarh',
+    'Rajasthan': 'Jaipur',
+    'Sikkim': 'Gangtok',
+    'Tamil Nadu': 'Chennai',
+    'Telangana': 'Hyderabad',
+    'Tripura': 'Agartala',
+    'Uttar Pradesh': 'Lucknow',
+    'Uttarakhand': 'Dehradun',
+    'West Bengal': 'Kolkata',
+    'Andaman and Nicobar Islands': 'Port Blair',
+    'Chandigarh': 'Chandigarh',
+    'Dadra and Nagar Haveli and Daman and Diu': 'Daman',
+    'Delhi': 'New Delhi',
+    'Jammu and Kashmir': 'Srinagar',
+    'Ladakh': 'Leh',
+    'Lakshadweep': 'Kavaratti',
+    'Puducherry': 'Puducherry'
+}
+
+# Crisis helplines included with every facility lookup
+EMERGENCY_NUMBERS = [
+    {
+        'name': 'AASRA (24/7 Crisis Helpline)',
+        'number': '9820466726',
+        'description': 'Suicide prevention and crisis intervention'
+    },
+    {
+        'name': 'Vandrevala Foundation',
+        'number': '9999666555',
+        'description': '24/7 mental health support'
+    },
+    {
+        'name': 'Sneha India',
+        'number': '044-24640050',
+        'description': 'Emotional support and suicide prevention'
+    },
+    {
+        'name': 'iCall (TISS)',
+        'number': '9152987821',
+        'description': 'Psychosocial helpline (Mon-Sat, 8AM-10PM)'
+    },
+    {
+        'name': 'Kiran Mental Health Helpline',
+        'number': '1800-599-0019',
+        'description': 'Government of India 24/7 mental health support'
+    }
+]
+
+def predict_stress_level(mark10th, mark12th, collegemark, carrer_willing, smtime, financial):
+    """Simple rule-based prediction"""
+    
+    academic_avg = (mark10th + mark12th + collegemark) / 3
+    risk_score = 0
+    
+    # Academic factors
+    if academic_avg < 50:
+        risk_score += 3
+    elif academic_avg < 70:
+        risk_score += 1
+    
+    # Career factors
+    if carrer_willing < 30:
+        risk_score += 2
+    elif carrer_willing < 60:
+        risk_score += 1
+    
+    # Social media
+    if smtime > 8:
+        risk_score += 2
+    elif smtime > 5:
+        risk_score += 1
+    
+    # Financial
+    if financial == 'Awful':
+        risk_score += 2
+    elif financial == 'Bad':
+        risk_score += 1
+    
+    # Map to stress level
+    if risk_score >= 6:
+        return 'Awful', [0.1, 0.1, 0.2, 0.6]
+    elif risk_score >= 4:
+        return 'Bad', [0.1, 0.2, 0.6, 0.1]
+    elif risk_score >= 2:
+        return 'Good', [0.2, 0.6, 0.1, 0.1]
+    else:
+        return 'Fabulous', [0.6, 0.3, 0.1, 0.0]
+
+class EmotionalAnalyzer:
+    def __init__(self):
+        # Emotion weights for stress calculation
+        self.emotion_stress_weights = {
+            'Very Happy': 0.1,
+            'Happy': 0.2,
+            'Content': 0.3,
+            'Neutral': 0.4,
+            'Slightly Stressed': 0.5,
+            'Stressed': 0.7,
+            'Very Stressed': 0.8,
+            'Anxious': 0.8,
+            'Depressed': 0.9,
+            'Overwhelmed': 0.9,
+            'Panicked': 1.0,
+            'Hopeless': 1.0
+        }
+        
+        # Trigger event severity weights
+        self.trigger_event_weights = {
+            'Academic pressure': 0.7,
+            'Parent scolding/disappointment': 0.6,
+            'Relationship issues/breakup': 0.8,
+            'Financial problems': 0.8,
+            'Family conflicts': 0.7,
+            'Health issues': 0.9,
+            'Career uncertainty': 0.7,
+            'Social isolation': 0.6,
+            'Exam failure': 0.8,
+            'Peer pressure': 0.5,
+            'Loss of loved one': 1.0,
+            'Trauma/abuse': 1.0,
+            'None/No specific trigger': 0.2
+        }
+        
+        # Keywords for trauma detection in text
+        self.trauma_keywords = [
+            'childhood trauma', 'abuse', 'bullying', 'violence', 'assault',
+            'neglect', 'divorce', 'death', 'accident', 'harassment',
+            'discrimination', 'betrayal', 'abandonment', 'rejection'
+        ]
+    
+    def analyze_emotional_state(self, emotion: str, trigger_events: List[str], context_text: str = "") -> Dict:
+        """Analyze emotional state and return stress factors"""
+        
+        emotion_score, trigger_score = self.score_emotion_and_triggers(emotion, trigger_events)
+        trauma_detected, sentiment_score = self.analyze_context(context_text)
+        
+        return self.build_analysis(
+            emotion, trigger_events, emotion_score, trigger_score, trauma_detected, sentiment_score
+        )
+    
+    def score_emotion_and_triggers(self, emotion: str, trigger_events: List[str]) -> Tuple[float, float]:
+        """Text-independent stress factors"""
+        
+        # Get emotion stress score
+        emotion_score = self.emotion_stress_weights.get(emotion, 0.5)
+        
+        # Calculate trigger event score (average if multiple)
+        trigger_scores = [self.trigger_event_weights.get(event, 0.5) for event in trigger_events]
+        trigger_score = sum(trigger_scores) / len(trigger_scores) if trigger_scores else 0.3
+        
+        return emotion_score, trigger_score
+    
+    def analyze_context(self, context_text: str) -> Tuple[bool, float]:
+        """Text-dependent stress factors: trauma indicators and sentiment"""
+        
+        # Analyze context text for trauma indicators
+        trauma_detected = self._detect_trauma_in_text(context_text)
+        
+        # Sentiment analysis of context text
+        sentiment_score = self._analyze_sentiment(context_text)
+        
+        return trauma_detected, sentiment_score
+    
+    def build_analysis(
+        self,
+        emotion: str,
+        trigger_events: List[str],
+        emotion_score: float,
+        trigger_score: float,
+        trauma_detected: bool,
+        sentiment_score: float
+    ) -> Dict:
+        """Assemble the emotional analysis result from its factors"""
+        return {
+            'emotion_score': emotion_score,
+            'trigger_score': trigger_score,
+            'trauma_detected': trauma_detected,
+            'trauma_score': 0.9 if trauma_detected else 0.0,
+            'sentiment_score': sentiment_score,
+            'analysis_summary': {
+                'primary_emotion': emotion,
+                'trigger_events': trigger_events,
+                'trauma_indicators': trauma_detected,
+                'context_sentiment': 'negative' if sentiment_score > 0.6 else 'neutral' if sentiment_score > 0.4 else 'positive'
+            }
+        }
+    
+    def _detect_trauma_in_text(self, text: str) -> bool:
+        """Detect trauma-related keywords in context text"""
+        if not text:
+            return False
+        
+        text_lower = text.lower()
+        for keyword in self.trauma_keywords:
+            if keyword in text_lower:
+                return True
+        return False
+    
+    def _analyze_sentiment(self, text: str) -> float:
+        """Simple sentiment analysis - returns score between 0 (positive) and 1 (negative)"""
+        if not text:
+            return 0.5
+        
+        negative_words = [
+            'sad', 'angry', 'frustrated', 'terrible', 'awful', 'hate', 'angry',
+            'depressed', 'hopeless', 'worthless', 'failure', 'disappointed',
+            'stressed', 'overwhelmed', 'exhausted', 'tired', 'worried', 'scared'
+        ]
+        
+        positive_words = [
+            'happy', 'good', 'great', 'excellent', 'wonderful', 'amazing',
+            'love', 'excited', 'confident', 'optimistic', 'hopeful', 'peaceful'
+        ]
+        
+        text_lower = text.lower()
+        negative_count = sum(1 for word in negative_words if word in text_lower)
+        positive_count = sum(1 for word in positive_words if word in text_lower)
+        
+        total_words = len(text.split())
+        if total_words == 0:
+            return 0.5
+        
+        # Calculate sentiment score (higher = more negative)
+        sentiment_score = (negative_count - positive_count + total_words * 0.5) / total_words
+        return max(0.0, min(1.0, sentiment_score))
+
+class CourseAnalyzer:
+    # 🔑 FIX: Apply robust path handling here
+    def __init__(self):
+        course_patterns_path = os.path.join(ENGINE_SCRIPT_DIR, 'course_stress_patterns.json')
+        try:
+            with open(course_patterns_path, 'r') as f:
+                self.course_patterns = json.load(f)
+        except FileNotFoundError as e:
+            # Re-raise the error with the absolute path for clarity
+            raise FileNotFoundError(f"CourseAnalyzer failed to load file: {course_patterns_path}. Error: {e}")
+    
+    def get_course_stress_factor(self, course: str) -> float:
+        """Get stress factor for a specific course"""
+        return self.course_patterns.get(course, {}).get('base_stress_factor', 0.5)
+    
+    def get_course_specific_advice(self, course: str, stress_level: str) -> List[str]:
+        """Get course-specific coping strategies"""
+        course_data = self.course_patterns.get(course, {})
+        # Copy so the loaded patterns are not extended on every call
+        strategies = list(course_data.get('coping_strategies', [
+            'Develop effective study habits',
+            'Seek help from professors and peers',
+            'Maintain work-life balance'
+        ]))
+        
+        if stress_level in ['Bad', 'Awful']:
+            # Add more intensive strategies for high stress
+            strategies.extend([
+                f'Consider academic counseling for {course} students',
+                'Explore stress management workshops specific to your field',
+                f'Connect with senior students in {course} for guidance'
+            ])
+        
+        return strategies
+
+class LocationBasedRecommendations:
+    # 🔑 FIX: Apply robust path handling here
+    def __init__(self):
+        facilities_path = os.path.join(ENGINE_SCRIPT_DIR, 'india_mental_health_facilities.json')
+        try:
+            with open(facilities_path, 'r') as f:
+                self.facilities = json.load(f)
+        except FileNotFoundError as e:
+            # Re-raise the error with the absolute path for clarity
+            raise FileNotFoundError(f"LocationBasedRecommendations failed to load file: {facilities_path}. Error: {e}")
+
+        # State capital mapping for fallback (unchanged)
+        self.state_capitals = STATE_CAPITALS
+    
+    def get_nearby_facilities(self, state: str, city: str) -> Dict:
+        """Get mental health facilities near the user's location with state capital fallback"""
+        state_data = self.facilities.get(state, {})
+        city_data = state_data.get(city, {})
+        
+        # If exact city not found, try state capital as fallback
+        if not city_data and state in self.state_capitals:
+            capital_city = self.state_capitals[state]
+            city_data = state_data.get(capital_city, {})
+            if city_data:
+                # Add note about fallback to capital
+                fallback_note = f"Mental health facilities from {capital_city} (state capital) as {city} information not available"
+                city_data = city_data.copy()  # Don't modify original data
+                city_data['fallback_note'] = fallback_note
+        
+        # If still no data, try to find any available city in the state
+        if not city_data:
+            available_cities = list(state_data.keys())
+            if available_cities:
+                fallback_city = available_cities[0]
+                city_data = state_data[fallback_city].copy()
+                city_data['fallback_note'] = f"Mental health facilities from {fallback_city} (nearest major city with data) as {city} information not available"
+        
+        # If still no data, provide generic emergency contacts
+        if not city_data:
+            city_data = {
+                'hospitals': [],
+                'counseling_centers': [],
+                'support_groups': [],
+                'fallback_note': f"No specific facility data available for {city}, {state}. Please contact state health department or search online for local mental health services."
+            }
+        
+        # Always include emergency numbers
+        emergency_numbers = [dict(entry) for entry in EMERGENCY_NUMBERS]
+        
+        result = {
+            'hospitals': city_data.get('hospitals', []),
+            'counseling_centers': city_data.get('counseling_centers', []),
+            'support_groups': city_data.get('support_groups', []),
+            'emergency_numbers': emergency_numbers
+        }
+        
+        # Add fallback note if present
+        if 'fallback_note' in city_data:
+            result['fallback_note'] = city_data['fallback_note']
+        
+        return result
+
+class SolutionRuleSet:
+    """SOLUTION_RULES compiled to bitmasks
+
+    Every input (stress level, emotion, triggers, trauma flag, context keywords) sets
+    one bit per rule it satisfies, so a request reduces to a single integer mask and
+    the solution list for each distinct mask is built once and reused.
+    """
+
+    MIN_CONTEXT_LENGTH = 21
+
+    def __init__(self, rules: List[Dict] = None):
+        rules = SOLUTION_RULES if rules is None else rules
+
+        # Shared solution table, in first-appearance order
+        self.solution_table = []
+        solution_index = {}
+        self._level_bits, self._emotion_bits = {}, {}
+        self._trigger_rules, self._context_rules = [], []
+        self._trauma_bit = 0
+        self.rule_masks, self.rule_solutions = [], []
+
+        for rule_index, rule in enumerate(rules):
+            bit = 1 << rule_index
+            for level in rule.get('levels', []):
+                self._level_bits[level] = self._level_bits.get(level, 0) | bit
+            for emotion in rule.get('emotions', []):
+                self._emotion_bits[emotion] = self._emotion_bits.get(emotion, 0) | bit
+            if 'trigger_contains' in rule:
+                self._trigger_rules.append((rule['trigger_contains'], bit))
+            if rule.get('trauma'):
+                self._trauma_bit |= bit
+            if 'context_keywords' in rule:
+                self._context_rules.append((tuple(rule['context_keywords']), bit))
+
+            indices = []
+            for solution in rule['solutions']:
+                if solution not in solution_index:
+                    solution_index[solution] = len(self.solution_table)
+                    self.solution_table.append(solution)
+                indices.append(solution_index[solution])
+            self.rule_masks.append(bit)
+            self.rule_solutions.append(indices)
+
+        # Unknown stress levels fall back to the 'Good' rules
+        self._default_level_bits = self._level_bits.get('Good', 0)
+        self._trigger_bits = {trigger: self._match_trigger(trigger) for trigger in TRIGGER_OPTIONS}
+        self._solutions_by_mask = {}
+
+        # Dense form of the rules for vectorized batches
+        self._rule_mask_array = np.array(self.rule_masks, dtype=np.uint64)
+        self._incidence = np.zeros((len(rules), len(self.solution_table)), dtype=np.uint8)
+        for rule_index, indices in enumerate(self.rule_solutions):
+            self._incidence[rule_index, indices] = 1
+
+    def _match_trigger(self, trigger: str) -> int:
+        for text, bit in self._trigger_rules:
+            if text in trigger:
+                return bit
+        return 0
+
+    def base_mask(self, stress_level: str, emotion: str, trigger_events: List[str], trauma_detected: bool) -> int:
+        """Bitmask of the rules satisfied by the categorical inputs"""
+        mask = self._level_bits.get(stress_level, self._default_level_bits)
+        mask |= self._emotion_bits.get(emotion, 0)
+        for trigger in trigger_events:
+            trigger_bit = self._trigger_bits.get(trigger)
+            mask |= self._match_trigger(trigger) if trigger_bit is None else trigger_bit
+        if trauma_detected:
+            mask |= self._trauma_bit
+        return mask
+
+    def context_mask(self, context_text: str) -> int:
+        """Bitmask of the rules satisfied by keywords in the context text"""
+        mask = 0
+        if context_text and len(context_text) >= self.MIN_CONTEXT_LENGTH:
+            context_lower = context_text.lower()
+            for keywords, bit in self._context_rules:
+                for keyword in keywords:
+                    if keyword in context_lower:
+                        mask |= bit
+                        break
+        return mask
+
+    def request_mask(
+        self,
+        stress_level: str,
+        emotion: str,
+        trigger_events: List[str],
+        trauma_detected: bool,
+        context_text: str
+    ) -> int:
+        """Bitmask of the rules satisfied by one request"""
+        return (
+            self.base_mask(stress_level, emotion, trigger_events, trauma_detected)
+            | self.context_mask(context_text)
+        )
+
+    def solutions_for_mask(self, mask: int) -> Tuple[str, ...]:
+        """Solutions of every rule in the mask, computed once per distinct mask"""
+        solutions = self._solutions_by_mask.get(mask)
+        if solutions is None:
+            indices = sorted({
+                index
+                for rule_mask, rule_indices in zip(self.rule_masks, self.rule_solutions)
+                if mask & rule_mask
+                for index in rule_indices
+            })
+            solutions = tuple(self.solution_table[index] for index in indices)
+            self._solutions_by_mask[mask] = solutions
+        return solutions
+
+    def evaluate(
+        self,
+        stress_level: str,
+        emotion: str,
+        trigger_events: List[str],
+        trauma_detected: bool,
+        context_text: str
+    ) -> List[str]:
+        return list(self.solutions_for_mask(
+            self.request_mask(stress_level, emotion, trigger_events, trauma_detected, context_text)
+        ))
+
+    def evaluate_batch(self, masks) -> np.ndarray:
+        """Boolean matrix (requests x solution_table) for an array of request masks"""
+        masks = np.asarray(masks, dtype=np.uint64)
+        fired = ((masks[:, None] & self._rule_mask_array[None, :]) != 0).astype(np.uint8)
+        return (fired @ self._incidence) > 0
+
+class PersonalizedRecommendationEngine:
+    # 🔑 Text-independent results are memoized per categorical key; only context_text is analyzed per request
+    TEXT_INDEPENDENT_CACHE_SIZE = 65536
+    FACILITY_CACHE_SIZE = 4096
+
+    def __init__(self, location_recommendations=None):
+        self.emotional_analyzer = EmotionalAnalyzer()
+        self.course_analyzer = CourseAnalyzer()
+        self.solution_rules = SolutionRuleSet()
+        # Any provider exposing get_nearby_facilities(state, city) can be plugged in
+        self.location_recommendations = location_recommendations or LocationBasedRecommendations()
+
+        # Caches are per instance so they never outlive the analyzers and provider they depend on
+        self._categorical_factors = functools.lru_cache(maxsize=self.TEXT_INDEPENDENT_CACHE_SIZE)(
+            self._compute_categorical_factors
+        )
+        self._level_results = functools.lru_cache(maxsize=self.TEXT_INDEPENDENT_CACHE_SIZE)(
+            self._compute_level_results
+        )
+        self._facilities = functools.lru_cache(maxsize=self.FACILITY_CACHE_SIZE)(
+            self.location_recommendations.get_nearby_facilities
+        )
+        # The common empty-context case needs no text analysis at all
+        self._empty_context = self.emotional_analyzer.analyze_context("") + (self.solution_rules.context_mask(""),)
+    
+    def generate_comprehensive_recommendations(
+        self, 
+        ml_prediction: str,
+        ml_probabilities: List[float],
+        course: str,
+        emotion: str,
+        trigger_events: List[str],
+        context_text: str,
+        state: str,
+        city: str,
+        user_profile: Dict
+    ) -> Dict:
+        """Generate comprehensive personalized recommendations"""
+        
+        # Text-dependent delta: trauma flag, sentiment and context keyword rules
+        if context_text:
+            trauma_detected, sentiment_score = self.emotional_analyzer.analyze_context(context_text)
+            context_mask = self.solution_rules.context_mask(context_text)
+        else:
+            trauma_detected, sentiment_score, context_mask = self._empty_context
+        
+        # Text-independent factors for this course, emotion and trigger combination
+        course_stress_factor, emotion_score, trigger_score = self._categorical_factors(
+            course, emotion, tuple(trigger_events)
+        )
+        emotional_analysis = self.emotional_analyzer.build_analysis(
+            emotion, trigger_events, emotion_score, trigger_score, trauma_detected, sentiment_score
+        )
+        
+        # Calculate enhanced stress score
+        enhanced_stress_score = self._calculate_enhanced_stress_score(
+            ml_probabilities, course_stress_factor, emotional_analysis
+        )
+        
+        # Determine final stress level
+        final_stress_level = self._determine_stress_level(enhanced_stress_score)
+        
+        base_mask, immediate_actions, course_advice, long_term_strategies = self._level_results(
+            final_stress_level, course, emotion, tuple(trigger_events), trauma_detected
+        )
+        
+        # Generate personalized solutions
+        personalized_solutions = list(self.solution_rules.solutions_for_mask(base_mask | context_mask))
+        
+        # Get location-based recommendations (copied so callers cannot alter the cached block)
+        location_facilities = {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in self._facilities(state, city).items()
+        }
+        
+        return {
+            'original_ml_prediction': ml_prediction,
+            'enhanced_stress_level': final_stress_level,
+            'stress_score_breakdown': {
+                'ml_model_contribution': 0.70,
+                'course_factor_contribution': 0.10,
+                'emotional_state_contribution': 0.10,
+                'trigger_events_contribution': 0.10,
+                'final_score': enhanced_stress_score
+            },
+            'emotional_analysis': emotional_analysis,
+            'personalized_solutions': personalized_solutions,
+            'course_specific_advice': list(course_advice),
+            'location_based_facilities': location_facilities,
+            'immediate_actions': list(immediate_actions),
+            'long_term_strategies': list(long_term_strategies)
+        }
+    
+    def _compute_categorical_factors(self, course: str, emotion: str, trigger_events: Tuple[str, ...]) -> Tuple[float, float, float]:
+        """Course, emotion and trigger factors of the enhanced stress score"""
+        emotion_score, trigger_score = self.emotional_analyzer.score_emotion_and_triggers(emotion, list(trigger_events))
+        return self.course_analyzer.get_course_stress_factor(course), emotion_score, trigger_score
+    
+    def _compute_level_results(
+        self,
+        stress_level: str,
+        course: str,
+        emotion: str,
+        trigger_events: Tuple[str, ...],
+        trauma_detected: bool
+    ) -> Tuple:
+        """Everything in the result that depends on the final level but not on the context text"""
+        return (
+            self.solution_rules.base_mask(stress_level, emotion, trigger_events, trauma_detected),
+            tuple(self._get_immediate_actions(stress_level, {'trauma_detected': trauma_detected})),
+            tuple(self.course_analyzer.get_course_specific_advice(course, stress_level)),
+            tuple(self._get_long_term_strategies(stress_level, course))
+        )
+    
+    def _calculate_enhanced_stress_score(
+        self, 
+        ml_probabilities: List[float], 
+        course_factor: float, 
+        emotional_analysis: Dict
+    ) -> float:
+        """Calculate the enhanced stress score using weighted factors"""
+        
+        # Convert ML probabilities to stress score (higher index = higher stress)
+        ml_stress_score = sum(i * prob for i, prob in enumerate(ml_probabilities)) / (len(ml_probabilities) - 1)
+        
+        # Combine all factors
+        final_score = (
+            0.70 * ml_stress_score +
+            0.10 * course_factor +
+            0.10 * emotional_analysis['emotion_score'] +
+            0.10 * emotional_analysis['trigger_score']
+        )
+        
+        # Add trauma bonus if detected
+        if emotional_analysis['trauma_detected']:
+            final_score = min(1.0, final_score + 0.1)
+        
+        return final_score
+    
+    def _determine_stress_level(self, score: float) -> str:
+        """Determine stress level based on enhanced score"""
+        if score >= 0.8:
+            return 'Awful'
+        elif score >= 0.6:
+            return 'Bad'
+        elif score >= 0.4:
+            return 'Good'
+        else:
+            return 'Fabulous'
+    
+    def _get_immediate_actions(self, stress_level: str, emotional_analysis: Dict) -> List[str]:
+        """Get immediate actions based on stress level and emotional state"""
+        
+        immediate_actions = []
+        
+        if stress_level == 'Awful':
+            immediate_actions = [
+                '🚨 Call emergency mental health helpline immediately',
+                '🏥 Visit nearest hospital emergency room if having suicidal thoughts',
+                '📞 Contact trusted friend or family member to stay with you',
+                '💊 Avoid alcohol, drugs, or any impulsive decisions'
+            ]
+        elif stress_level == 'Bad':
+            immediate_actions = [
+                '📞 Schedule appointment with counselor within 24-48 hours',
+                '🧘 Practice 5-minute breathing exercise right now',
+                '💧 Drink water and ensure you\'ve eaten today',
+                '📱 Limit social media and news consumption today'
+            ]
+        elif stress_level == 'Good':
+            immediate_actions = [
+                '🧘 Take 5 deep breaths and practice mindfulness',
+                '🚶 Go for a 10-minute walk outside',
+                '📝 Write down three things you\'re grateful for',
+                '💬 Reach out to a friend or family member'
+            ]
+        else:
+            immediate_actions = [
+                '✨ Celebrate your good mental health',
+                '🤝 Consider supporting a friend who might be struggling',
+                '📚 Continue your healthy habits',
+                '🧘 Practice maintenance mindfulness'
+            ]
+        
+        # Add trauma-specific immediate actions if trauma detected
+        if emotional_analysis.get('trauma_detected'):
+            immediate_actions.insert(0, '🛡️ Use grounding techniques: 5 things you can see, 4 you can hear, 3 you can touch')
+        
+        return immediate_actions
+    
+    def _get_long_term_strategies(self, stress_level: str, course: str) -> List[str]:
+        """Get long-term strategies for sustained mental health"""
+        
+        strategies = [
+            'Develop a consistent daily routine',
+            'Build a strong support network of friends and mentors',
+            'Practice regular physical exercise (30+ minutes, 3x week)',
+            'Learn and practice stress management techniques',
+            'Maintain healthy sleep schedule (7-9 hours nightly)',
+            'Consider regular therapy or counseling sessions',
+            'Engage in hobbies and activities outside academics'
+        ]
+        
+        # Add course-specific long-term strategies
+        if course == 'Engineering':
+            strategies.append('Join technical communities and coding groups for peer support')
+        elif course == 'Medical':
+            strategies.append('Practice self-care techniques to prevent burnout in healthcare career')
+        elif course == 'MBA':
+            strategies.append('Develop emotional intelligence and leadership skills')
+        
+        # Add stress-level specific strategies
+        if stress_level in ['Bad', 'Awful']:
+            strategies.extend([
+                'Regular psychiatric evaluation if recommended',
+                'Medication management if prescribed',
+                'Intensive therapy sessions (weekly or bi-weekly)',
+                'Academic accommodations if needed'
+            ])
+        
+        return strategies
\ No newline at end of file
@@ -0,0 +1,12 @@
+import math
+from typing import List
+
+# 🔑 Percentiles shared by the app's service-level reports and the offline benchmarks
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list, or None when it is empty"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+from latency_stats import percentile
+from recommendation_engine import (
+    ENGINE_SCRIPT_DIR, COURSE_OPTIONS, EMOTION_OPTIONS, TRIGGER_OPTIONS, score_assessment
+)
+
+# 🔑 Offline load generator for the app (AppTest), the engine and HTTP scoring endpoints
+APP_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'streamlit_app.py')
+STATE_CITY_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'state_city_data.json')
+
+# Mix of empty, everyday and trauma-related context descriptions
+CONTEXT_SNIPPETS = [
+    '',
+    '',
+    '',
+    'I am tired and cannot sleep before the exam next week',
+    'Feeling overwhelmed with study load and worried about placements',
+    'My friends are supportive but I still feel stressed and exhausted',
+    'Things are good, I feel hopeful and confident about my project',
+    'I faced bullying in hostel and have been scared to go to class',
+    'Parents divorce last year and I feel hopeless and worthless',
+    'Social media takes most of my time and I feel like a failure',
+]
+
+FINANCIAL_OPTIONS = ['Awful', 'Bad', 'Good', 'Fabulous']
+
+
+def load_locations() -> List[tuple]:
+    with open(STATE_CITY_PATH, 'r') as f:
+        state_cities = json.load(f)
+    return [(state, city) for state, cities in state_cities.items() for city in cities]
+
+
+def generate_assessment(rng: random.Random, locations: List[tuple]) -> Dict:
+    """Draw one random assessment from the app's real option lists and widget ranges"""
+    state, city = rng.choice(locations)
+    triggers = rng.sample(TRIGGER_OPTIONS, rng.choice([1, 1, 2, 3]))
+    return {
+        'mark10th': rng.randint(30, 100),
+        'mark12th': rng.randint(30, 100),
+        'collegemark': rng.randint(30, 100),
+        'course': rng.choice(COURSE_OPTIONS),
+        'gender': rng.choice(['Male', 'Female']),
+        'height': rng.randint(140, 200),
+        'weight': rng.randint(30, 120),
+        'studytime': rng.randint(0, 12),
+        'smtime': rng.randint(0, 24),
+        'travel': rng.randint(0, 180),
+        'salexpect': rng.randint(10000, 2000000),
+        'carrer_willing': rng.randint(0, 100),
+        'financial': rng.choice(FINANCIAL_OPTIONS),
+        'emotion': rng.choice(EMOTION_OPTIONS),
+        'triggers': triggers,
+        'context': rng.choice(CONTEXT_SNIPPETS),
+        'state': state,
+        'city': city,
+    }
+
+
+def _by_label(widgets, label: str):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise KeyError(f'Widget not found: {label}')
+
+
+def _drive_app(assessment: Dict):
+    """Fill in every widget of streamlit_app.py and press the predict button"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    for label, key in (
+        ('10th Grade Marks (%)', 'mark10th'), ('12th Grade Marks (%)', 'mark12th'),
+        ('College Marks (%)', 'collegemark'), ('Height (cm)', 'height'), ('Weight (kg)', 'weight'),
+        ('Study Time (hours/day)', 'studytime'), ('Social Media Time (hours/day)', 'smtime'),
+        ('Travel Time (minutes)', 'travel'), ('Career Willingness (%)', 'carrer_willing'),
+    ):
+        _by_label(at.slider, label).set_value(assessment[key])
+    _by_label(at.number_input, 'Salary Expectation (₹)').set_value(assessment['salexpect'])
+    _by_label(at.selectbox, 'Select your professional course:').select(assessment['course'])
+    _by_label(at.selectbox, 'Gender').select(assessment['gender'])
+    _by_label(at.selectbox, 'Financial Status').select(assessment['financial'])
+    _by_label(at.selectbox, 'How are you feeling right now?').select(assessment['emotion'])
+    _by_label(at.selectbox, 'Select your state:').select(assessment['state'])
+    _by_label(
+        at.multiselect, 'What events might have contributed to your current emotional state?'
+    ).set_value(assessment['triggers'])
+    _by_label(
+        at.text_area, 'Describe your current situation or any additional context:'
+    ).input(assessment['context'])
+    # City options depend on the selected state
+    at.run()
+    _by_label(at.selectbox, 'Select your city:').select(assessment['city'])
+    at.button[0].click().run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+
+def _post_json(url: str, assessment: Dict):
+    request = urllib.request.Request(
+        url, data=json.dumps(assessment).encode(), headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+
+
+def _process_usage() -> Dict:
+    times = os.times()
+    rss_kb = None
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss_kb = int(line.split()[1])
+                    break
+    except OSError:
+        pass
+    return {
+        'pid': os.getpid(),
+        'cpu_seconds': round(times.user + times.system, 3),
+        'rss_kb': rss_kb,
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+def _isolate_app_stores(directory: str):
+    """Point every store the app writes to at a scratch directory, so synthetic traffic never reaches real data"""
+    os.environ['COHORT_DB_PATH'] = os.path.join(directory, 'cohort_rollups.db')
+    os.environ['CRISIS_ALERT_LOG'] = os.path.join(directory, 'crisis_alerts.jsonl')
+    os.environ['CRISIS_OUTBOX_DB'] = os.path.join(directory, 'crisis_outbox.db')
+    os.environ.pop('CRISIS_WEBHOOK_URL', None)
+
+
+def _worker(mode: str, seed: int, requests: int, url: str = None) -> Dict:
+    """Run one worker's share of requests and report its latencies and resource usage"""
+    with tempfile.TemporaryDirectory(prefix='load_test_') as scratch:
+        if mode == 'app':
+            _isolate_app_stores(scratch)
+        return _run_requests(mode, seed, requests, url)
+
+
+def _run_requests(mode: str, seed: int, requests: int, url: str = None) -> Dict:
+    rng = random.Random(seed)
+    locations = load_locations()
+
+    if mode == 'engine':
+        from recommendation_engine import PersonalizedRecommendationEngine
+        engine = PersonalizedRecommendationEngine()
+        call = lambda assessment: score_assessment(engine, assessment)
+    elif mode == 'app':
+        call = _drive_app
+    else:
+        call = lambda assessment: _post_json(url, assessment)
+
+    # One warm-up request so model and data loading is not counted as latency; its failure is
+    # reported with the errors, though it is not one of the measured requests
+    latencies, errors = [], []
+    try:
+        call(generate_assessment(rng, locations))
+    except Exception as e:
+        errors.append(f'warm-up: {type(e).__name__}: {e}')
+    start_usage = _process_usage()
+
+    for _ in range(requests):
+        assessment = generate_assessment(rng, locations)
+        start = time.perf_counter()
+        try:
+            call(assessment)
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(f'{type(e).__name__}: {e}')
+
+    usage = _process_usage()
+    usage['cpu_seconds'] = round(usage['cpu_seconds'] - start_usage['cpu_seconds'], 3)
+    return {'requests': requests, 'latencies': latencies, 'errors': errors, 'usage': usage}
+
+
+def run_load_test(mode: str, concurrency: int, requests: int, seed: int = 0, url: str = None) -> Dict:
+    """Spread requests over `concurrency` worker processes and aggregate a report"""
+    per_worker = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(_worker, mode, seed + i, count, url)
+            for i, count in enumerate(per_worker) if count
+        ]
+        results = [future.result() for future in futures]
+    wall_seconds = time.perf_counter() - start
+
+    latencies = sorted(latency for result in results for latency in result['latencies'])
+    errors = [error for result in results for error in result['errors']]
+    total = sum(result['requests'] for result in results)
+
+    return {
+        'mode': mode,
+        'concurrency': concurrency,
+        'requests': total,
+        'seed': seed,
+        'wall_seconds': round(wall_seconds, 3),
+        'throughput_rps': round(len(latencies) / wall_seconds, 2) if wall_seconds else None,
+        'error_rate': round((total - len(latencies)) / total, 4) if total else 0.0,
+        'latency_ms': {
+            name: round(percentile(latencies, q) * 1000, 3) if latencies else None
+            for name, q in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))
+        },
+        'sample_errors': sorted(set(errors))[:10],
+        'processes': [result['usage'] for result in results]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic load test for the stress predictor')
+    parser.add_argument('--mode', choices=['engine', 'app', 'http'], default='engine')
+    parser.add_argument('--concurrency', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', help='Scoring endpoint for --mode http (JSON POST)')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    if args.mode == 'http' and not args.url:
+        parser.error('--url is required for --mode http')
+
+    report = run_load_test(args.mode, args.concurrency, args.requests, args.seed, args.url)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
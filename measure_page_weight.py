@@ -0,0 +1,151 @@
+import argparse
+import base64
+import json
+import os
+import time
+import urllib.request
+from typing import Dict
+
+# 🔑 Compare page payload of inlined base64 media against static, cacheable media
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(SCRIPT_DIR, 'static')
+APP_PATH = os.path.join(SCRIPT_DIR, 'streamlit_app.py')
+MEDIA_FILES = ['background.mp4', 'hi7.png', 'hi7.webp', 'hi7.avif']
+
+
+def _background_markdown(elements) -> str:
+    for element in elements:
+        if 'bg-video' in element.value:
+            return element.value
+    return None
+
+
+def measure_offline(video_path: str) -> Dict:
+    """Bytes the app sends per render for its background, before and after static serving"""
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from streamlit.testing.v1 import AppTest
+
+    report = {'assets': {}}
+    for file_name in MEDIA_FILES:
+        path = os.path.join(STATIC_DIR, file_name)
+        if os.path.exists(path):
+            report['assets'][file_name] = os.path.getsize(path)
+
+    def delta_bytes(markup: str) -> int:
+        # Size of the websocket message carrying this st.markdown element
+        message = ForwardMsg()
+        message.delta.new_element.markdown.body = markup
+        message.delta.new_element.markdown.allow_html = True
+        return message.ByteSize()
+
+    # Before: the video was read and base64-encoded into st.markdown on every render
+    if os.path.exists(video_path):
+        start = time.perf_counter()
+        with open(video_path, 'rb') as f:
+            inline_markup = f'<video id="bg-video"><source src="data:video/mp4;base64,' \
+                            f'{base64.b64encode(f.read()).decode()}" type="video/mp4"></video>'
+        build_ms = (time.perf_counter() - start) * 1000
+        report['before'] = {
+            'background_message_bytes': delta_bytes(inline_markup),
+            'markup_build_ms': round(build_ms, 2)
+        }
+    else:
+        report['before'] = {'note': f'{video_path} not found; the inline payload was 4/3 of the video size'}
+
+    # After: run the real app script and measure the background element it actually emits
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    start = time.perf_counter()
+    app.run()
+    run_ms = (time.perf_counter() - start) * 1000
+    markup = _background_markdown(app.markdown)
+    has_video = markup is not None and '<video' in markup
+    poster_bytes = report['assets'].get('hi7.webp', report['assets'].get('hi7.png', 0))
+    report['after'] = {
+        'background': 'video' if has_video else 'poster' if markup else 'none',
+        'background_message_bytes': delta_bytes(markup) if markup else 0,
+        'script_run_ms': round(run_ms, 2),
+        # Fetched once, then served from the browser cache
+        'first_visit_asset_bytes': (report['assets'].get('background.mp4', 0) if has_video else 0) + poster_bytes
+    }
+    return report
+
+
+def _fetch(url: str) -> Dict:
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=30) as response:
+        first_byte = response.read(1)
+        ttfb = time.perf_counter() - start
+        body = first_byte + response.read()
+        return {
+            'status': response.status,
+            'bytes': len(body),
+            'ttfb_ms': round(ttfb * 1000, 2),
+            'total_ms': round((time.perf_counter() - start) * 1000, 2),
+            'cache_control': response.headers.get('Cache-Control'),
+            'etag': response.headers.get('ETag')
+        }
+
+
+def measure_render(base_url: str, timeout: float = 60.0) -> Dict:
+    """Run the app once over its websocket and count every ForwardMsg byte sent for the render"""
+    try:
+        from websockets.sync.client import connect
+    except ImportError:
+        raise ImportError("Online measurement needs websockets: pip install websockets")
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    stream_url = base_url.replace('http://', 'ws://').replace('https://', 'wss://') + '/_stcore/stream'
+    report = {'messages': 0, 'bytes': 0, 'bytes_by_type': {}}
+    with connect(stream_url, max_size=None) as conn:
+        rerun = BackMsg()
+        rerun.rerun_script.query_string = ''
+        rerun.rerun_script.page_script_hash = ''
+        start = time.perf_counter()
+        conn.send(rerun.SerializeToString())
+        while True:
+            data = conn.recv(timeout=timeout)
+            message = ForwardMsg()
+            message.ParseFromString(data)
+            kind = message.WhichOneof('type')
+            report['messages'] += 1
+            report['bytes'] += len(data)
+            report['bytes_by_type'][kind] = report['bytes_by_type'].get(kind, 0) + len(data)
+            if kind == 'script_finished':
+                break
+        report['render_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return report
+
+
+def measure_online(base_url: str) -> Dict:
+    """Measure a running app's render payload and its static media, with timings and cache headers"""
+    base_url = base_url.rstrip('/')
+    report = {'render': measure_render(base_url), 'assets': {}}
+    for file_name in MEDIA_FILES:
+        try:
+            report['assets'][file_name] = _fetch(f'{base_url}/app/static/{file_name}')
+        except Exception as e:
+            report['assets'][file_name] = {'error': str(e)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure page payload before and after static media serving')
+    parser.add_argument('--video', default=os.path.join(STATIC_DIR, 'background.mp4'))
+    parser.add_argument('--url', help='Base URL of a running app, e.g. http://localhost:8501')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = {'offline': measure_offline(args.video)}
+    if args.url:
+        report['online'] = measure_online(args.url)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+import argparse
+from array import array
+import gc
+import json
+import os
+import pickle
+import random
+import sys
+import tracemalloc
+import types
+from typing import Dict, Tuple
+
+import joblib
+
+from recommendation_engine import ENGINE_SCRIPT_DIR, PersonalizedRecommendationEngine, score_assessment
+from load_test import generate_assessment, load_locations
+
+# 🔑 Attribute a worker's resident memory to the model package, data tables and requests
+MODEL_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'stress_prediction_models.pkl')
+
+
+def read_rss_kb() -> int:
+    """Current resident set size from /proc (None where unavailable)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# Reachable but not part of a component's footprint
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def deep_size(obj) -> int:
+    """Bytes of every object reachable from obj, each counted once
+
+    Walks the live object graph instead of measuring a copy, so strings and other
+    immutables (which a deep copy would share, not duplicate) are counted too.
+    Extension objects that do not report their buffers to sys.getsizeof are undercounted.
+    """
+    seen = set()
+    pending = [obj]
+    size = 0
+    while pending:
+        current = pending.pop()
+        if id(current) in seen or isinstance(current, _SHARED_TYPES):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        pending.extend(gc.get_referents(current))
+    return size
+
+
+def _measure_load(loader):
+    gc.collect()
+    rss_before = read_rss_kb()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    obj = loader()
+    gc.collect()
+    rss_after = read_rss_kb()
+    return obj, {
+        'traced_kb': round((tracemalloc.get_traced_memory()[0] - traced_before) / 1024, 1),
+        'rss_delta_kb': rss_after - rss_before if rss_before is not None else None
+    }
+
+
+def profile_components(model_path: str = MODEL_PATH) -> Tuple[Dict, PersonalizedRecommendationEngine]:
+    """Per-component footprint of everything a worker keeps resident, and the engine it loaded"""
+    report = {'rss_start_kb': read_rss_kb()}
+
+    model_package, report['model_package'] = _measure_load(lambda: joblib.load(model_path))
+    # Tree internals live in Cython buffers that sys.getsizeof does not see, so report the pickled size too
+    report['model_package']['models'] = {
+        name: {
+            'size_kb': round(deep_size(model) / 1024, 1),
+            'serialized_kb': round(len(pickle.dumps(model)) / 1024, 1)
+        }
+        for name, model in model_package['models'].items()
+    }
+    report['model_package']['scaler_kb'] = round(deep_size(model_package['scaler']) / 1024, 1)
+    report['model_package']['results_kb'] = round(deep_size(model_package.get('results', {})) / 1024, 1)
+
+    engine, report['engine'] = _measure_load(PersonalizedRecommendationEngine)
+    analyzer = engine.emotional_analyzer
+    report['engine']['tables_kb'] = {
+        'course_patterns': round(deep_size(engine.course_analyzer.course_patterns) / 1024, 1),
+        'facilities': round(deep_size(engine.location_recommendations.facilities) / 1024, 1)
+        if hasattr(engine.location_recommendations, 'facilities') else None,
+        'state_capitals': round(deep_size(engine.location_recommendations.state_capitals) / 1024, 1),
+        'emotion_stress_weights': round(deep_size(analyzer.emotion_stress_weights) / 1024, 1),
+        'trigger_event_weights': round(deep_size(analyzer.trigger_event_weights) / 1024, 1),
+        'trauma_keywords': round(deep_size(analyzer.trauma_keywords) / 1024, 1),
+    }
+
+    report['rss_resident_kb'] = read_rss_kb()
+    return report, engine
+
+
+def profile_requests(engine, requests: int = 500, seed: int = 0, top: int = 10) -> Dict:
+    """Peak transient allocation per request and retained growth across repeated calls"""
+    rng = random.Random(seed)
+    locations = load_locations()
+    assessments = [generate_assessment(rng, locations) for _ in range(requests)]
+
+    # One warm-up pass fills lazily built state and the engine's bounded caches for these keys,
+    # so only unbounded growth is left when the same calls are repeated
+    for assessment in assessments:
+        score_assessment(engine, assessment)
+    peaks = array('q', [0]) * requests
+    gc.collect()
+    baseline = tracemalloc.take_snapshot()
+    retained_start = tracemalloc.get_traced_memory()[0]
+    rss_start = read_rss_kb()
+
+    for i, assessment in enumerate(assessments):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = score_assessment(engine, assessment)
+        peaks[i] = tracemalloc.get_traced_memory()[1] - current
+        del result
+
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - retained_start
+    growth = [
+        {
+            'location': str(stat.traceback[0]),
+            'size_diff_kb': round(stat.size_diff / 1024, 1),
+            'count_diff': stat.count_diff
+        }
+        for stat in tracemalloc.take_snapshot().compare_to(baseline, 'lineno')[:top]
+        if stat.size_diff > 0
+    ]
+
+    peaks = sorted(peaks)
+    return {
+        'requests': requests,
+        'peak_per_request_kb': {
+            'p50': round(peaks[len(peaks) // 2] / 1024, 1),
+            'max': round(peaks[-1] / 1024, 1)
+        },
+        'retained_growth_kb': round(retained / 1024, 1),
+        'retained_growth_per_call_bytes': round(retained / requests, 1),
+        'rss_growth_kb': read_rss_kb() - rss_start if rss_start is not None else None,
+        'top_growth_sites': growth
+    }
+
+
+def run_profile(model_path: str = MODEL_PATH, requests: int = 500, growth_threshold: float = 64.0) -> Dict:
+    tracemalloc.start(5)
+    try:
+        report, engine = profile_components(model_path)
+        report['requests'] = profile_requests(engine, requests)
+    finally:
+        tracemalloc.stop()
+
+    # Anything retained per call beyond the threshold points at an unbounded structure
+    report['growth_detected'] = report['requests']['retained_growth_per_call_bytes'] > growth_threshold
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-component memory profile of one worker')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--growth-threshold', type=float, default=64.0,
+                        help='Retained bytes per call above which growth is reported')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = run_profile(args.model, args.requests, args.growth_threshold)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+    if report['growth_detected']:
+        raise SystemExit('Memory growth detected across repeated calls')
+
+
+if __name__ == '__main__':
+    main()
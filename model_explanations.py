@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import time
+from typing import Dict, List
+
+import joblib
+import numpy as np
+
+from recommendation_engine import ENGINE_SCRIPT_DIR
+
+# 🔑 Per-prediction feature attributions using exact fast paths only (no KernelSHAP)
+MODEL_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'stress_prediction_models.pkl')
+
+# Models trained on StandardScaler output in the notebook
+SCALED_MODELS = ['Logistic Regression', 'SVM']
+
+
+class ModelExplainer:
+    """Exact per-feature attributions for one packaged model
+
+    Linear models use closed-form contributions coef * (x - E[x]) in log-odds space.
+    Tree models use a TreeSHAP explainer built once from the stored tree covers.
+    """
+
+    def __init__(self, model_package: Dict, model_name: str = None, background=None):
+        self.model_name = model_name or model_package['best_model']
+        self.model = model_package['models'][self.model_name]
+        self.scaler = model_package['scaler']
+        self.feature_columns = list(model_package['feature_columns'])
+        self.class_names = model_package['class_names']
+        self.uses_scaled_input = self.model_name in SCALED_MODELS
+        self._tree_explainer = None
+
+        if hasattr(self.model, 'coef_') and hasattr(self.model, 'intercept_') and not hasattr(self.model, 'support_'):
+            self.method = 'linear'
+            self.output_space = 'log_odds'
+            # Scaled training data has zero mean, so that is the default background
+            if background is None:
+                self._background_mean = np.zeros(len(self.feature_columns))
+            else:
+                self._background_mean = self._prepare(background).mean(axis=0)
+            self._coef = np.asarray(self.model.coef_, dtype=float)
+            self.expected_value = self.model.intercept_ + self._coef @ self._background_mean
+        elif hasattr(self.model, 'tree_') or hasattr(self.model, 'estimators_'):
+            try:
+                import shap
+            except ImportError:
+                raise ImportError("Tree model explanations need shap: pip install shap")
+            self.method = 'tree_shap'
+            # Path-dependent TreeSHAP needs no background sample; the expectations
+            # come from the node covers and are computed once here
+            try:
+                self._tree_explainer = shap.TreeExplainer(self.model, feature_perturbation='tree_path_dependent')
+            except Exception as e:
+                # e.g. multi-class gradient boosting has no TreeSHAP support in shap
+                raise ValueError(f"No exact fast explanation path for model '{self.model_name}': {e}")
+            # Gradient boosting is explained in its raw margin, forests in probability
+            self.output_space = 'log_odds' if hasattr(self.model, 'loss') else 'probability'
+            self.expected_value = np.atleast_1d(np.asarray(self._tree_explainer.expected_value, dtype=float))
+        else:
+            raise ValueError(f"No exact fast explanation path for model '{self.model_name}'")
+
+    def _prepare(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=float).reshape(-1, len(self.feature_columns))
+        return self.scaler.transform(X) if self.uses_scaled_input else X
+
+    def explain_batch(self, X) -> np.ndarray:
+        """Attributions with shape (rows, classes, features)"""
+        X = self._prepare(X)
+        if self.method == 'linear':
+            return (X - self._background_mean)[:, None, :] * self._coef[None, :, :]
+
+        values = self._tree_explainer.shap_values(X, check_additivity=False)
+        # Older shap returns one (rows, features) array per class
+        if isinstance(values, list):
+            values = np.stack(values, axis=1)
+        elif values.ndim == 3:
+            values = np.transpose(values, (0, 2, 1))
+        else:
+            values = values[:, None, :]
+        return values
+
+    def explain(self, features: List[float], class_index: int = None) -> Dict:
+        """Attributions for one row, for the predicted class unless one is given"""
+        row = np.asarray(features, dtype=float).reshape(1, -1)
+        values = self.explain_batch(row)[0]
+        if class_index is None:
+            # Attributions are additive, so expected value plus their sum is the model output
+            class_index = int(np.argmax(self.expected_value + values.sum(axis=1)))
+        # Single-output explainers (e.g. binary linear models) have one row of values
+        class_row = min(class_index, values.shape[0] - 1)
+
+        attributions = dict(zip(self.feature_columns, values[class_row].tolist()))
+        return {
+            'model': self.model_name,
+            'method': self.method,
+            'output_space': self.output_space,
+            'predicted_class': self.class_names[class_index],
+            'expected_value': float(self.expected_value[min(class_row, len(self.expected_value) - 1)]),
+            'attributions': dict(sorted(attributions.items(), key=lambda item: -abs(item[1])))
+        }
+
+    def cohort_summary(self, X) -> Dict:
+        """Mean absolute attribution per class and feature for a cohort report"""
+        mean_abs = np.abs(self.explain_batch(X)).mean(axis=0)
+        class_labels = self.class_names if mean_abs.shape[0] == len(self.class_names) else ['output']
+        return {
+            class_label: dict(zip(self.feature_columns, mean_abs[i].round(6).tolist()))
+            for i, class_label in enumerate(class_labels)
+        }
+
+
+_explainers = {}
+
+
+def get_explainer(model_name: str = None, model_path: str = MODEL_PATH) -> ModelExplainer:
+    """Build explainers once per process and reuse them for every request"""
+    key = (model_path, model_name)
+    if key not in _explainers:
+        _explainers[key] = ModelExplainer(joblib.load(model_path), model_name)
+    return _explainers[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Explain predictions of the packaged stress models')
+    parser.add_argument('--model-name', help='Model to explain (defaults to the package best_model)')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--features', help='Comma-separated feature values in feature_columns order')
+    parser.add_argument('--csv', help='CSV of feature rows (no header) for a batch cohort summary')
+    parser.add_argument('--repeats', type=int, default=200, help='Timing repeats for single-row explanations')
+    args = parser.parse_args()
+
+    explainer = get_explainer(args.model_name, args.model)
+    if args.csv:
+        X = np.loadtxt(args.csv, delimiter=',', ndmin=2)
+        start = time.perf_counter()
+        summary = explainer.cohort_summary(X)
+        print(json.dumps({
+            'rows': len(X),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+            'mean_abs_attributions': summary
+        }, indent=2))
+        return
+
+    if args.features:
+        features = [float(value) for value in args.features.split(',')]
+    else:
+        features = explainer.scaler.mean_.tolist()
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        explanation = explainer.explain(features)
+    explanation['mean_latency_ms'] = round((time.perf_counter() - start) * 1000 / args.repeats, 3)
+    print(json.dumps(explanation, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import pickle
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict
+
+import joblib
+import numpy as np
+
+from recommendation_engine import ENGINE_SCRIPT_DIR
+from model_explanations import SCALED_MODELS
+
+# 🔑 Add inference cost to the evaluation results and pick a serving model under a latency budget
+MODEL_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'stress_prediction_models.pkl')
+RESULTS_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'model_evaluation_results.pkl')
+
+
+def _measure_model(name: str, model_bytes: bytes, scaler_bytes: bytes, scaled: bool,
+                   repeats: int, batch_size: int, seed: int) -> Dict:
+    """Load time, memory and predict_proba latency of one model, run in its own process"""
+    scaler = pickle.loads(scaler_bytes)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    model = pickle.loads(model_bytes)
+    load_ms = (time.perf_counter() - start) * 1000
+    memory_kb = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+
+    # Synthetic rows drawn around the training distribution recorded by the scaler
+    rng = np.random.default_rng(seed)
+    X = scaler.mean_ + scaler.scale_ * rng.standard_normal((batch_size, len(scaler.mean_)))
+    if scaled:
+        X = scaler.transform(X)
+
+    model.predict_proba(X[:1])
+    single = []
+    for i in range(repeats):
+        row = X[i % batch_size:i % batch_size + 1]
+        start = time.perf_counter()
+        model.predict_proba(row)
+        single.append((time.perf_counter() - start) * 1000)
+    single.sort()
+
+    start = time.perf_counter()
+    model.predict_proba(X)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        'name': name,
+        'Load Time (ms)': round(load_ms, 3),
+        'Memory (KB)': round(memory_kb, 1),
+        'Serialized Size (KB)': round(len(model_bytes) / 1024, 1),
+        'Single Row Latency p50 (ms)': round(single[len(single) // 2], 4),
+        'Single Row Latency p95 (ms)': round(single[min(len(single) - 1, int(len(single) * 0.95))], 4),
+        'Batch Latency (us/row)': round(batch_ms * 1000 / batch_size, 3),
+    }
+
+
+def measure_models(model_path: str = MODEL_PATH, repeats: int = 500, batch_size: int = 1000,
+                   workers: int = None, seed: int = 0) -> Dict:
+    """Measure every packaged model in parallel, one process per model"""
+    model_package = joblib.load(model_path)
+    scaler_bytes = pickle.dumps(model_package['scaler'])
+    models = model_package['models']
+
+    with ProcessPoolExecutor(max_workers=workers or min(len(models), os.cpu_count() or 1)) as pool:
+        futures = [
+            pool.submit(
+                _measure_model, name, pickle.dumps(model), scaler_bytes, name in SCALED_MODELS,
+                repeats, batch_size, seed
+            )
+            for name, model in models.items()
+        ]
+        return {result.pop('name'): result for result in (future.result() for future in futures)}
+
+
+def select_serving_model(comparison_metrics: Dict, latency_budget_ms: float,
+                         quality_metric: str = 'F1-Score', quality_floor: float = 0.0) -> Dict:
+    """Best quality model whose p95 single-row latency fits the budget"""
+    eligible = [
+        (metrics[quality_metric], -metrics['Single Row Latency p95 (ms)'], name)
+        for name, metrics in comparison_metrics.items()
+        if metrics.get(quality_metric, 0.0) >= quality_floor
+        and metrics.get('Single Row Latency p95 (ms)', float('inf')) <= latency_budget_ms
+    ]
+    selection = {
+        'latency_budget_ms': latency_budget_ms,
+        'quality_metric': quality_metric,
+        'quality_floor': quality_floor,
+        'model': max(eligible)[2] if eligible else None
+    }
+    if not eligible:
+        selection['reason'] = 'No model meets both the latency budget and the quality floor'
+    return selection
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Accuracy versus latency model selection')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--results', default=RESULTS_PATH)
+    parser.add_argument('--latency-budget-ms', type=float, default=5.0)
+    parser.add_argument('--quality-metric', default='F1-Score')
+    parser.add_argument('--quality-floor', type=float, default=0.0)
+    parser.add_argument('--repeats', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--dry-run', action='store_true', help='Print the results without saving them')
+    args = parser.parse_args()
+
+    evaluation_results = joblib.load(args.results)
+    cost_metrics = measure_models(args.model, args.repeats, args.batch_size, args.workers)
+    for name, metrics in cost_metrics.items():
+        evaluation_results['comparison_metrics'].setdefault(name, {}).update(metrics)
+
+    evaluation_results['serving_model'] = select_serving_model(
+        evaluation_results['comparison_metrics'], args.latency_budget_ms,
+        args.quality_metric, args.quality_floor
+    )
+
+    print(json.dumps({
+        'comparison_metrics': evaluation_results['comparison_metrics'],
+        'serving_model': evaluation_results['serving_model']
+    }, indent=2))
+    if not args.dry_run:
+        joblib.dump(evaluation_results, args.results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,518 @@
+import argparse
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import f1_score
+
+from recommendation_engine import ENGINE_SCRIPT_DIR
+from model_explanations import SCALED_MODELS
+
+# 🔑 Incremental SGD model updated from counsellor-confirmed assessments and hot-swapped into serving
+MODEL_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'stress_prediction_models.pkl')
+DEFAULT_LOG_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'assessment_log.db')
+DEFAULT_STORE_DIR = os.path.join(ENGINE_SCRIPT_DIR, 'online_models')
+
+# Every n-th logged assessment is kept out of training and used to validate new versions
+HOLDOUT_EVERY = 5
+MIN_CONFIRMED_HOLDOUT = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    features TEXT NOT NULL,
+    predicted TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS confirmations (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    assessment_id INTEGER NOT NULL REFERENCES assessments (id),
+    label TEXT NOT NULL,
+    confirmed_at REAL NOT NULL
+);
+"""
+
+
+class AssessmentLog:
+    """Append-only log of assessments and the labels counsellors confirm for them"""
+
+    def __init__(self, db_path: str = DEFAULT_LOG_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def append(self, features: Sequence[float], predicted: str = None) -> int:
+        """Log one assessment's feature row (in feature_columns order) and return its id"""
+        with self._connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO assessments (features, predicted, created_at) VALUES (?, ?, ?)',
+                (json.dumps([float(value) for value in features]), predicted, time.time())
+            )
+        return cursor.lastrowid
+
+    def confirm(self, assessment_id: int, label: str, class_names: Sequence[str] = None) -> int:
+        """Record a counsellor-confirmed stress level; later confirmations supersede earlier ones
+
+        With `class_names`, a label the model cannot learn is rejected instead of stored.
+        """
+        if class_names is not None and label not in class_names:
+            raise ValueError(f"Unknown stress level {label!r}; expected one of {', '.join(class_names)}")
+        with self._connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO confirmations (assessment_id, label, confirmed_at) VALUES (?, ?, ?)',
+                (assessment_id, label, time.time())
+            )
+        return cursor.lastrowid
+
+    def confirmed_since(self, after_seq: int, limit: int) -> List[tuple]:
+        """(seq, assessment_id, features, label) for confirmations after a cursor, oldest first
+
+        Confirmations superseded by a later one for the same assessment are left out.
+        """
+        rows = self._connection().execute(
+            'SELECT c.seq, a.id, a.features, c.label FROM confirmations c '
+            'JOIN assessments a ON a.id = c.assessment_id '
+            'WHERE c.seq > ? AND c.seq = ('
+            '    SELECT MAX(seq) FROM confirmations WHERE assessment_id = a.id'
+            ') ORDER BY c.seq LIMIT ?',
+            (after_seq, limit)
+        ).fetchall()
+        return [(seq, assessment_id, json.loads(features), label) for seq, assessment_id, features, label in rows]
+
+    def holdout(self) -> List[tuple]:
+        """Latest confirmed (features, label) of every holdout assessment"""
+        rows = self._connection().execute(
+            'SELECT a.features, c.label FROM confirmations c '
+            'JOIN assessments a ON a.id = c.assessment_id '
+            'WHERE a.id % ? = 0 AND c.seq = ('
+            '    SELECT MAX(seq) FROM confirmations WHERE assessment_id = a.id'
+            ') ORDER BY a.id',
+            (HOLDOUT_EVERY,)
+        ).fetchall()
+        return [(json.loads(features), label) for features, label in rows]
+
+
+def is_holdout(assessment_id: int) -> bool:
+    return assessment_id % HOLDOUT_EVERY == 0
+
+
+class ModelVersion:
+    """One immutable published model: never modified after it starts serving"""
+
+    def __init__(self, version: int, model: SGDClassifier, scaler, class_names: List[str],
+                 holdout_score: float, trained_through: int = 0, parent: int = None,
+                 distilled_holdout: tuple = None):
+        self.version = version
+        self.parent = parent
+        self.model = model
+        self.scaler = scaler
+        self.class_names = list(class_names)
+        self.holdout_score = holdout_score
+        self.trained_through = trained_through
+        # (X, y) labelled by the packaged model; validates versions until enough holdout rows are confirmed
+        self.distilled_holdout = distilled_holdout
+        self.published_at = time.time()
+
+    def transform(self, X) -> np.ndarray:
+        """StandardScaler transform without its per-call feature-name validation"""
+        X = np.asarray(X, dtype=float).reshape(-1, len(self.scaler.mean_))
+        return (X - self.scaler.mean_) / self.scaler.scale_
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.model.predict_proba(self.transform(X))
+
+    def summary(self) -> Dict:
+        return {
+            'version': self.version,
+            'parent': self.parent,
+            'holdout_score': round(self.holdout_score, 4),
+            'trained_through': self.trained_through,
+            'published_at': self.published_at
+        }
+
+
+class ModelServer:
+    """Serves the current model version and swaps versions atomically
+
+    Readers take a single reference to the current version, so predict_proba
+    never waits on a swap: in-flight calls finish on the version they started with.
+    The serving chain (current version, the versions a rollback returns to, and the
+    trainer's cursor) is persisted explicitly, so a new process resumes exactly where
+    the last one stopped.
+    """
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR, history: int = 5):
+        self.store_dir = store_dir
+        self.history = history
+        self._current = None
+        self._previous = []
+        self.trainer_cursor = 0
+        self._swap_lock = threading.Lock()
+        os.makedirs(store_dir, exist_ok=True)
+
+    @property
+    def current(self) -> Optional[ModelVersion]:
+        return self._current
+
+    def predict_proba(self, X) -> np.ndarray:
+        version = self._current
+        if version is None:
+            raise RuntimeError('No model version has been published')
+        return version.predict_proba(X)
+
+    def publish(self, version: ModelVersion):
+        """Make a validated version live, keeping the old one for rollback"""
+        with self._swap_lock:
+            joblib.dump(version, self._path(version.version))
+            if self._current is not None:
+                self._previous.append(self._current)
+                del self._previous[:-self.history]
+            self._current = version
+            self.trainer_cursor = max(self.trainer_cursor, version.trained_through)
+            self._write_state()
+
+    def rollback(self) -> ModelVersion:
+        """Return serving to the previous version; the rolled-back one is dropped from the chain"""
+        with self._swap_lock:
+            if not self._previous:
+                raise RuntimeError('No previous model version to roll back to')
+            self._current = self._previous.pop()
+            self._write_state()
+            return self._current
+
+    def advance_cursor(self, through: int):
+        """Persist how far the trainer has consumed confirmations, published or not"""
+        with self._swap_lock:
+            if through > self.trainer_cursor:
+                self.trainer_cursor = through
+                self._write_state()
+
+    def next_version(self) -> int:
+        """Versions are never reused, even after a rollback"""
+        saved = [
+            int(name[len('version_'):-len('.joblib')])
+            for name in os.listdir(self.store_dir)
+            if name.startswith('version_') and name.endswith('.joblib')
+        ]
+        return max(saved, default=0) + 1
+
+    def _path(self, version: int) -> str:
+        return os.path.join(self.store_dir, f'version_{version:04d}.joblib')
+
+    def _write_state(self):
+        # Write then rename, so a reader never sees a half-written chain
+        state = os.path.join(self.store_dir, 'SERVING.json')
+        with open(state + '.tmp', 'w') as f:
+            json.dump({
+                'current': self._current.version if self._current is not None else None,
+                'previous': [version.version for version in self._previous],
+                'trainer_cursor': self.trainer_cursor
+            }, f)
+        os.replace(state + '.tmp', state)
+
+    def load(self) -> Optional[ModelVersion]:
+        """Serve the version named in SERVING.json, with its recorded rollback chain as history"""
+        state = os.path.join(self.store_dir, 'SERVING.json')
+        if not os.path.exists(state):
+            return None
+        with open(state, 'r') as f:
+            chain = json.load(f)
+        if chain['current'] is None:
+            return None
+        with self._swap_lock:
+            self._previous = [joblib.load(self._path(number)) for number in chain['previous']]
+            self._current = joblib.load(self._path(chain['current']))
+            self.trainer_cursor = max(chain['trainer_cursor'], self._current.trained_through)
+        return self._current
+
+
+def _teacher_labels(model_package: Dict, X: np.ndarray) -> np.ndarray:
+    """Class indices predicted by the packaged best model for raw feature rows"""
+    X = pd.DataFrame(X, columns=model_package['feature_columns'])
+    if model_package['best_model'] in SCALED_MODELS:
+        X = model_package['scaler'].transform(X)
+    return model_package['models'][model_package['best_model']].predict(X)
+
+
+def bootstrap_version(model_package: Dict, rows: int = 5000, seed: int = 0) -> ModelVersion:
+    """Version 1: an SGD model distilled from the packaged best model
+
+    Rows are drawn around the training distribution recorded by the scaler and
+    labelled by the packaged model, with a separate draw kept as the holdout.
+    """
+    scaler = model_package['scaler']
+    class_names = model_package['class_names']
+    rng = np.random.default_rng(seed)
+
+    def draw(count):
+        X = scaler.mean_ + scaler.scale_ * rng.standard_normal((count, len(scaler.mean_)))
+        return X, _teacher_labels(model_package, X)
+
+    X_train, y_train = draw(rows)
+    X_holdout, y_holdout = draw(max(200, rows // 5))
+
+    version = ModelVersion(1, SGDClassifier(loss='log_loss', alpha=1e-4, random_state=seed), scaler, class_names, 0.0,
+                           distilled_holdout=(X_holdout, y_holdout))
+    X_scaled = version.transform(X_train)
+    version.model.partial_fit(X_scaled, y_train, classes=np.arange(len(class_names)))
+    for _ in range(4):
+        version.model.partial_fit(X_scaled, y_train)
+    version.holdout_score = score_version(version, X_holdout, y_holdout)
+    return version
+
+
+def score_version(version: ModelVersion, X, y) -> float:
+    """Macro F1 on a holdout set, matching the F1-Score in model_evaluation_results.pkl"""
+    if len(y) == 0:
+        return 0.0
+    predicted = np.argmax(version.predict_proba(X), axis=1)
+    return f1_score(y, predicted, labels=np.arange(len(version.class_names)), average='macro', zero_division=0)
+
+
+class IncrementalTrainer:
+    """Background mini-batch partial_fit over newly confirmed assessments
+
+    Each round copies the serving model, fits it on the next mini-batch of
+    training confirmations and publishes it only if its holdout score does not
+    drop by more than `tolerance`.
+    """
+
+    def __init__(self, server: ModelServer, log: AssessmentLog, batch_size: int = 32,
+                 tolerance: float = 0.01, interval: float = 30.0):
+        self.server = server
+        self.log = log
+        self.batch_size = batch_size
+        self.tolerance = tolerance
+        self.interval = interval
+        self.cursor = server.trainer_cursor
+        self.history = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _holdout(self, version: ModelVersion):
+        # Labels the model does not know (stored before confirm validated them) are skipped
+        rows = [(features, label) for features, label in self.log.holdout() if label in version.class_names]
+        if len(rows) >= MIN_CONFIRMED_HOLDOUT:
+            X = np.array([features for features, _ in rows], dtype=float)
+            y = np.array([version.class_names.index(label) for _, label in rows])
+            return X, y
+        # Until counsellors have confirmed enough holdout rows, validate on the distilled sample
+        if version.distilled_holdout is not None:
+            return version.distilled_holdout
+        return np.empty((0, len(version.scaler.mean_))), np.empty(0)
+
+    def _next_batch(self, serving: ModelVersion) -> tuple:
+        """Up to batch_size training rows after the cursor, and the seq of the last row before the first of them
+
+        Holdout rows and labels the model does not know are skipped, reading on until
+        the batch is full or the log ends.
+        """
+        training = []
+        scanned = skipped_through = self.cursor
+        while len(training) < self.batch_size:
+            rows = self.log.confirmed_since(scanned, self.batch_size * HOLDOUT_EVERY)
+            if not rows:
+                break
+            for row in rows:
+                if not is_holdout(row[1]) and row[3] in serving.class_names:
+                    training.append(row)
+                    if len(training) == self.batch_size:
+                        break
+                elif not training:
+                    skipped_through = row[0]
+            scanned = rows[-1][0]
+        return training, skipped_through
+
+    def run_once(self) -> Optional[Dict]:
+        """Train and validate one mini-batch; returns what happened, or None when there was nothing new"""
+        serving = self.server.current
+        training, skipped_through = self._next_batch(serving)
+        if len(training) < self.batch_size:
+            # Rows that can never be trained on are consumed, so they are not re-read every round
+            if skipped_through > self.cursor:
+                self.cursor = skipped_through
+                self.server.advance_cursor(skipped_through)
+            return None
+        through = training[-1][0]
+
+        candidate_model = copy.deepcopy(serving.model)
+        X = serving.transform([row[2] for row in training])
+        y = np.array([serving.class_names.index(row[3]) for row in training])
+        candidate_model.partial_fit(X, y)
+
+        candidate = ModelVersion(
+            self.server.next_version(), candidate_model, serving.scaler, serving.class_names, 0.0, through,
+            parent=serving.version, distilled_holdout=serving.distilled_holdout
+        )
+        X_holdout, y_holdout = self._holdout(candidate)
+        candidate.holdout_score = score_version(candidate, X_holdout, y_holdout)
+        baseline = score_version(serving, X_holdout, y_holdout)
+
+        # Rejected batches are still consumed, so a bad batch is not retried forever
+        self.cursor = through
+        outcome = {
+            'candidate': candidate.version,
+            'rows': len(training),
+            'holdout_rows': int(len(y_holdout)),
+            'serving_score': round(baseline, 4),
+            'candidate_score': round(candidate.holdout_score, 4),
+            'published': candidate.holdout_score >= baseline - self.tolerance
+        }
+        if outcome['published']:
+            self.server.publish(candidate)
+        else:
+            self.server.advance_cursor(through)
+        self.history.append(outcome)
+        return outcome
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                # Drain every complete mini-batch before sleeping
+                while self.run_once() is not None and not self._stop.is_set():
+                    pass
+            except Exception as e:
+                self.history.append({'error': str(e)})
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='incremental-trainer', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def ensure_bootstrapped(server: ModelServer, model_path: str = MODEL_PATH) -> ModelVersion:
+    """Load the saved serving version, distilling version 1 on first use"""
+    version = server.load()
+    if version is None:
+        version = bootstrap_version(joblib.load(model_path))
+        server.publish(version)
+    return version
+
+
+def run_swap_benchmark(model_path: str, store_dir: str, log_path: str, confirmations: int,
+                       readers: int, batch_size: int, seed: int = 0) -> Dict:
+    """Serve predict_proba from reader threads while the trainer publishes new versions"""
+    server = ModelServer(store_dir)
+    log = AssessmentLog(log_path)
+    serving = ensure_bootstrapped(server, model_path)
+    model_package = joblib.load(model_path)
+
+    # Simulated counsellor confirmations: rows labelled by the packaged model
+    rng = np.random.default_rng(seed)
+    scaler = serving.scaler
+    X = scaler.mean_ + scaler.scale_ * rng.standard_normal((confirmations, len(scaler.mean_)))
+    for features, label in zip(X, _teacher_labels(model_package, X)):
+        log.confirm(log.append(features.tolist()), serving.class_names[label])
+
+    stop = threading.Event()
+    latencies = [[] for _ in range(readers)]
+
+    def read(index):
+        row = X[index % len(X):index % len(X) + 1]
+        while not stop.is_set():
+            start = time.perf_counter()
+            server.predict_proba(row)
+            latencies[index].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=read, args=(index,)) for index in range(readers)]
+    for thread in threads:
+        thread.start()
+
+    trainer = IncrementalTrainer(server, log, batch_size=batch_size)
+    started = time.perf_counter()
+    while trainer.run_once() is not None:
+        pass
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    samples = sorted(latency for reader in latencies for latency in reader)
+    return {
+        'rounds': len(trainer.history),
+        'published': sum(1 for outcome in trainer.history if outcome.get('published')),
+        'serving_version': server.current.summary(),
+        'training_seconds': round(elapsed, 3),
+        'predictions_during_training': len(samples),
+        'predict_p50_ms': round(samples[len(samples) // 2], 4) if samples else None,
+        'predict_p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 4) if samples else None,
+        'predict_max_ms': round(samples[-1], 4) if samples else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental SGD stress model with hot-swapped versions')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help='Directory of saved model versions')
+    parser.add_argument('--log', default=DEFAULT_LOG_PATH, help='SQLite assessment log')
+    parser.add_argument('--model', default=MODEL_PATH)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('status', help='Show the serving version')
+    confirm_parser = subparsers.add_parser('confirm', help='Confirm the stress level of a logged assessment')
+    confirm_parser.add_argument('assessment_id', type=int)
+    confirm_parser.add_argument('label')
+    train_parser = subparsers.add_parser('train', help='Run incremental training rounds')
+    train_parser.add_argument('--batch-size', type=int, default=32)
+    train_parser.add_argument('--tolerance', type=float, default=0.01)
+    subparsers.add_parser('rollback', help='Serve the previous version again')
+    bench_parser = subparsers.add_parser('benchmark', help='Measure predict_proba latency across hot swaps')
+    bench_parser.add_argument('--confirmations', type=int, default=2000)
+    bench_parser.add_argument('--readers', type=int, default=4)
+    bench_parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    if args.command == 'benchmark':
+        print(json.dumps(run_swap_benchmark(
+            args.model, args.store, args.log, args.confirmations, args.readers, args.batch_size
+        ), indent=2))
+        return
+
+    server = ModelServer(args.store)
+    ensure_bootstrapped(server, args.model)
+    log = AssessmentLog(args.log)
+
+    if args.command == 'confirm':
+        try:
+            seq = log.confirm(args.assessment_id, args.label, server.current.class_names)
+        except ValueError as e:
+            parser.error(str(e))
+        print(json.dumps({'seq': seq}))
+    elif args.command == 'train':
+        trainer = IncrementalTrainer(server, log, args.batch_size, args.tolerance)
+        while trainer.run_once() is not None:
+            pass
+        print(json.dumps({'rounds': trainer.history, 'serving': server.current.summary()}, indent=2))
+    elif args.command == 'rollback':
+        print(json.dumps(server.rollback().summary(), indent=2))
+    else:
+        print(json.dumps(server.current.summary(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import streamlit as st
+import pandas as pd
+import hmac
+import os
+import sys
+
+# 🔑 FIX: Pages run from the pages/ folder, so make the project modules importable
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, SCRIPT_DIR)
+
+from cohort_rollups import MIN_CELL_COUNT, STRESS_LEVELS, iso_week, store_from_environment
+
+# Same cached store as the student app
+load_cohort_store = st.cache_resource(store_from_environment)
+
+def require_counsellor_login():
+    """Stop the page unless this session has entered the COUNSELLOR_PASSWORD"""
+    expected = os.environ.get('COUNSELLOR_PASSWORD')
+    if not expected:
+        st.error('The counsellor dashboard is disabled. Set COUNSELLOR_PASSWORD on the server to enable it.')
+        st.stop()
+    if st.session_state.get('counsellor_authenticated'):
+        return
+    with st.form('counsellor_login'):
+        password = st.text_input('Counsellor password', type='password')
+        submitted = st.form_submit_button('Sign in')
+    if submitted:
+        if hmac.compare_digest(password.encode('utf-8'), expected.encode('utf-8')):
+            st.session_state.counsellor_authenticated = True
+            st.rerun()
+        st.error('Incorrect password')
+    st.stop()
+
+st.title('📊 Counsellor Dashboard')
+require_counsellor_login()
+st.markdown('### Stress levels by course, region and week')
+
+try:
+    cohort_store = load_cohort_store()
+except Exception as e:
+    st.error(f'Could not open cohort rollups: {e}')
+    st.stop()
+
+weeks = cohort_store.distinct_values('iso_week')
+if not weeks:
+    st.info('No assessments have been recorded yet.')
+    st.stop()
+
+# Filters
+filter_col1, filter_col2, filter_col3 = st.columns(3)
+with filter_col1:
+    selected_states = st.multiselect('State', cohort_store.distinct_values('state'))
+    selected_courses = st.multiselect('Course', cohort_store.distinct_values('course'))
+with filter_col2:
+    selected_emotions = st.multiselect('Emotion', cohort_store.distinct_values('emotion'))
+    # One week or all of them: arbitrary ranges could be subtracted from each other to isolate a week
+    selected_week = st.selectbox('Week', ['All weeks'] + weeks[::-1])
+with filter_col3:
+    group_by = st.multiselect(
+        'Group by', ['course', 'state', 'city', 'emotion'], default=['course']
+    )
+
+filters = {
+    'state': selected_states,
+    'course': selected_courses,
+    'emotion': selected_emotions
+}
+# Filtered dimensions are always grouped, so a filter only picks rows and never changes their totals
+group_by = list(group_by) + [dimension for dimension, values in filters.items() if values and dimension not in group_by]
+summary_group, summary_filters = list(group_by), dict(filters)
+if selected_week != 'All weeks':
+    summary_group.append('iso_week')
+    summary_filters['iso_week'] = [selected_week]
+
+# Summary table; groups too small to stay anonymous are withheld, and left out of the totals too
+summary_rows, hidden_groups = cohort_store.release(summary_group, summary_filters)
+summary = pd.DataFrame(summary_rows)
+if summary.empty:
+    st.info(f'No group matching the selected filters has at least {MIN_CELL_COUNT} assessments.')
+    st.stop()
+
+total_assessments = int(summary['total'].sum())
+awful_total = int(summary['Awful'].sum())
+metric_col1, metric_col2, metric_col3 = st.columns(3)
+with metric_col1:
+    st.metric('📝 Assessments', total_assessments)
+with metric_col2:
+    st.metric('🚨 Awful Rate', f'{awful_total / total_assessments * 100:.1f}%')
+with metric_col3:
+    mean_score = (summary['mean_score'] * summary['total']).sum() / total_assessments
+    st.metric('🎯 Mean Enhanced Score', f'{mean_score:.2f}')
+
+st.subheader('📋 Breakdown')
+display = summary.copy()
+display['awful_rate'] = (display['awful_rate'] * 100).round(1)
+display['mean_score'] = display['mean_score'].round(3)
+st.dataframe(
+    display[summary_group + list(STRESS_LEVELS) + ['total', 'awful_rate', 'mean_score']],
+    width='stretch'
+)
+if hidden_groups:
+    st.caption(
+        f'{hidden_groups} group(s) are hidden: they have fewer than {MIN_CELL_COUNT} assessments, '
+        f'or showing them would let a smaller group be worked out from the totals.'
+    )
+
+# Weekly trend of the Awful rate per group
+st.subheader('📈 Awful Rate by Week')
+trend = pd.DataFrame(cohort_store.release(['iso_week'] + group_by, filters)[0])
+if trend.empty:
+    st.info(f'No week has a group with at least {MIN_CELL_COUNT} assessments.')
+    st.stop()
+if group_by:
+    trend['group'] = trend[list(group_by)].astype(str).agg(' / '.join, axis=1)
+    chart = trend.pivot_table(index='iso_week', columns='group', values='awful_rate')
+else:
+    chart = trend.set_index('iso_week')[['awful_rate']]
+st.line_chart(chart * 100)
+
+st.markdown('---')
+st.caption(f'Rollups are updated as each assessment is recorded | Current week: {iso_week()}')
@@ -1,13 +1,292 @@
+import functools
 import json
 import re
 import os # 🔑 FIX: Import os for path handling
 from typing import Dict, List, Tuple
+import numpy as np
 import pandas as pd
 
 # 🔑 FIX: Define the base path for robust file loading within this module
 ENGINE_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Input vocabularies offered by the app
+COURSE_OPTIONS = [
+    'Engineering', 'Medical', 'Law', 'Commerce', 'Arts/Humanities',
+    'Science', 'MBA', 'Computer Science'
+]
+
+EMOTION_OPTIONS = [
+    'Very Happy', 'Happy', 'Content', 'Neutral', 'Slightly Stressed',
+    'Stressed', 'Very Stressed', 'Anxious', 'Depressed', 'Overwhelmed',
+    'Panicked', 'Hopeless'
+]
+
+TRIGGER_OPTIONS = [
+    'Academic pressure', 'Parent scolding/disappointment', 'Relationship issues/breakup',
+    'Financial problems', 'Family conflicts', 'Health issues', 'Career uncertainty',
+    'Social isolation', 'Exam failure', 'Peer pressure', 'Loss of loved one',
+    'Trauma/abuse', 'None/No specific trigger'
+]
+
+# Personalized solution rules, compiled by SolutionRuleSet. Each rule fires on any of
+# its conditions; solutions are emitted once, in table order.
+SOLUTION_RULES = [
+    # Base solutions based on stress level
+    {'levels': ['Fabulous'], 'solutions': [
+        'Continue your excellent stress management practices',
+        'Consider mentoring peers who might be struggling',
+        'Maintain your current healthy routines'
+    ]},
+    {'levels': ['Good'], 'solutions': [
+        'Implement daily 10-minute mindfulness sessions',
+        'Create a structured study schedule',
+        'Join study groups for peer support'
+    ]},
+    {'levels': ['Bad'], 'solutions': [
+        'Seek immediate counseling support',
+        'Reduce academic workload if possible',
+        'Practice daily stress relief techniques',
+        'Connect with campus mental health services'
+    ]},
+    {'levels': ['Awful'], 'solutions': [
+        'URGENT: Seek immediate professional mental health support',
+        'Contact crisis helpline numbers provided',
+        'Inform trusted family member or friend about your situation',
+        'Consider temporary academic leave if recommended by counselor'
+    ]},
+    # Emotion-specific solutions
+    {'emotions': ['Anxious', 'Panicked'], 'solutions': [
+        'Practice deep breathing exercises (4-7-8 technique)',
+        'Try progressive muscle relaxation',
+        'Limit caffeine intake which can worsen anxiety'
+    ]},
+    {'emotions': ['Depressed', 'Hopeless'], 'solutions': [
+        'Establish daily sunlight exposure routine',
+        'Engage in physical activity, even light walking',
+        'Reach out to support network regularly'
+    ]},
+    {'emotions': ['Overwhelmed'], 'solutions': [
+        'Break large tasks into smaller, manageable steps',
+        'Use time-blocking technique for better organization',
+        'Practice saying "no" to non-essential commitments'
+    ]},
+    # Trigger-specific solutions; a trigger matches the first rule whose text it contains
+    {'trigger_contains': 'Academic pressure', 'solutions': [
+        'Discuss academic expectations with professors or academic advisor'
+    ]},
+    {'trigger_contains': 'Financial problems', 'solutions': [
+        'Explore financial aid options and scholarship opportunities'
+    ]},
+    {'trigger_contains': 'Relationship issues', 'solutions': [
+        'Consider relationship counseling or focus on self-care during this transition'
+    ]},
+    {'trigger_contains': 'Family conflicts', 'solutions': [
+        'Practice setting healthy boundaries with family members'
+    ]},
+    # Trauma-informed solutions
+    {'trauma': True, 'solutions': [
+        'Consider trauma-informed therapy (EMDR, CBT)',
+        'Explore support groups for trauma survivors',
+        'Practice grounding techniques during flashbacks or triggers',
+        'Create a safety plan with trusted individuals'
+    ]},
+    # Context-specific solutions, only for context longer than 20 characters
+    {'context_keywords': ['sleep', 'tired'], 'solutions': [
+        'Prioritize sleep hygiene - aim for 7-9 hours nightly'
+    ]},
+    {'context_keywords': ['study', 'exam'], 'solutions': [
+        'Implement active study techniques like spaced repetition'
+    ]},
+    {'context_keywords': ['friend', 'social'], 'solutions': [
+        'Nurture existing friendships and consider joining social activities'
+    ]},
+]
+
+# State capital mapping used for facility fallback
+STATE_CAPITALS = {
+    'Andhra Pradesh': 'Amaravati',
+    'Arunachal Pradesh': 'Itanagar',
+    'Assam': 'Dispur',
+    'Bihar': 'Patna',
+    'Chhattisgarh': 'Raipur',
+    'Goa': 'Panaji',
+    'Gujarat': 'Gandhinagar',
+    'Haryana': 'Chandigarh',
+    'Himachal Pradesh': 'Shimla',
+    'Jharkhand': 'Ranchi',
+    'Karnataka': 'Bangalore',
+    'Kerala': 'Thiruvananthapuram',
+    'Madhya Pradesh': 'Bhopal',
+    'Maharashtra': 'Mumbai',
+    'Manipur': 'Imphal',
+    'Meghalaya': 'Shillong',
+    'Mizoram': 'Aizawl',
+    'Nagaland': 'Kohima',
+    'Odisha': 'Bhubaneswar',
+    'Punjab': 'Chandigarh',
+    'Rajasthan': 'Jaipur',
+    'Sikkim': 'Gangtok',
+    'Tamil Nadu': 'Chennai',
+    'Telangana': 'Hyderabad',
+    'Tripura': 'Agartala',
+    'Uttar Pradesh': 'Lucknow',
+    'Uttarakhand': 'Dehradun',
+    'West Bengal': 'Kolkata',
+    'Andaman and Nicobar Islands': 'Port Blair',
+    'Chandigarh': 'Chandigarh',
+    'Dadra and Nagar Haveli and Daman and Diu': 'Daman',
+    'Delhi': 'New Delhi',
+    'Jammu and Kashmir': 'Srinagar',
+    'Ladakh': 'Leh',
+    'Lakshadweep': 'Kavaratti',
+    'Puducherry': 'Puducherry'
+}
+
+# Weights, trauma bonus and level cut-offs of the enhanced stress score
+DEFAULT_SCORING_PROFILE = {
+    'ml_weight': 0.70,
+    'course_weight': 0.10,
+    'emotion_weight': 0.10,
+    'trigger_weight': 0.10,
+    'trauma_bonus': 0.1,
+    'thresholds': {'Awful': 0.8, 'Bad': 0.6, 'Good': 0.4}
+}
+
+def scoring_profile(overrides: Dict = None) -> Dict:
+    """Default scoring profile with the given weights, bonus or thresholds replaced"""
+    overrides = overrides or {}
+    unknown = set(overrides) - set(DEFAULT_SCORING_PROFILE)
+    if unknown:
+        raise ValueError(f"Unknown scoring profile keys: {sorted(unknown)}")
+    profile = dict(DEFAULT_SCORING_PROFILE, **overrides)
+    profile['thresholds'] = dict(DEFAULT_SCORING_PROFILE['thresholds'], **overrides.get('thresholds', {}))
+    thresholds = profile['thresholds']
+    if not thresholds['Awful'] >= thresholds['Bad'] >= thresholds['Good']:
+        raise ValueError(f"Thresholds must satisfy Awful >= Bad >= Good, got {thresholds}")
+    return profile
+
+def load_scoring_profile(path: str) -> Dict:
+    """Scoring profile from a JSON file of overrides"""
+    with open(path, 'r') as f:
+        return scoring_profile(json.load(f))
+
+# Crisis helplines included with every facility lookup
+EMERGENCY_NUMBERS = [
+    {
+        'name': 'AASRA (24/7 Crisis Helpline)',
+        'number': '9820466726',
+        'description': 'Suicide prevention and crisis intervention'
+    },
+    {
+        'name': 'Vandrevala Foundation',
+        'number': '9999666555',
+        'description': '24/7 mental health support'
+    },
+    {
+        'name': 'Sneha India',
+        'number': '044-24640050',
+        'description': 'Emotional support and suicide prevention'
+    },
+    {
+        'name': 'iCall (TISS)',
+        'number': '9152987821',
+        'description': 'Psychosocial helpline (Mon-Sat, 8AM-10PM)'
+    },
+    {
+        'name': 'Kiran Mental Health Helpline',
+        'number': '1800-599-0019',
+        'description': 'Government of India 24/7 mental health support'
+    }
+]
+
+def predict_stress_level(mark10th, mark12th, collegemark, carrer_willing, smtime, financial):
+    """Simple rule-based prediction"""
+    
+    academic_avg = (mark10th + mark12th + collegemark) / 3
+    risk_score = 0
+    
+    # Academic factors
+    if academic_avg < 50:
+        risk_score += 3
+    elif academic_avg < 70:
+        risk_score += 1
+    
+    # Career factors
+    if carrer_willing < 30:
+        risk_score += 2
+    elif carrer_willing < 60:
+        risk_score += 1
+    
+    # Social media
+    if smtime > 8:
+        risk_score += 2
+    elif smtime > 5:
+        risk_score += 1
+    
+    # Financial
+    if financial == 'Awful':
+        risk_score += 2
+    elif financial == 'Bad':
+        risk_score += 1
+    
+    # Map to stress level
+    if risk_score >= 6:
+        return 'Awful', [0.1, 0.1, 0.2, 0.6]
+    elif risk_score >= 4:
+        return 'Bad', [0.1, 0.2, 0.6, 0.1]
+    elif risk_score >= 2:
+        return 'Good', [0.2, 0.6, 0.1, 0.1]
+    else:
+        return 'Fabulous', [0.6, 0.3, 0.1, 0.0]
+
+def run_assessment(engine, assessment: Dict) -> Tuple[str, List[float], Dict, Dict]:
+    """Prediction, user profile and comprehensive results for one assessment form
+
+    `assessment` uses the form's field names (mark10th, studytime, triggers, context, ...);
+    the app, the load test and bulk reports all score students through this one path.
+    """
+    predicted_level, probabilities = predict_stress_level(
+        assessment['mark10th'], assessment['mark12th'], assessment['collegemark'],
+        assessment['carrer_willing'], assessment['smtime'], assessment['financial']
+    )
+    user_profile = {
+        'academic_performance': (assessment['mark10th'] + assessment['mark12th'] + assessment['collegemark']) / 3,
+        'study_time': assessment['studytime'],
+        'social_media_time': assessment['smtime'],
+        'career_willingness': assessment['carrer_willing'],
+        'financial_status': assessment['financial'],
+        'gender': assessment['gender'],
+        'travel_time': assessment['travel']
+    }
+    results = engine.generate_comprehensive_recommendations(
+        ml_prediction=predicted_level,
+        ml_probabilities=probabilities,
+        course=assessment['course'],
+        emotion=assessment['emotion'],
+        trigger_events=assessment['triggers'],
+        context_text=assessment['context'],
+        state=assessment['state'],
+        city=assessment['city'],
+        user_profile=user_profile
+    )
+    return predicted_level, probabilities, user_profile, results
+
+def score_assessment(engine, assessment: Dict) -> Dict:
+    """Comprehensive results for one assessment form, for callers that only need the results"""
+    return run_assessment(engine, assessment)[3]
+
 class EmotionalAnalyzer:
+    # Sentiment lexicon; every list entry counts once when present ('angry' is listed twice)
+    NEGATIVE_WORDS = [
+        'sad', 'angry', 'frustrated', 'terrible', 'awful', 'hate', 'angry',
+        'depressed', 'hopeless', 'worthless', 'failure', 'disappointed',
+        'stressed', 'overwhelmed', 'exhausted', 'tired', 'worried', 'scared'
+    ]
+    POSITIVE_WORDS = [
+        'happy', 'good', 'great', 'excellent', 'wonderful', 'amazing',
+        'love', 'excited', 'confident', 'optimistic', 'hopeful', 'peaceful'
+    ]
+
     def __init__(self):
         # Emotion weights for stress calculation
         self.emotion_stress_weights = {
@@ -52,6 +331,16 @@ class EmotionalAnalyzer:
     def analyze_emotional_state(self, emotion: str, trigger_events: List[str], context_text: str = "") -> Dict:
         """Analyze emotional state and return stress factors"""
         
+        emotion_score, trigger_score = self.score_emotion_and_triggers(emotion, trigger_events)
+        trauma_detected, sentiment_score = self.analyze_context(context_text)
+        
+        return self.build_analysis(
+            emotion, trigger_events, emotion_score, trigger_score, trauma_detected, sentiment_score
+        )
+    
+    def score_emotion_and_triggers(self, emotion: str, trigger_events: List[str]) -> Tuple[float, float]:
+        """Text-independent stress factors"""
+        
         # Get emotion stress score
         emotion_score = self.emotion_stress_weights.get(emotion, 0.5)
         
@@ -59,18 +348,34 @@ class EmotionalAnalyzer:
         trigger_scores = [self.trigger_event_weights.get(event, 0.5) for event in trigger_events]
         trigger_score = sum(trigger_scores) / len(trigger_scores) if trigger_scores else 0.3
         
+        return emotion_score, trigger_score
+    
+    def analyze_context(self, context_text: str) -> Tuple[bool, float]:
+        """Text-dependent stress factors: trauma indicators and sentiment"""
+        
         # Analyze context text for trauma indicators
         trauma_detected = self._detect_trauma_in_text(context_text)
-        trauma_score = 0.9 if trauma_detected else 0.0
         
         # Sentiment analysis of context text
         sentiment_score = self._analyze_sentiment(context_text)
         
+        return trauma_detected, sentiment_score
+    
+    def build_analysis(
+        self,
+        emotion: str,
+        trigger_events: List[str],
+        emotion_score: float,
+        trigger_score: float,
+        trauma_detected: bool,
+        sentiment_score: float
+    ) -> Dict:
+        """Assemble the emotional analysis result from its factors"""
         return {
             'emotion_score': emotion_score,
             'trigger_score': trigger_score,
             'trauma_detected': trauma_detected,
-            'trauma_score': trauma_score,
+            'trauma_score': 0.9 if trauma_detected else 0.0,
             'sentiment_score': sentiment_score,
             'analysis_summary': {
                 'primary_emotion': emotion,
@@ -96,22 +401,15 @@ class EmotionalAnalyzer:
         if not text:
             return 0.5
         
-        negative_words = [
-            'sad', 'angry', 'frustrated', 'terrible', 'awful', 'hate', 'angry',
-            'depressed', 'hopeless', 'worthless', 'failure', 'disappointed',
-            'stressed', 'overwhelmed', 'exhausted', 'tired', 'worried', 'scared'
-        ]
-        
-        positive_words = [
-            'happy', 'good', 'great', 'excellent', 'wonderful', 'amazing',
-            'love', 'excited', 'confident', 'optimistic', 'hopeful', 'peaceful'
-        ]
-        
         text_lower = text.lower()
-        negative_count = sum(1 for word in negative_words if word in text_lower)
-        positive_count = sum(1 for word in positive_words if word in text_lower)
+        negative_count = sum(1 for word in self.NEGATIVE_WORDS if word in text_lower)
+        positive_count = sum(1 for word in self.POSITIVE_WORDS if word in text_lower)
         
-        total_words = len(text.split())
+        return self.sentiment_from_counts(negative_count, positive_count, len(text.split()))
+    
+    @staticmethod
+    def sentiment_from_counts(negative_count: int, positive_count: int, total_words: int) -> float:
+        """Sentiment score from lexicon hits and the whitespace-separated word count"""
         if total_words == 0:
             return 0.5
         
@@ -119,6 +417,132 @@ class EmotionalAnalyzer:
         sentiment_score = (negative_count - positive_count + total_words * 0.5) / total_words
         return max(0.0, min(1.0, sentiment_score))
 
+
+class IncrementalContextAnalyzer:
+    """analyze_context kept up to date while a text is edited
+
+    Holds the occurrence count of every lexicon and trauma keyword and the whitespace
+    word count. An edit only re-scans a window reaching one keyword length beyond the
+    changed span, plus the partial words cut at its edges, so results stay identical
+    to EmotionalAnalyzer.analyze_context on the whole text.
+    """
+
+    def __init__(self, emotional_analyzer: EmotionalAnalyzer = None, text: str = ""):
+        analyzer = emotional_analyzer or EmotionalAnalyzer()
+        self.emotional_analyzer = analyzer
+        self.trauma_keywords = list(analyzer.trauma_keywords)
+        self.keywords = list(dict.fromkeys(self.trauma_keywords + analyzer.NEGATIVE_WORDS + analyzer.POSITIVE_WORDS))
+        self.max_keyword_length = max(len(keyword) for keyword in self.keywords)
+        # Windows are lowercased in isolation, which only matches the whole-text lower() for ASCII keywords
+        self._windowed = all(keyword.isascii() for keyword in self.keywords)
+        self._text = ""
+        self._counts = dict.fromkeys(self.keywords, 0)
+        self._word_count = 0
+        # Characters whose lowercase form is longer (e.g. 'İ') shift offsets, so scans fall back to the full text
+        self._expanding_chars = 0
+        if text:
+            self.replace(0, 0, text)
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def append(self, text: str) -> Tuple[bool, float]:
+        return self.replace(len(self._text), len(self._text), text)
+
+    def set_text(self, text: str) -> Tuple[bool, float]:
+        """Apply a whole new value (e.g. a widget's) as the single edit that differs from the current text"""
+        old = self._text
+        prefix = _common_prefix_length(old, text)
+        suffix = _common_prefix_length(old[prefix:][::-1], text[prefix:][::-1])
+        return self.replace(prefix, len(old) - suffix, text[prefix:len(text) - suffix])
+
+    def replace(self, start: int, end: int, replacement: str) -> Tuple[bool, float]:
+        """Replace text[start:end] and return the (trauma_detected, sentiment_score) of the result"""
+        old = self._text
+        if not 0 <= start <= end <= len(old):
+            raise ValueError(f"Edit span {start}:{end} is outside the text (length {len(old)})")
+        new = old[:start] + replacement + old[end:]
+
+        # A word starts where a non-space follows a space, so only starts inside the span or just after it change
+        self._word_count += (
+            _word_starts(new, start, start + len(replacement)) - _word_starts(old, start, end)
+        )
+
+        self._expanding_chars += _expanding_chars(replacement) - _expanding_chars(old[start:end])
+        self._text = new
+        if not self._windowed or self._expanding_chars:
+            self._counts = None
+        elif self._counts is None:
+            self._counts = {keyword: _occurrences(new.lower(), keyword, 0, len(new)) for keyword in self.keywords}
+        else:
+            # Occurrences starting in (start - length, end) overlap the edit; only those change
+            reach = self.max_keyword_length - 1
+            old_from = max(0, start - reach)
+            old_window = old[old_from:end + reach].lower()
+            new_window = new[old_from:start + len(replacement) + reach].lower()
+            for keyword in self.keywords:
+                in_old = keyword in old_window
+                if in_old or keyword in new_window:
+                    first = max(0, start - len(keyword) + 1) - old_from
+                    self._counts[keyword] += (
+                        _occurrences(new_window, keyword, first, start + len(replacement) - 1 - old_from)
+                        - (_occurrences(old_window, keyword, first, end - 1 - old_from) if in_old else 0)
+                    )
+        return self.result()
+
+    def result(self) -> Tuple[bool, float]:
+        """(trauma_detected, sentiment_score), as EmotionalAnalyzer.analyze_context returns them"""
+        if self._counts is None:
+            return self.emotional_analyzer.analyze_context(self._text)
+        if not self._text:
+            return False, 0.5
+        counts = self._counts
+        trauma_detected = any(counts[keyword] for keyword in self.trauma_keywords)
+        negative_count = sum(1 for word in EmotionalAnalyzer.NEGATIVE_WORDS if counts[word])
+        positive_count = sum(1 for word in EmotionalAnalyzer.POSITIVE_WORDS if counts[word])
+        return trauma_detected, EmotionalAnalyzer.sentiment_from_counts(negative_count, positive_count, self._word_count)
+
+
+def _occurrences(text: str, keyword: str, first: int, last: int) -> int:
+    """Number of (possibly overlapping) occurrences of keyword starting at positions first..last"""
+    count = 0
+    position = text.find(keyword, first, last + len(keyword))
+    while position != -1:
+        count += 1
+        position = text.find(keyword, position + 1, last + len(keyword))
+    return count
+
+
+def _word_starts(text: str, first: int, last: int) -> int:
+    """Number of whitespace-separated words starting at positions first..last"""
+    segment = text[first:last + 1]
+    count = len(segment.split())
+    # A word running into the segment from the left starts before it
+    if count and first > 0 and not segment[0].isspace() and not text[first - 1].isspace():
+        count -= 1
+    return count
+
+
+def _expanding_chars(text: str) -> int:
+    """Characters whose lowercase form is more than one character long"""
+    if len(text.lower()) == len(text):
+        return 0
+    return sum(1 for char in text if len(char.lower()) != 1)
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """Length of the common prefix, by bisection over slice comparisons"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[:middle] == b[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
 class CourseAnalyzer:
     # 🔑 FIX: Apply robust path handling here
     def __init__(self):
@@ -137,11 +561,12 @@ class CourseAnalyzer:
     def get_course_specific_advice(self, course: str, stress_level: str) -> List[str]:
         """Get course-specific coping strategies"""
         course_data = self.course_patterns.get(course, {})
-        strategies = course_data.get('coping_strategies', [
+        # Copy so the loaded patterns are not extended on every call
+        strategies = list(course_data.get('coping_strategies', [
             'Develop effective study habits',
             'Seek help from professors and peers',
             'Maintain work-life balance'
-        ])
+        ]))
         
         if stress_level in ['Bad', 'Awful']:
             # Add more intensive strategies for high stress
@@ -155,8 +580,8 @@ class CourseAnalyzer:
 
 class LocationBasedRecommendations:
     # 🔑 FIX: Apply robust path handling here
-    def __init__(self):
-        facilities_path = os.path.join(ENGINE_SCRIPT_DIR, 'india_mental_health_facilities.json')
+    def __init__(self, facilities_path: str = None):
+        facilities_path = facilities_path or os.path.join(ENGINE_SCRIPT_DIR, 'india_mental_health_facilities.json')
         try:
             with open(facilities_path, 'r') as f:
                 self.facilities = json.load(f)
@@ -165,54 +590,23 @@ class LocationBasedRecommendations:
             raise FileNotFoundError(f"LocationBasedRecommendations failed to load file: {facilities_path}. Error: {e}")
 
         # State capital mapping for fallback (unchanged)
-        self.state_capitals = {
-            'Andhra Pradesh': 'Amaravati',
-            'Arunachal Pradesh': 'Itanagar',
-            'Assam': 'Dispur',
-            'Bihar': 'Patna',
-            'Chhattisgarh': 'Raipur',
-            'Goa': 'Panaji',
-            'Gujarat': 'Gandhinagar',
-            'Haryana': 'Chandigarh',
-            'Himachal Pradesh': 'Shimla',
-            'Jharkhand': 'Ranchi',
-            'Karnataka': 'Bangalore',
-            'Kerala': 'Thiruvananthapuram',
-            'Madhya Pradesh': 'Bhopal',
-            'Maharashtra': 'Mumbai',
-            'Manipur': 'Imphal',
-            'Meghalaya': 'Shillong',
-            'Mizoram': 'Aizawl',
-            'Nagaland': 'Kohima',
-            'Odisha': 'Bhubaneswar',
-            'Punjab': 'Chandigarh',
-            'Rajasthan': 'Jaipur',
-            'Sikkim': 'Gangtok',
-            'Tamil Nadu': 'Chennai',
-            'Telangana': 'Hyderabad',
-            'Tripura': 'Agartala',
-            'Uttar Pradesh': 'Lucknow',
-            'Uttarakhand': 'Dehradun',
-            'West Bengal': 'Kolkata',
-            'Andaman and Nicobar Islands': 'Port Blair',
-            'Chandigarh': 'Chandigarh',
-            'Dadra and Nagar Haveli and Daman and Diu': 'Daman',
-            'Delhi': 'New Delhi',
-            'Jammu and Kashmir': 'Srinagar',
-            'Ladakh': 'Leh',
-            'Lakshadweep': 'Kavaratti',
-            'Puducherry': 'Puducherry'
-        }
+        self.state_capitals = STATE_CAPITALS
+    
+    def _load_city(self, state: str, city: str) -> Dict:
+        """Facility lists of one city, or {} when the city has no facilities (as in SQLiteFacilityProvider)"""
+        city_data = self.facilities.get(state, {}).get(city, {})
+        has_facilities = any(city_data.get(kind) for kind in ('hospitals', 'counseling_centers', 'support_groups'))
+        return city_data if has_facilities else {}
     
     def get_nearby_facilities(self, state: str, city: str) -> Dict:
         """Get mental health facilities near the user's location with state capital fallback"""
         state_data = self.facilities.get(state, {})
-        city_data = state_data.get(city, {})
+        city_data = self._load_city(state, city)
         
         # If exact city not found, try state capital as fallback
         if not city_data and state in self.state_capitals:
             capital_city = self.state_capitals[state]
-            city_data = state_data.get(capital_city, {})
+            city_data = self._load_city(state, capital_city)
             if city_data:
                 # Add note about fallback to capital
                 fallback_note = f"Mental health facilities from {capital_city} (state capital) as {city} information not available"
@@ -237,33 +631,7 @@ class LocationBasedRecommendations:
             }
         
         # Always include emergency numbers
-        emergency_numbers = [
-            {
-                'name': 'AASRA (24/7 Crisis Helpline)',
-                'number': '9820466726',
-                'description': 'Suicide prevention and crisis intervention'
-            },
-            {
-                'name': 'Vandrevala Foundation',
-                'number': '9999666555',
-                'description': '24/7 mental health support'
-            },
-            {
-                'name': 'Sneha India',
-                'number': '044-24640050',
-                'description': 'Emotional support and suicide prevention'
-            },
-            {
-                'name': 'iCall (TISS)',
-                'number': '9152987821',
-                'description': 'Psychosocial helpline (Mon-Sat, 8AM-10PM)'
-            },
-            {
-                'name': 'Kiran Mental Health Helpline',
-                'number': '1800-599-0019',
-                'description': 'Government of India 24/7 mental health support'
-            }
-        ]
+        emergency_numbers = [dict(entry) for entry in EMERGENCY_NUMBERS]
         
         result = {
             'hospitals': city_data.get('hospitals', []),
@@ -278,11 +646,172 @@ class LocationBasedRecommendations:
         
         return result
 
+class SolutionRuleSet:
+    """SOLUTION_RULES compiled to bitmasks
+
+    Every input (stress level, emotion, triggers, trauma flag, context keywords) sets
+    one bit per rule it satisfies, so a request reduces to a single integer mask and
+    the solution list for each distinct mask is built once and reused.
+    """
+
+    MIN_CONTEXT_LENGTH = 21
+    # evaluate_batch packs a request's rules into one uint64
+    MAX_RULES = 64
+
+    def __init__(self, rules: List[Dict] = None):
+        rules = SOLUTION_RULES if rules is None else rules
+        if len(rules) > self.MAX_RULES:
+            raise ValueError(f"SolutionRuleSet supports at most {self.MAX_RULES} rules, got {len(rules)}")
+
+        # Shared solution table, in first-appearance order
+        self.solution_table = []
+        solution_index = {}
+        self._level_bits, self._emotion_bits = {}, {}
+        self._trigger_rules, self._context_rules = [], []
+        self._trauma_bit = 0
+        self.rule_masks, self.rule_solutions = [], []
+
+        for rule_index, rule in enumerate(rules):
+            bit = 1 << rule_index
+            for level in rule.get('levels', []):
+                self._level_bits[level] = self._level_bits.get(level, 0) | bit
+            for emotion in rule.get('emotions', []):
+                self._emotion_bits[emotion] = self._emotion_bits.get(emotion, 0) | bit
+            if 'trigger_contains' in rule:
+                self._trigger_rules.append((rule['trigger_contains'], bit))
+            if rule.get('trauma'):
+                self._trauma_bit |= bit
+            if 'context_keywords' in rule:
+                self._context_rules.append((tuple(rule['context_keywords']), bit))
+
+            indices = []
+            for solution in rule['solutions']:
+                if solution not in solution_index:
+                    solution_index[solution] = len(self.solution_table)
+                    self.solution_table.append(solution)
+                indices.append(solution_index[solution])
+            self.rule_masks.append(bit)
+            self.rule_solutions.append(indices)
+
+        # Unknown stress levels fall back to the 'Good' rules
+        self._default_level_bits = self._level_bits.get('Good', 0)
+        self._trigger_bits = {trigger: self._match_trigger(trigger) for trigger in TRIGGER_OPTIONS}
+        self._solutions_by_mask = {}
+
+        # Dense form of the rules for vectorized batches
+        self._rule_mask_array = np.array(self.rule_masks, dtype=np.uint64)
+        self._incidence = np.zeros((len(rules), len(self.solution_table)), dtype=np.uint8)
+        for rule_index, indices in enumerate(self.rule_solutions):
+            self._incidence[rule_index, indices] = 1
+
+    def _match_trigger(self, trigger: str) -> int:
+        for text, bit in self._trigger_rules:
+            if text in trigger:
+                return bit
+        return 0
+
+    def base_mask(self, stress_level: str, emotion: str, trigger_events: List[str], trauma_detected: bool) -> int:
+        """Bitmask of the rules satisfied by the categorical inputs"""
+        mask = self._level_bits.get(stress_level, self._default_level_bits)
+        mask |= self._emotion_bits.get(emotion, 0)
+        for trigger in trigger_events:
+            trigger_bit = self._trigger_bits.get(trigger)
+            mask |= self._match_trigger(trigger) if trigger_bit is None else trigger_bit
+        if trauma_detected:
+            mask |= self._trauma_bit
+        return mask
+
+    def context_mask(self, context_text: str) -> int:
+        """Bitmask of the rules satisfied by keywords in the context text"""
+        mask = 0
+        if context_text and len(context_text) >= self.MIN_CONTEXT_LENGTH:
+            context_lower = context_text.lower()
+            for keywords, bit in self._context_rules:
+                for keyword in keywords:
+                    if keyword in context_lower:
+                        mask |= bit
+                        break
+        return mask
+
+    def request_mask(
+        self,
+        stress_level: str,
+        emotion: str,
+        trigger_events: List[str],
+        trauma_detected: bool,
+        context_text: str
+    ) -> int:
+        """Bitmask of the rules satisfied by one request"""
+        return (
+            self.base_mask(stress_level, emotion, trigger_events, trauma_detected)
+            | self.context_mask(context_text)
+        )
+
+    def solutions_for_mask(self, mask: int) -> Tuple[str, ...]:
+        """Solutions of every rule in the mask, computed once per distinct mask"""
+        solutions = self._solutions_by_mask.get(mask)
+        if solutions is None:
+            indices = sorted({
+                index
+                for rule_mask, rule_indices in zip(self.rule_masks, self.rule_solutions)
+                if mask & rule_mask
+                for index in rule_indices
+            })
+            solutions = tuple(self.solution_table[index] for index in indices)
+            self._solutions_by_mask[mask] = solutions
+        return solutions
+
+    def evaluate(
+        self,
+        stress_level: str,
+        emotion: str,
+        trigger_events: List[str],
+        trauma_detected: bool,
+        context_text: str
+    ) -> List[str]:
+        return list(self.solutions_for_mask(
+            self.request_mask(stress_level, emotion, trigger_events, trauma_detected, context_text)
+        ))
+
+    def evaluate_batch(self, masks) -> np.ndarray:
+        """Boolean matrix (requests x solution_table) for an array of request masks"""
+        masks = np.asarray(masks, dtype=np.uint64)
+        fired = ((masks[:, None] & self._rule_mask_array[None, :]) != 0).astype(np.uint8)
+        return (fired @ self._incidence) > 0
+
+def _copy_facility_block(block: Dict) -> Dict:
+    """Copy of a get_nearby_facilities result down to the lists inside each facility entry"""
+    return {
+        key: [
+            {field: list(item) if isinstance(item, list) else item for field, item in entry.items()}
+            for entry in value
+        ] if isinstance(value, list) else value
+        for key, value in block.items()
+    }
+
 class PersonalizedRecommendationEngine:
-    def __init__(self):
+    # 🔑 Level-dependent results and facility blocks are memoized; scores and rule masks are cheap lookups per request
+    # 4 levels x 2 trauma flags x the known courses, with room for free-text course names
+    LEVEL_CACHE_SIZE = 256
+    # Roughly the number of cities in state_city_data.json
+    FACILITY_CACHE_SIZE = 512
+
+    def __init__(self, location_recommendations=None, profile: Dict = None):
+        # A validated private copy, so later edits to the caller's dict cannot desync the level cache
+        self.scoring_profile = scoring_profile(profile)
         self.emotional_analyzer = EmotionalAnalyzer()
         self.course_analyzer = CourseAnalyzer()
-        self.location_recommendations = LocationBasedRecommendations()
+        self.solution_rules = SolutionRuleSet()
+        # Any provider exposing get_nearby_facilities(state, city) can be plugged in
+        self.location_recommendations = location_recommendations or LocationBasedRecommendations()
+
+        # Caches are per instance so they never outlive the analyzers and provider they depend on
+        self._level_results = functools.lru_cache(maxsize=self.LEVEL_CACHE_SIZE)(self._compute_level_results)
+        self._facilities = functools.lru_cache(maxsize=self.FACILITY_CACHE_SIZE)(
+            self.location_recommendations.get_nearby_facilities
+        )
+        # The common empty-context case needs no text analysis at all
+        self._empty_context = self.emotional_analyzer.analyze_context("") + (self.solution_rules.context_mask(""),)
     
     def generate_comprehensive_recommendations(
         self, 
@@ -298,13 +827,19 @@ class PersonalizedRecommendationEngine:
     ) -> Dict:
         """Generate comprehensive personalized recommendations"""
         
-        # Analyze emotional state
-        emotional_analysis = self.emotional_analyzer.analyze_emotional_state(
-            emotion, trigger_events, context_text
-        )
+        # Text-dependent delta: trauma flag, sentiment and context keyword rules
+        if context_text:
+            trauma_detected, sentiment_score = self.emotional_analyzer.analyze_context(context_text)
+            context_mask = self.solution_rules.context_mask(context_text)
+        else:
+            trauma_detected, sentiment_score, context_mask = self._empty_context
         
-        # Get course stress factor
+        # Text-independent factors for this course, emotion and trigger combination
         course_stress_factor = self.course_analyzer.get_course_stress_factor(course)
+        emotion_score, trigger_score = self.emotional_analyzer.score_emotion_and_triggers(emotion, trigger_events)
+        emotional_analysis = self.emotional_analyzer.build_analysis(
+            emotion, trigger_events, emotion_score, trigger_score, trauma_detected, sentiment_score
+        )
         
         # Calculate enhanced stress score
         enhanced_stress_score = self._calculate_enhanced_stress_score(
@@ -314,35 +849,44 @@ class PersonalizedRecommendationEngine:
         # Determine final stress level
         final_stress_level = self._determine_stress_level(enhanced_stress_score)
         
-        # Generate personalized solutions
-        personalized_solutions = self._generate_personalized_solutions(
-            final_stress_level, course, emotional_analysis, context_text, user_profile
+        # Only level, course and trauma shape these, so the cache has a few dozen keys
+        immediate_actions, course_advice, long_term_strategies = self._level_results(
+            final_stress_level, course, trauma_detected
         )
         
-        # Get location-based recommendations
-        location_facilities = self.location_recommendations.get_nearby_facilities(state, city)
+        # Generate personalized solutions
+        base_mask = self.solution_rules.base_mask(final_stress_level, emotion, trigger_events, trauma_detected)
+        personalized_solutions = list(self.solution_rules.solutions_for_mask(base_mask | context_mask))
         
-        # Get course-specific advice
-        course_advice = self.course_analyzer.get_course_specific_advice(course, final_stress_level)
+        # Get location-based recommendations (copied so callers cannot alter the cached block)
+        location_facilities = _copy_facility_block(self._facilities(state, city))
         
         return {
             'original_ml_prediction': ml_prediction,
             'enhanced_stress_level': final_stress_level,
             'stress_score_breakdown': {
-                'ml_model_contribution': 0.70,
-                'course_factor_contribution': 0.10,
-                'emotional_state_contribution': 0.10,
-                'trigger_events_contribution': 0.10,
+                'ml_model_contribution': self.scoring_profile['ml_weight'],
+                'course_factor_contribution': self.scoring_profile['course_weight'],
+                'emotional_state_contribution': self.scoring_profile['emotion_weight'],
+                'trigger_events_contribution': self.scoring_profile['trigger_weight'],
                 'final_score': enhanced_stress_score
             },
             'emotional_analysis': emotional_analysis,
             'personalized_solutions': personalized_solutions,
-            'course_specific_advice': course_advice,
+            'course_specific_advice': list(course_advice),
             'location_based_facilities': location_facilities,
-            'immediate_actions': self._get_immediate_actions(final_stress_level, emotional_analysis),
-            'long_term_strategies': self._get_long_term_strategies(final_stress_level, course)
+            'immediate_actions': list(immediate_actions),
+            'long_term_strategies': list(long_term_strategies)
         }
     
+    def _compute_level_results(self, stress_level: str, course: str, trauma_detected: bool) -> Tuple:
+        """Immediate actions, course advice and long-term strategies for one level, course and trauma flag"""
+        return (
+            tuple(self._get_immediate_actions(stress_level, {'trauma_detected': trauma_detected})),
+            tuple(self.course_analyzer.get_course_specific_advice(course, stress_level)),
+            tuple(self._get_long_term_strategies(stress_level, course))
+        )
+    
     def _calculate_enhanced_stress_score(
         self, 
         ml_probabilities: List[float], 
@@ -350,129 +894,47 @@ class PersonalizedRecommendationEngine:
         emotional_analysis: Dict
     ) -> float:
         """Calculate the enhanced stress score using weighted factors"""
-        
-        # Convert ML probabilities to stress score (higher index = higher stress)
-        ml_stress_score = sum(i * prob for i, prob in enumerate(ml_probabilities)) / (len(ml_probabilities) - 1)
+        profile = self.scoring_profile
         
         # Combine all factors
         final_score = (
-            0.70 * ml_stress_score +
-            0.10 * course_factor +
-            0.10 * emotional_analysis['emotion_score'] +
-            0.10 * emotional_analysis['trigger_score']
+            profile['ml_weight'] * self.ml_stress_score(ml_probabilities) +
+            profile['course_weight'] * course_factor +
+            profile['emotion_weight'] * emotional_analysis['emotion_score'] +
+            profile['trigger_weight'] * emotional_analysis['trigger_score']
         )
         
         # Add trauma bonus if detected
         if emotional_analysis['trauma_detected']:
-            final_score = min(1.0, final_score + 0.1)
+            final_score = min(1.0, final_score + profile['trauma_bonus'])
         
         return final_score
     
+    @staticmethod
+    def ml_stress_score(ml_probabilities: List[float]) -> float:
+        """Convert ML probabilities to stress score (higher index = higher stress)"""
+        return sum(i * prob for i, prob in enumerate(ml_probabilities)) / (len(ml_probabilities) - 1)
+    
+    def score_components(self, ml_probabilities: List[float], course: str, emotion: str,
+                         trigger_events: List[str], context_text: str) -> Tuple[float, float, float, float, bool]:
+        """Profile-independent inputs of the enhanced stress score"""
+        trauma_detected = self.emotional_analyzer.analyze_context(context_text)[0] if context_text else self._empty_context[0]
+        course_stress_factor = self.course_analyzer.get_course_stress_factor(course)
+        emotion_score, trigger_score = self.emotional_analyzer.score_emotion_and_triggers(emotion, trigger_events)
+        return self.ml_stress_score(ml_probabilities), course_stress_factor, emotion_score, trigger_score, trauma_detected
+    
     def _determine_stress_level(self, score: float) -> str:
         """Determine stress level based on enhanced score"""
-        if score >= 0.8:
+        thresholds = self.scoring_profile['thresholds']
+        if score >= thresholds['Awful']:
             return 'Awful'
-        elif score >= 0.6:
+        elif score >= thresholds['Bad']:
             return 'Bad'
-        elif score >= 0.4:
+        elif score >= thresholds['Good']:
             return 'Good'
         else:
             return 'Fabulous'
     
-    def _generate_personalized_solutions(
-        self, 
-        stress_level: str, 
-        course: str, 
-        emotional_analysis: Dict, 
-        context_text: str,
-        user_profile: Dict
-    ) -> List[str]:
-        """Generate personalized solutions based on all input factors"""
-        
-        solutions = []
-        
-        # Base solutions based on stress level
-        base_solutions = {
-            'Fabulous': [
-                'Continue your excellent stress management practices',
-                'Consider mentoring peers who might be struggling',
-                'Maintain your current healthy routines'
-            ],
-            'Good': [
-                'Implement daily 10-minute mindfulness sessions',
-                'Create a structured study schedule',
-                'Join study groups for peer support'
-            ],
-            'Bad': [
-                'Seek immediate counseling support',
-                'Reduce academic workload if possible',
-                'Practice daily stress relief techniques',
-                'Connect with campus mental health services'
-            ],
-            'Awful': [
-                'URGENT: Seek immediate professional mental health support',
-                'Contact crisis helpline numbers provided',
-                'Inform trusted family member or friend about your situation',
-                'Consider temporary academic leave if recommended by counselor'
-            ]
-        }
-        
-        solutions.extend(base_solutions.get(stress_level, base_solutions['Good']))
-        
-        # Add emotion-specific solutions
-        emotion = emotional_analysis['analysis_summary']['primary_emotion']
-        if emotion in ['Anxious', 'Panicked']:
-            solutions.extend([
-                'Practice deep breathing exercises (4-7-8 technique)',
-                'Try progressive muscle relaxation',
-                'Limit caffeine intake which can worsen anxiety'
-            ])
-        elif emotion in ['Depressed', 'Hopeless']:
-            solutions.extend([
-                'Establish daily sunlight exposure routine',
-                'Engage in physical activity, even light walking',
-                'Reach out to support network regularly'
-            ])
-        elif emotion in ['Overwhelmed']:
-            solutions.extend([
-                'Break large tasks into smaller, manageable steps',
-                'Use time-blocking technique for better organization',
-                'Practice saying "no" to non-essential commitments'
-            ])
-        
-        # Add trigger-specific solutions
-        trigger_events = emotional_analysis['analysis_summary']['trigger_events']
-        for trigger in trigger_events:
-            if 'Academic pressure' in trigger:
-                solutions.append('Discuss academic expectations with professors or academic advisor')
-            elif 'Financial problems' in trigger:
-                solutions.append('Explore financial aid options and scholarship opportunities')
-            elif 'Relationship issues' in trigger:
-                solutions.append('Consider relationship counseling or focus on self-care during this transition')
-            elif 'Family conflicts' in trigger:
-                solutions.append('Practice setting healthy boundaries with family members')
-        
-        # Add trauma-informed solutions if trauma detected
-        if emotional_analysis['trauma_detected']:
-            solutions.extend([
-                'Consider trauma-informed therapy (EMDR, CBT)',
-                'Explore support groups for trauma survivors',
-                'Practice grounding techniques during flashbacks or triggers',
-                'Create a safety plan with trusted individuals'
-            ])
-        
-        # Add context-specific solutions based on text analysis
-        if context_text and len(context_text) > 20:
-            context_lower = context_text.lower()
-            if 'sleep' in context_lower or 'tired' in context_lower:
-                solutions.append('Prioritize sleep hygiene - aim for 7-9 hours nightly')
-            if 'study' in context_lower or 'exam' in context_lower:
-                solutions.append('Implement active study techniques like spaced repetition')
-            if 'friend' in context_lower or 'social' in context_lower:
-                solutions.append('Nurture existing friendships and consider joining social activities')
-        
-        return list(set(solutions))  # Remove duplicates
-    
     def _get_immediate_actions(self, stress_level: str, emotional_analysis: Dict) -> List[str]:
         """Get immediate actions based on stress level and emotional state"""
         
@@ -0,0 +1,359 @@
+import argparse
+import datetime
+import json
+import os
+import random
+import resource
+import time
+from array import array
+from typing import Dict, List
+
+import numpy as np
+
+from recommendation_engine import (
+    ENGINE_SCRIPT_DIR, COURSE_OPTIONS, EMOTION_OPTIONS, TRIGGER_OPTIONS, score_assessment
+)
+
+# 🔑 Stream recommendation results into Arrow IPC (Feather v2) files that readers memory-map without copying
+STATE_CITY_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'state_city_data.json')
+FACILITIES_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'india_mental_health_facilities.json')
+
+STRESS_LEVELS = ('Fabulous', 'Good', 'Bad', 'Awful')
+FACILITY_KINDS = ('hospitals', 'counseling_centers', 'support_groups')
+BATCH_ROWS = 65536
+
+# Dictionary-encoded columns: (vocabulary, array typecode of the dictionary indices)
+DICTIONARY_COLUMNS = {
+    'state': ('state', 'b'),
+    'city': ('city', 'h'),
+    'course': ('course', 'b'),
+    'emotion': ('emotion', 'b'),
+    'ml_prediction': ('level', 'b'),
+    'stress_level': ('level', 'b'),
+}
+TRIGGER_TYPECODE = 'b'
+SCORE_COLUMNS = ('final_score', 'emotion_score', 'trigger_score', 'sentiment_score')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError("Arrow result export needs pyarrow: pip install pyarrow")
+    return pa
+
+
+def facility_ids(json_path: str = FACILITIES_PATH) -> Dict[tuple, int]:
+    """(name, address, phone) -> id, using the facility_store row id of the facility's first listing
+
+    facility_store gives every listing its own row id. A facility listed more than once
+    (under several cities or kinds) exports under the id of its first listing, so one
+    facility always has one id.
+    """
+    with open(json_path, 'r') as f:
+        facilities = json.load(f)
+    ids = {}
+    facility_id = 0
+    for state_data in facilities.values():
+        for city_data in state_data.values():
+            for kind in FACILITY_KINDS:
+                for facility in city_data.get(kind, []):
+                    facility_id += 1
+                    ids.setdefault((facility.get('name'), facility.get('address'), facility.get('phone')), facility_id)
+    return ids
+
+
+def export_vocabularies(state_city_path: str = STATE_CITY_PATH) -> Dict[str, List[str]]:
+    """Fixed dictionary of every string column, so all batches share one dictionary"""
+    with open(state_city_path, 'r') as f:
+        state_cities = json.load(f)
+    return {
+        'state': list(state_cities),
+        'city': sorted({city for cities in state_cities.values() for city in cities}),
+        'course': list(COURSE_OPTIONS),
+        'emotion': list(EMOTION_OPTIONS),
+        'trigger': list(TRIGGER_OPTIONS),
+        'level': list(STRESS_LEVELS),
+    }
+
+
+def _index_type(pa, typecode: str):
+    return {'b': pa.int8(), 'h': pa.int16()}[typecode]
+
+
+def results_schema():
+    pa = _require_pyarrow()
+
+    def categorical(typecode):
+        return pa.dictionary(_index_type(pa, typecode), pa.string())
+
+    return pa.schema(
+        [('assessment_id', pa.int64()), ('recorded_at', pa.timestamp('us', tz='UTC'))]
+        + [(name, categorical(typecode)) for name, (_, typecode) in DICTIONARY_COLUMNS.items()]
+        + [('triggers', pa.list_(categorical(TRIGGER_TYPECODE)))]
+        + [(name, pa.float64()) for name in SCORE_COLUMNS]
+        + [('trauma_detected', pa.bool_()), ('facility_ids', pa.list_(pa.int32())), ('facility_fallback', pa.bool_())]
+    )
+
+
+class ResultsExporter:
+    """Buffers results as typed column arrays and writes one record batch per `batch_rows` results
+
+    Memory is bounded by the batch size however many results are written. The file is
+    written uncompressed by default, which is what lets readers memory-map it without
+    copying; compression ('lz4' or 'zstd') trades that for size.
+    """
+
+    def __init__(self, path: str, batch_rows: int = BATCH_ROWS, compression: str = None,
+                 vocabularies: Dict[str, List[str]] = None, facility_index: Dict[tuple, int] = None):
+        pa = _require_pyarrow()
+        self._pa = pa
+        self.path = path
+        self.batch_rows = batch_rows
+        self.rows_written = 0
+        self.schema = results_schema()
+
+        vocabularies = vocabularies or export_vocabularies()
+        typecodes = dict(DICTIONARY_COLUMNS.values(), trigger=TRIGGER_TYPECODE)
+        for name, values in vocabularies.items():
+            if len(values) > 1 << (8 * array(typecodes[name]).itemsize - 1):
+                raise ValueError(f"{name} vocabulary has {len(values)} values, too many for its index type")
+        self._codes = {name: {value: code for code, value in enumerate(values)} for name, values in vocabularies.items()}
+        self._dictionaries = {name: pa.array(values, type=pa.string()) for name, values in vocabularies.items()}
+        self._facility_index = facility_ids() if facility_index is None else facility_index
+        self._next_id = 0
+
+        # Write to a temporary file and rename on close, so readers never see a partial export
+        self._partial = path + '.partial'
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        self._writer = pa.ipc.new_file(self._partial, self.schema, options=options)
+        self._reset()
+
+    def _reset(self):
+        self._columns = {'assessment_id': array('q'), 'recorded_at': array('q')}
+        self._columns.update({name: array(typecode) for name, (_, typecode) in DICTIONARY_COLUMNS.items()})
+        self._columns.update({name: array('d') for name in SCORE_COLUMNS})
+        self._columns.update({
+            'triggers': array(TRIGGER_TYPECODE), 'trigger_offsets': array('i', [0]),
+            'trauma_detected': array('b'), 'facility_fallback': array('b'),
+            'facility_ids': array('i'), 'facility_offsets': array('i', [0]),
+        })
+        self._buffered = 0
+
+    def _code(self, vocabulary: str, value: str) -> int:
+        try:
+            return self._codes[vocabulary][value]
+        except KeyError:
+            raise ValueError(f"{vocabulary} value {value!r} is not in the export vocabulary")
+
+    def _facility_id(self, facility: Dict) -> int:
+        key = (facility.get('name'), facility.get('address'), facility.get('phone'))
+        if key not in self._facility_index:
+            raise ValueError(f"Facility {facility.get('name')!r} is not in the facility directory")
+        return self._facility_index[key]
+
+    def write(self, results: Dict, course: str, state: str, city: str,
+              recorded_at: datetime.datetime = None, assessment_id: int = None):
+        """Append one generate_comprehensive_recommendations result"""
+        columns = self._columns
+        analysis = results['emotional_analysis']
+        summary = analysis['analysis_summary']
+
+        if assessment_id is None:
+            assessment_id = self._next_id
+        self._next_id = assessment_id + 1
+        timestamp = recorded_at.timestamp() if recorded_at is not None else time.time()
+
+        columns['assessment_id'].append(assessment_id)
+        columns['recorded_at'].append(int(round(timestamp * 1_000_000)))
+        columns['state'].append(self._code('state', state))
+        columns['city'].append(self._code('city', city))
+        columns['course'].append(self._code('course', course))
+        columns['emotion'].append(self._code('emotion', summary['primary_emotion']))
+        columns['ml_prediction'].append(self._code('level', results['original_ml_prediction']))
+        columns['stress_level'].append(self._code('level', results['enhanced_stress_level']))
+        triggers = columns['triggers']
+        for trigger in summary['trigger_events']:
+            triggers.append(self._code('trigger', trigger))
+        columns['trigger_offsets'].append(len(triggers))
+
+        columns['final_score'].append(results['stress_score_breakdown']['final_score'])
+        columns['emotion_score'].append(analysis['emotion_score'])
+        columns['trigger_score'].append(analysis['trigger_score'])
+        columns['sentiment_score'].append(analysis['sentiment_score'])
+        columns['trauma_detected'].append(bool(analysis['trauma_detected']))
+
+        facilities = results['location_based_facilities']
+        ids = columns['facility_ids']
+        for kind in FACILITY_KINDS:
+            for facility in facilities.get(kind, ()):
+                ids.append(self._facility_id(facility))
+        columns['facility_offsets'].append(len(ids))
+        columns['facility_fallback'].append('fallback_note' in facilities)
+
+        self._buffered += 1
+        if self._buffered >= self.batch_rows:
+            self.flush()
+
+    def _primitive(self, arrow_type, values: array):
+        """Arrow array over the buffered values without a per-element conversion"""
+        return self._pa.Array.from_buffers(arrow_type, len(values), [None, self._pa.py_buffer(values)])
+
+    def _dictionary(self, typecode: str, vocabulary: str, codes: array):
+        indices = self._primitive(_index_type(self._pa, typecode), codes)
+        return self._pa.DictionaryArray.from_arrays(indices, self._dictionaries[vocabulary])
+
+    def _list(self, offsets: array, values):
+        return self._pa.ListArray.from_arrays(self._primitive(self._pa.int32(), offsets), values)
+
+    def flush(self):
+        """Write the buffered results as one record batch"""
+        if not self._buffered:
+            return
+        pa = self._pa
+        columns = self._columns
+        arrays = [
+            self._primitive(pa.int64(), columns['assessment_id']),
+            self._primitive(self.schema.field('recorded_at').type, columns['recorded_at']),
+        ]
+        arrays += [
+            self._dictionary(typecode, vocabulary, columns[name])
+            for name, (vocabulary, typecode) in DICTIONARY_COLUMNS.items()
+        ]
+        arrays.append(self._list(columns['trigger_offsets'],
+                                 self._dictionary(TRIGGER_TYPECODE, 'trigger', columns['triggers'])))
+        arrays += [self._primitive(pa.float64(), columns[name]) for name in SCORE_COLUMNS]
+        # Arrow booleans are bit-packed, so flags are the one column that is converted
+        arrays.append(pa.array(np.frombuffer(columns['trauma_detected'], dtype=np.bool_)))
+        arrays.append(self._list(columns['facility_offsets'], self._primitive(pa.int32(), columns['facility_ids'])))
+        arrays.append(pa.array(np.frombuffer(columns['facility_fallback'], dtype=np.bool_)))
+
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.rows_written += self._buffered
+        self._reset()
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+        os.replace(self._partial, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._writer.close()
+            os.remove(self._partial)
+
+
+def open_results(path: str):
+    """Memory-mapped Arrow table of an export; column buffers point straight into the file"""
+    pa = _require_pyarrow()
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def copied_bytes(path: str) -> int:
+    """Bytes of an export's column buffers that open_results cannot leave in the memory mapping
+
+    0 for an uncompressed export; a compressed one is decompressed into process memory,
+    so all of it is copied.
+    """
+    pa = _require_pyarrow()
+    mapping = pa.memory_map(path, 'r')
+    whole = mapping.read_buffer(mapping.size())
+    low, high = whole.address, whole.address + whole.size
+    mapping.seek(0)
+    table = pa.ipc.open_file(mapping).read_all()
+
+    def outside(array) -> int:
+        total = sum(buffer.size for buffer in array.buffers()
+                    if buffer is not None and not low <= buffer.address < high)
+        if isinstance(array, pa.DictionaryArray):
+            total += outside(array.dictionary)
+        return total
+
+    return sum(outside(chunk) for column in table.columns for chunk in column.chunks)
+
+
+def results_frame(path: str, columns: List[str] = None):
+    """pandas view of an export; dictionary columns become Categoricals"""
+    table = open_results(path)
+    if columns:
+        table = table.select(columns)
+    return table.to_pandas()
+
+
+def export_synthetic(path: str, rows: int, seed: int = 0, batch_rows: int = BATCH_ROWS,
+                     compression: str = None) -> Dict:
+    """Score random app-range assessments with the engine and stream them into an export"""
+    from load_test import generate_assessment, load_locations
+    from recommendation_engine import PersonalizedRecommendationEngine
+
+    rng = random.Random(seed)
+    locations = load_locations()
+    engine = PersonalizedRecommendationEngine()
+    recorded_at = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    scoring_seconds = 0.0
+    start = time.perf_counter()
+    with ResultsExporter(path, batch_rows=batch_rows, compression=compression) as exporter:
+        for row in range(rows):
+            scoring_start = time.perf_counter()
+            assessment = generate_assessment(rng, locations)
+            results = score_assessment(engine, assessment)
+            scoring_seconds += time.perf_counter() - scoring_start
+            exporter.write(results, assessment['course'], assessment['state'], assessment['city'],
+                           recorded_at=recorded_at + datetime.timedelta(seconds=row))
+    export_seconds = time.perf_counter() - start - scoring_seconds
+    return {
+        'rows': exporter.rows_written,
+        'file_mb': round(os.path.getsize(path) / 1024 / 1024, 2),
+        'export_us_per_row': round(export_seconds * 1e6 / max(rows, 1), 2),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def inspect(path: str) -> Dict:
+    """Memory-map an export and summarize it"""
+    _require_pyarrow()
+    import pyarrow.compute as pc
+
+    start = time.perf_counter()
+    table = open_results(path)
+    open_ms = (time.perf_counter() - start) * 1000
+    levels = pc.value_counts(table['stress_level'].combine_chunks().dictionary_decode())
+    return {
+        'rows': table.num_rows,
+        'batches': table['assessment_id'].num_chunks,
+        'open_ms': round(open_ms, 2),
+        'copied_bytes': copied_bytes(path),
+        'levels': {item['values'].as_py(): item['counts'].as_py() for item in levels},
+        'schema': [f'{field.name}: {field.type}' for field in table.schema],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Arrow IPC export of recommendation results')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help='Score synthetic assessments and export the results')
+    export_parser.add_argument('output')
+    export_parser.add_argument('--rows', type=int, default=100000)
+    export_parser.add_argument('--seed', type=int, default=0)
+    export_parser.add_argument('--batch-rows', type=int, default=BATCH_ROWS)
+    export_parser.add_argument('--compression', choices=['lz4', 'zstd'],
+                               help='Smaller files, but readers can no longer memory-map without copying')
+    inspect_parser = subparsers.add_parser('inspect', help='Memory-map an export and summarize it')
+    inspect_parser.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        report = export_synthetic(args.output, args.rows, args.seed, args.batch_rows, args.compression)
+    else:
+        report = inspect(args.path)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
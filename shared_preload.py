@@ -0,0 +1,310 @@
+import argparse
+import gc
+import http.server
+import json
+import os
+import random
+import select
+import signal
+import socket
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from recommendation_engine import ENGINE_SCRIPT_DIR, PersonalizedRecommendationEngine, score_assessment
+from load_test import generate_assessment, load_locations
+from model_explanations import SCALED_MODELS
+
+# 🔑 Preload model and engine once in a parent process, then fork workers that share them
+MODEL_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'stress_prediction_models.pkl')
+MIN_SHARED_ARRAY_BYTES = 4096
+# Seconds a worker may take to warm up before it is counted as not ready
+READY_TIMEOUT = 300.0
+
+
+def _move_to_shared_memory(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    block = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[...] = array
+    return block, shared
+
+
+def share_model_arrays(model_package: Dict, min_bytes: int = MIN_SHARED_ARRAY_BYTES) -> List[Tuple]:
+    """Re-home large ndarray attributes of every model and the scaler into shared memory
+
+    Arrays in shared memory are never written by reference counting, so their pages
+    stay shared between forked workers. Tree internals are Cython objects whose
+    buffers are already separate allocations and are left as they are.
+    Returns (block, estimator, attribute) for every moved array.
+    """
+    moved = []
+    estimators = list(model_package['models'].values()) + [model_package['scaler']]
+    for estimator in estimators:
+        for name, value in list(vars(estimator).items()):
+            if isinstance(value, np.ndarray) and value.dtype != object and value.nbytes >= min_bytes:
+                block, shared = _move_to_shared_memory(value)
+                setattr(estimator, name, shared)
+                moved.append((block, estimator, name))
+    return moved
+
+
+def preload(model_path: str = MODEL_PATH, share_arrays: bool = True) -> Dict:
+    """Load and freeze everything workers need, before any fork"""
+    model_package = joblib.load(model_path)
+    shared_arrays = share_model_arrays(model_package) if share_arrays else []
+    engine = PersonalizedRecommendationEngine()
+
+    # Move every object loaded so far into the permanent generation so the
+    # cyclic GC in the children never writes to their headers
+    gc.collect()
+    gc.freeze()
+    return {'model_package': model_package, 'engine': engine, 'shared_arrays': shared_arrays}
+
+
+def release(state: Dict):
+    """Free the shared blocks; the models keep working on private copies of their arrays"""
+    for block, estimator, name in state.get('shared_arrays', []):
+        # A block cannot close while an array still exports its buffer
+        setattr(estimator, name, np.array(getattr(estimator, name)))
+        block.close()
+        block.unlink()
+    state['shared_arrays'] = []
+
+
+def fork_workers(target, workers: int, *args) -> List[Tuple[int, int]]:
+    """Fork `workers` children that run target(index, *args, ready_fd) and exit
+
+    Each child gets its own ready pipe and holds no other pipe's write end, so a
+    child that dies before signalling shows up as EOF on its pipe. Returns
+    (pid, read_fd) pairs.
+    """
+    children = []
+    for index in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                os.close(read_fd)
+                for _, sibling_fd in children:
+                    os.close(sibling_fd)
+                target(index, *args, write_fd)
+            except Exception:
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+    return children
+
+
+def wait_ready(children: List[Tuple[int, int]], timeout: float = READY_TIMEOUT) -> List[int]:
+    """Pids that signalled ready within the timeout; closes every ready pipe"""
+    pending = {read_fd: pid for pid, read_fd in children}
+    ready = []
+    deadline = time.monotonic() + timeout
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        readable, _, _ = select.select(list(pending), [], [], remaining)
+        for read_fd in readable:
+            if os.read(read_fd, 1):
+                ready.append(pending[read_fd])
+            # Signalled or crashed (EOF): either way this pipe is done
+            os.close(read_fd)
+            del pending[read_fd]
+    for read_fd in pending:
+        os.close(read_fd)
+    return ready
+
+
+def read_pss_kb(pid: int) -> int:
+    """Proportional set size of a process from /proc/<pid>/smaps_rollup"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def predict_features(model_package: Dict, rows: List[List[float]]) -> List[List[float]]:
+    """Class probabilities of the packaged best model for raw rows in feature_columns order"""
+    X = pd.DataFrame(np.asarray(rows, dtype=float).reshape(-1, len(model_package['feature_columns'])),
+                     columns=model_package['feature_columns'])
+    if model_package['best_model'] in SCALED_MODELS:
+        X = model_package['scaler'].transform(X)
+    return model_package['models'][model_package['best_model']].predict_proba(X).tolist()
+
+
+def _serve_requests(index: int, state: Dict, requests: int, ready_fd: int):
+    """Worker body: score requests against the inherited engine, then wait to be measured"""
+    rng = random.Random(index)
+    locations = load_locations()
+    engine = state['engine']
+    model_package = state['model_package']
+
+    for _ in range(requests):
+        score_assessment(engine, generate_assessment(rng, locations))
+    predict_features(model_package, [[0.0] * len(model_package['feature_columns'])])
+
+    os.write(ready_fd, b'.')
+    os.close(ready_fd)
+    signal.pause()
+
+
+def measure_pss(worker_counts: List[int], requests: int = 200, model_path: str = MODEL_PATH, share_arrays: bool = True) -> Dict:
+    """Mean PSS per worker for each worker count, with a single preloaded parent"""
+    state = preload(model_path, share_arrays)
+    report = {'parent_pss_kb': read_pss_kb(os.getpid()), 'runs': []}
+    try:
+        for workers in worker_counts:
+            children = fork_workers(_serve_requests, workers, state, requests)
+            ready = wait_ready(children)
+
+            # Only workers that finished warming up are measured
+            pss = [kb for kb in (read_pss_kb(pid) for pid in ready) if kb is not None] or [0]
+            failed = {}
+            for pid, _ in children:
+                # Also stops workers that never became ready; ones that already exited are unaffected
+                os.kill(pid, signal.SIGTERM)
+                _, status = os.waitpid(pid, 0)
+                exit_code = os.waitstatus_to_exitcode(status)
+                # Ready workers are expected to die of our SIGTERM; anything else is a failure
+                if pid not in ready or exit_code != -signal.SIGTERM:
+                    failed[pid] = exit_code
+
+            report['runs'].append({
+                'workers': workers,
+                'ready_workers': len(ready),
+                'failed_workers': failed,
+                'mean_worker_pss_kb': round(sum(pss) / len(pss), 1),
+                'total_worker_pss_kb': sum(pss)
+            })
+    finally:
+        release(state)
+    return report
+
+
+class _ScoringHandler(http.server.BaseHTTPRequestHandler):
+    """POST /assess scores an assessment form with the engine; POST /predict runs the packaged model"""
+
+    # Set in each worker to the state it inherited from the preloading parent
+    state = None
+
+    def do_POST(self):
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            if self.path == '/assess':
+                payload = score_assessment(self.state['engine'], body)
+            elif self.path == '/predict':
+                model_package = self.state['model_package']
+                payload = {
+                    'class_names': model_package['class_names'],
+                    'probabilities': predict_features(model_package, body['features'])
+                }
+            else:
+                self.send_error(404)
+                return
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_error(400, f'{type(e).__name__}: {e}')
+            return
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve_http(index: int, state: Dict, listener: socket.socket, ready_fd: int):
+    """Worker body: accept connections on the listening socket shared by every worker"""
+    _ScoringHandler.state = state
+    server = http.server.HTTPServer(listener.getsockname()[:2], _ScoringHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = listener
+    os.write(ready_fd, b'.')
+    os.close(ready_fd)
+    server.serve_forever()
+
+
+def start_server(state: Dict, workers: int, host: str = '127.0.0.1', port: int = 8600) -> Tuple[socket.socket, List[int]]:
+    """Bind once, then fork workers that serve from the preloaded state; returns the socket and ready pids"""
+    listener = socket.create_server((host, port), backlog=128)
+    children = fork_workers(_serve_http, workers, state, listener)
+    ready = wait_ready(children)
+    if len(ready) < len(children):
+        stop_server(listener, [pid for pid, _ in children])
+        raise RuntimeError(f'Only {len(ready)} of {workers} scoring workers started')
+    return listener, ready
+
+
+def stop_server(listener: socket.socket, pids: List[int]):
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+        except (ChildProcessError, ProcessLookupError):
+            pass
+    listener.close()
+
+
+def serve(workers: int, host: str, port: int, model_path: str = MODEL_PATH, share_arrays: bool = True):
+    """Run the pre-forked scoring server until interrupted"""
+    state = preload(model_path, share_arrays)
+    listener, pids = start_server(state, workers, host, port)
+    print(json.dumps({
+        'url': f'http://{host}:{listener.getsockname()[1]}',
+        'workers': pids,
+        'parent_pss_kb': read_pss_kb(os.getpid()),
+        'worker_pss_kb': {pid: read_pss_kb(pid) for pid in pids}
+    }, indent=2), flush=True)
+    try:
+        # Returns when a worker exits; the server does not restart workers
+        pid, status = os.wait()
+        print(f'Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; stopping', flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_server(listener, pids)
+        release(state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Preload-then-fork workers sharing one model copy')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--no-shared-arrays', action='store_true', help='Rely on fork copy-on-write alone')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    measure_parser = subparsers.add_parser('measure', help='Measure worker PSS for several worker counts')
+    measure_parser.add_argument('--workers', default='1,2,4,8', help='Comma-separated worker counts to measure')
+    measure_parser.add_argument('--requests', type=int, default=200, help='Requests each worker serves before measuring')
+    serve_parser = subparsers.add_parser('serve', help='Serve POST /assess and /predict from pre-forked workers')
+    serve_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8600)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.workers, args.host, args.port, args.model, not args.no_shared_arrays)
+        return
+
+    started = time.perf_counter()
+    report = measure_pss(
+        [int(count) for count in args.workers.split(',')], args.requests, args.model, not args.no_shared_arrays
+    )
+    report['elapsed_seconds'] = round(time.perf_counter() - started, 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
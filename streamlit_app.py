@@ -5,31 +5,54 @@ import joblib
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 import datetime
 import json
-import base64
 import os
-from recommendation_engine import PersonalizedRecommendationEngine
+from recommendation_engine import (
+    PersonalizedRecommendationEngine, IncrementalContextAnalyzer, predict_stress_level, run_assessment,
+    COURSE_OPTIONS, EMOTION_OPTIONS, TRIGGER_OPTIONS, EMERGENCY_NUMBERS
+)
+from facility_store import SQLiteFacilityProvider
+from cohort_rollups import store_from_environment
+from drift_monitor import DriftMonitor, load_reference_profile, serving_features
+from crisis_alerts import pipeline_from_environment
+import uuid
 
 # 🔑 FIX: Define the SCRIPT_DIR once for robust file loading
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # --- START OF VIDEO BACKGROUND FIX ---
 
-def get_base64_of_video(file_path):
-    try:
-        full_path = os.path.join(SCRIPT_DIR, file_path)
-        with open(full_path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
-    except FileNotFoundError:
-        st.error(f"Error: Video file not found at {file_path}")
-        return None
+# Media is served by Streamlit's static file server (see .streamlit/config.toml)
+# instead of being inlined as base64 on every render
+STATIC_FOLDER = "static"
+STATIC_URL_PREFIX = "app/static"
+
+def get_static_asset_url(file_name, variants=()):
+    """Return the URL of the first existing variant of a static asset, or None"""
+    stem, _ = os.path.splitext(file_name)
+    for candidate in [f"{stem}{ext}" for ext in variants] + [file_name]:
+        if os.path.exists(os.path.join(SCRIPT_DIR, STATIC_FOLDER, candidate)):
+            return f"{STATIC_URL_PREFIX}/{candidate}"
+    return None
 
-VIDEO_FOLDER = "video"
 VIDEO_FILENAME = "background.mp4"  # change if different
-VIDEO_PATH = os.path.join(VIDEO_FOLDER, VIDEO_FILENAME)
+POSTER_FILENAME = "hi7.png"
+
+video_url = get_static_asset_url(VIDEO_FILENAME)
+# AVIF/WebP posters are produced by build_media.py; fall back to the PNG
+poster_url = get_static_asset_url(POSTER_FILENAME, variants=(".webp",))
 
-base64_video = get_base64_of_video(VIDEO_PATH)
+if video_url is not None:
+    poster_attribute = f'poster="{poster_url}"' if poster_url else ''
+    background_element = f"""<video id="bg-video" autoplay loop muted playsinline preload="none" {poster_attribute}>
+            <source src="{video_url}" type="video/mp4">
+        </video>"""
+elif poster_url is not None:
+    # The video is not shipped with the repo (see README); show the poster as a still background
+    background_element = f'<img id="bg-video" src="{poster_url}" alt="">'
+else:
+    background_element = None
 
-if base64_video:
+if background_element:
     st.markdown(
         f"""
         <style>
@@ -58,9 +81,7 @@ if base64_video:
         }}
         </style>
 
-        <video id="bg-video" autoplay loop muted playsinline>
-            <source src="data:video/mp4;base64,{base64_video}" type="video/mp4">
-        </video>
+        {background_element}
 
         <div class="video-overlay"></div>
         """,
@@ -98,12 +119,36 @@ def load_location_data():
 def initialize_recommendation_engine():
     """Initialize the recommendation engine"""
     try:
-        instance = PersonalizedRecommendationEngine()
+        # Use the SQLite facility directory when one is configured
+        facility_db_path = os.environ.get('FACILITY_DB_PATH')
+        location_provider = SQLiteFacilityProvider(facility_db_path) if facility_db_path else None
+        instance = PersonalizedRecommendationEngine(location_provider)
         return instance
     except Exception as e:
         st.error(f'Could not initialize recommendation engine: {e}')
         return None
 
+# Wrapping the shared helper makes the app and the counsellor dashboard use one cached store
+load_cohort_store = st.cache_resource(store_from_environment)
+
+@st.cache_resource
+def load_drift_monitor():
+    """Input drift monitor against the reference profile saved with the model"""
+    try:
+        return DriftMonitor(load_reference_profile(load_model()))
+    except Exception as e:
+        st.warning(f'Drift monitoring is unavailable: {e}')
+        return None
+
+@st.cache_resource
+def load_crisis_alerts():
+    """Crisis alert pipeline shared by every session"""
+    try:
+        return pipeline_from_environment()
+    except Exception as e:
+        st.warning(f'Crisis alerts are unavailable: {e}')
+        return None
+
 def get_psychological_risks_and_actions(stress_level):
     """Get psychological risks and recommended actions based on stress level"""
     
@@ -190,46 +235,6 @@ def get_psychological_risks_and_actions(stress_level):
     
     return guidance.get(stress_level, guidance['Good'])
 
-def predict_stress_level(mark10th, mark12th, collegemark, carrer_willing, smtime, financial):
-    """Simple rule-based prediction"""
-    
-    academic_avg = (mark10th + mark12th + collegemark) / 3
-    risk_score = 0
-    
-    # Academic factors
-    if academic_avg < 50:
-        risk_score += 3
-    elif academic_avg < 70:
-        risk_score += 1
-    
-    # Career factors
-    if carrer_willing < 30:
-        risk_score += 2
-    elif carrer_willing < 60:
-        risk_score += 1
-    
-    # Social media
-    if smtime > 8:
-        risk_score += 2
-    elif smtime > 5:
-        risk_score += 1
-    
-    # Financial
-    if financial == 'Awful':
-        risk_score += 2
-    elif financial == 'Bad':
-        risk_score += 1
-    
-    # Map to stress level
-    if risk_score >= 6:
-        return 'Awful', [0.1, 0.1, 0.2, 0.6]
-    elif risk_score >= 4:
-        return 'Bad', [0.1, 0.2, 0.6, 0.1]
-    elif risk_score >= 2:
-        return 'Good', [0.2, 0.6, 0.1, 0.1]
-    else:
-        return 'Fabulous', [0.6, 0.3, 0.1, 0.0]
-
 # App title
 st.title('🎓 Enhanced Student Stress Level Predictor')
 st.markdown('### AI-Powered Mental Health Assessment with Personalized Recommendations')
@@ -247,10 +252,7 @@ with col1:
     
     # Professional Course Selection
     st.subheader('🎯 Professional Course')
-    course_options = [
-        'Engineering', 'Medical', 'Law', 'Commerce', 'Arts/Humanities',
-        'Science', 'MBA', 'Computer Science'
-    ]
+    course_options = COURSE_OPTIONS
     professional_course = st.selectbox('Select your professional course:', course_options)
     
     st.subheader('👤 Personal Information')
@@ -269,20 +271,11 @@ with col2:
     financial = st.selectbox('Financial Status', ['Awful', 'Bad', 'Good', 'Fabulous'])
 with col3:
     st.subheader('😊 Current Emotional State')
-    emotion_options = [
-        'Very Happy', 'Happy', 'Content', 'Neutral', 'Slightly Stressed',
-        'Stressed', 'Very Stressed', 'Anxious', 'Depressed', 'Overwhelmed',
-        'Panicked', 'Hopeless'
-    ]
+    emotion_options = EMOTION_OPTIONS
     current_emotion = st.selectbox('How are you feeling right now?', emotion_options, index=3)
     
     st.subheader('⚡ Trigger Events')
-    trigger_options = [
-        'Academic pressure', 'Parent scolding/disappointment', 'Relationship issues/breakup',
-        'Financial problems', 'Family conflicts', 'Health issues', 'Career uncertainty',
-        'Social isolation', 'Exam failure', 'Peer pressure', 'Loss of loved one',
-        'Trauma/abuse', 'None/No specific trigger'
-    ]
+    trigger_options = TRIGGER_OPTIONS
     trigger_events = st.multiselect(
         'What events might have contributed to your current emotional state?',
         trigger_options,
@@ -295,6 +288,17 @@ with col3:
         placeholder='Optional: Share any additional details about your current emotional state, recent events, or concerns...',
         height=100
     )
+    # Live feedback: the per-session analyzer only re-scans the part of the text that changed
+    if 'context_analyzer' not in st.session_state:
+        st.session_state.context_analyzer = IncrementalContextAnalyzer(
+            recommendation_engine.emotional_analyzer if recommendation_engine else None
+        )
+    trauma_in_context, context_sentiment = st.session_state.context_analyzer.set_text(context_description)
+    if context_description.strip():
+        sentiment_label = 'negative' if context_sentiment > 0.6 else 'neutral' if context_sentiment > 0.4 else 'positive'
+        st.caption(f'Tone of your description so far: {sentiment_label}')
+        if trauma_in_context:
+            st.caption('💙 Thank you for sharing this. Your recommendations will include specialised support.')
 # Location Section
 st.subheader('📍 Your Location (for local mental health resources)')
 loc_col1, loc_col2 = st.columns(2)
@@ -306,6 +310,14 @@ with loc_col2:
     selected_city = st.selectbox('Select your city:', cities)
 # Predict button
 if st.button('🔮 Predict Stress Level & Get Recommendations', type='primary'):
+    # Feed the drift monitor (only binned counts are kept, never the inputs themselves)
+    drift_monitor = load_drift_monitor()
+    if drift_monitor is not None:
+        drift_monitor.observe(serving_features(
+            mark10th, mark12th, collegemark, smtime, carrer_willing,
+            financial, current_emotion, trigger_events
+        ))
+    
     if recommendation_engine is None:
         st.error('Recommendation engine not available. Using basic prediction.')
         # Fallback to original prediction method
@@ -324,34 +336,44 @@ if st.button('🔮 Predict Stress Level & Get Recommendations', type='primary'):
     else:
         # Use enhanced prediction system
         with st.spinner('🔄 Analyzing your profile and generating personalized recommendations...'):
-            # Get basic ML prediction first
-            predicted_level, probabilities = predict_stress_level(
-                mark10th, mark12th, collegemark, carrer_willing, smtime, financial
+            # ML prediction, user profile and comprehensive recommendations (shared with bulk reports)
+            predicted_level, probabilities, user_profile, comprehensive_results = run_assessment(
+                recommendation_engine, {
+                    'mark10th': mark10th, 'mark12th': mark12th, 'collegemark': collegemark,
+                    'studytime': studytime, 'smtime': smtime, 'carrer_willing': carrer_willing,
+                    'financial': financial, 'gender': gender, 'travel': travel,
+                    'course': professional_course, 'emotion': current_emotion, 'triggers': trigger_events,
+                    'context': context_description, 'state': selected_state, 'city': selected_city
+                }
             )
             
-            # Create user profile
-            user_profile = {
-                'academic_performance': (mark10th + mark12th + collegemark) / 3,
-                'study_time': studytime,
-                'social_media_time': smtime,
-                'career_willingness': carrer_willing,
-                'financial_status': financial,
-                'gender': gender,
-                'travel_time': travel
-            }
+            # Update the counsellor dashboard rollups
+            try:
+                load_cohort_store().record(
+                    comprehensive_results, selected_state, selected_city,
+                    professional_course, current_emotion
+                )
+            except Exception as e:
+                st.warning(f'Could not update cohort rollups: {e}')
             
-            # Generate comprehensive recommendations
-            comprehensive_results = recommendation_engine.generate_comprehensive_recommendations(
-                ml_prediction=predicted_level,
-                ml_probabilities=probabilities,
-                course=professional_course,
-                emotion=current_emotion,
-                trigger_events=trigger_events,
-                context_text=context_description,
-                state=selected_state,
-                city=selected_city,
-                user_profile=user_profile
-            )
+            # Flag crisis results to the counselling team without delaying this page
+            crisis_alerts = load_crisis_alerts()
+            if crisis_alerts is not None:
+                # Pseudonymous per-session key, used to deduplicate repeated submissions
+                if 'student_key' not in st.session_state:
+                    st.session_state['student_key'] = uuid.uuid4().hex
+                alert_status = crisis_alerts.submit(
+                    comprehensive_results, st.session_state['student_key'],
+                    selected_state, selected_city, professional_course
+                )
+                if alert_status in ('queued', 'duplicate'):
+                    # Alerts carry only an anonymous session key, so nobody can reach out from them
+                    helplines = ' | '.join(f"{entry['name']}: {entry['number']}" for entry in EMERGENCY_NUMBERS[:3])
+                    st.info(
+                        '🔔 An anonymous alert about this result has been shared with the counselling team to help '
+                        'them plan support. It does not include your name or contact details, so they cannot '
+                        f'reach out to you. Please contact a helpline or your campus counsellor now: {helplines}'
+                    )
             
             # Display enhanced results
             st.success('✅ Enhanced Analysis Completed!')
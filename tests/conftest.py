@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the flat top-level modules of the project
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
@@ -0,0 +1,63 @@
+import json
+import os
+from collections import Counter
+
+import pytest
+
+pytest.importorskip('jinja2')
+
+from bulk_reports import _file_name, render_reports, synthetic_assessments
+
+
+@pytest.fixture(scope='module')
+def cohort():
+    assessments = list(synthetic_assessments(12, seed=3))
+    for index, assessment in enumerate(assessments):
+        assessment['student_id'] = f'S{index:03d}'
+    return assessments
+
+
+def _manifest(output_dir):
+    with open(os.path.join(output_dir, 'manifest.jsonl')) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_renders_students_manifest_and_department_totals(tmp_path, cohort, workers):
+    output_dir = str(tmp_path)
+    report = render_reports(cohort, output_dir, workers=workers, task_size=5)
+    courses = Counter(assessment['course'] for assessment in cohort)
+    assert report['students'] == len(cohort)
+    assert report['departments'] == len(courses)
+    assert report['duplicate_student_ids'] == {}
+
+    manifest = _manifest(output_dir)
+    assert sorted(row['student_id'] for row in manifest) == [a['student_id'] for a in cohort]
+    assert Counter(row['course'] for row in manifest) == courses
+    for row in manifest:
+        assert row['path'] == os.path.join('students', row['student_id'] + '.html')
+        with open(os.path.join(output_dir, row['path']), encoding='utf-8') as f:
+            html = f.read()
+        assert row['student_id'] in html and row['level'] in html
+
+    for course, students in courses.items():
+        path = os.path.join(output_dir, 'departments', _file_name(course) + '.html')
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        assert f'{students} students assessed' in html
+        levels = Counter(row['level'] for row in manifest if row['course'] == course)
+        for level, count in levels.items():
+            assert f'{level}</span></td><td>{count}</td>' in html
+
+
+def test_duplicate_student_ids_are_reported_not_overwritten(tmp_path, cohort):
+    output_dir = str(tmp_path)
+    repeat = dict(cohort[1], course='Repeated Course')
+    report = render_reports(cohort[:3] + [repeat, repeat], output_dir, workers=1)
+    assert report['students'] == 3
+    assert report['duplicate_student_ids'] == {'S001': 2}
+
+    manifest = _manifest(output_dir)
+    assert [row['student_id'] for row in manifest] == ['S000', 'S001', 'S002']
+    assert 'Repeated Course' not in {row['course'] for row in manifest}
+    assert not os.path.exists(os.path.join(output_dir, 'departments', _file_name('Repeated Course') + '.html'))
@@ -0,0 +1,146 @@
+import datetime
+import itertools
+import os
+import random
+
+import pytest
+
+from cohort_rollups import DIMENSIONS, CohortRollupStore, iso_week, suppress_small_cells
+
+PAGE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pages', '1_Counsellor_Dashboard.py')
+GROUPS = ['course', 'state', 'city', 'emotion', 'iso_week']
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+
+def _results(level, score=0.5):
+    return {'enhanced_stress_level': level, 'stress_score_breakdown': {'final_score': score}}
+
+
+def _record(store, count, state='Kerala', city='Kochi', course='B.Tech', emotion='Anxious',
+            level='Bad', recorded_at=datetime.datetime(2024, 3, 6, tzinfo=datetime.timezone.utc)):
+    for _ in range(count):
+        store.record(_results(level), state, city, course, emotion, recorded_at)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CohortRollupStore(str(tmp_path / 'rollups.db'))
+
+
+@pytest.fixture
+def random_store(tmp_path):
+    store = CohortRollupStore(str(tmp_path / 'random.db'))
+    rng = random.Random(5)
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    for _ in range(600):
+        _record(store, 1, *rng.choice([('Kerala', 'Kochi'), ('Kerala', 'Kollam'), ('Goa', 'Panaji')]),
+                course=rng.choice(['B.Tech', 'BCA', 'MBA', 'B.Com']),
+                emotion=rng.choice(['Anxious', 'Calm', 'Overwhelmed']),
+                level=rng.choice(['Fabulous', 'Good', 'Bad', 'Awful']),
+                recorded_at=start + datetime.timedelta(days=rng.randrange(28)))
+    return store
+
+
+def test_iso_week_buckets_by_utc():
+    # Monday 02:00 in India is still Sunday of the previous ISO week in UTC
+    assert iso_week(datetime.datetime(2024, 1, 1, 2, 0, tzinfo=IST)) == '2023-W52'
+    assert iso_week(datetime.datetime(2024, 1, 1, 6, 0, tzinfo=IST)) == '2024-W01'
+    assert iso_week() == iso_week(datetime.datetime.now(datetime.timezone.utc))
+
+
+def test_small_groups_are_withheld(store):
+    _record(store, 6, course='B.Tech')
+    _record(store, 7, course='MBA')
+    _record(store, 2, course='BCA')
+    rows, hidden = store.release(['course'])
+    # BCA is under the limit, and B.Tech goes with it so the overall total does not give BCA away
+    assert [row['course'] for row in rows] == ['MBA']
+    assert hidden == 2
+
+
+def test_hidden_rows_cannot_be_recovered_from_coarser_totals(random_store):
+    for size in range(1, len(GROUPS) + 1):
+        for group_by in itertools.combinations(GROUPS, size):
+            group_by = sorted(group_by, key=DIMENSIONS.index)
+            rows = random_store.query(group_by)
+            released, _ = random_store.release(group_by)
+            assert all(row['total'] >= 5 for row in released)
+            kept = {tuple(row[d] for d in group_by) for row in released}
+            for parent_size in range(len(group_by)):
+                for parent in itertools.combinations(group_by, parent_size):
+                    hidden_totals = {}
+                    for row in rows:
+                        if tuple(row[d] for d in group_by) not in kept:
+                            key = tuple(row[d] for d in parent)
+                            hidden_totals[key] = hidden_totals.get(key, 0) + row['total']
+                    parent_totals = {}
+                    for row in rows:
+                        key = tuple(row[d] for d in parent)
+                        parent_totals[key] = parent_totals.get(key, 0) + row['total']
+                    for key, hidden_total in hidden_totals.items():
+                        # Either the hidden rows add up past the limit or the coarser total is itself withheld
+                        assert hidden_total >= 5 or parent_totals[key] < 5
+
+
+def test_filters_pick_rows_without_changing_them(random_store):
+    everything, _ = random_store.release(['state', 'course'])
+    filtered, hidden = random_store.release(['course', 'state'], {'state': ['Kerala'], 'course': ['BCA', 'MBA']})
+    assert filtered == [row for row in everything if row['state'] == 'Kerala' and row['course'] in ('BCA', 'MBA')]
+    assert filtered and hidden >= 0
+    with pytest.raises(ValueError, match='requires grouping'):
+        random_store.release(['course'], {'state': ['Kerala']})
+    with pytest.raises(ValueError, match='Unknown dimension'):
+        random_store.release(['course'], {'college': ['X']})
+
+
+def test_suppress_small_cells_leaves_no_lone_hidden_row():
+    rows = [{'course': 'A', 'total': 4}, {'course': 'B', 'total': 9}, {'course': 'C', 'total': 12}]
+    assert suppress_small_cells(rows, ['course']) == ([rows[2]], 2)
+    assert suppress_small_cells(rows[1:], ['course']) == (rows[1:], 0)
+    assert suppress_small_cells([{'total': 4}], []) == ([], 1)
+
+
+@pytest.fixture
+def dashboard(tmp_path, monkeypatch):
+    streamlit = pytest.importorskip('streamlit')
+    from streamlit.testing.v1 import AppTest
+
+    db_path = str(tmp_path / 'rollups.db')
+    store = CohortRollupStore(db_path)
+    _record(store, 6, course='B.Tech')
+    _record(store, 7, course='MBA')
+    _record(store, 2, course='BCA')
+    monkeypatch.setenv('COHORT_DB_PATH', db_path)
+    streamlit.cache_resource.clear()
+    yield lambda: AppTest.from_file(PAGE_PATH, default_timeout=30)
+    streamlit.cache_resource.clear()
+
+
+def test_dashboard_is_disabled_without_a_password(dashboard, monkeypatch):
+    monkeypatch.delenv('COUNSELLOR_PASSWORD', raising=False)
+    at = dashboard().run()
+    assert 'disabled' in at.error[0].value
+    assert not at.metric and not at.text_input
+
+
+def test_dashboard_requires_the_password(dashboard, monkeypatch):
+    monkeypatch.setenv('COUNSELLOR_PASSWORD', 's3cret')
+    at = dashboard().run()
+    assert not at.metric
+
+    at.text_input[0].input('wrong')
+    at.button[0].click().run()
+    assert at.error[0].value == 'Incorrect password'
+    assert not at.metric
+
+    at.text_input[0].input('s3cret')
+    at.button[0].click().run()
+    assert not at.exception
+    assert at.metric[0].value == '7'
+    assert at.dataframe[0].value['course'].tolist() == ['MBA']
+
+    # A state filter groups by state too; a single week is a row of the per-week table
+    at.multiselect[0].select('Kerala')
+    at.selectbox[0].select('2024-W10').run()
+    assert not at.exception
+    assert at.dataframe[0].value[['course', 'state', 'iso_week']].values.tolist() == [['MBA', 'Kerala', '2024-W10']]
@@ -0,0 +1,165 @@
+import threading
+from collections import Counter
+
+import pytest
+
+from crisis_alerts import CrisisAlertPipeline
+
+CRISIS_RESULT = {
+    'enhanced_stress_level': 'Awful',
+    'emotional_analysis': {'trauma_detected': False},
+    'stress_score_breakdown': {'final_score': 0.9},
+}
+
+
+class RecordingSink:
+    name = 'recording'
+
+    def __init__(self):
+        self.alerts = []
+
+    def deliver(self, alert):
+        self.alerts.append(alert)
+
+    def close(self):
+        pass
+
+
+class FailingSink(RecordingSink):
+    """Fails the first `failures` deliveries of every alert (forever by default)"""
+
+    name = 'failing'
+
+    def __init__(self, failures: int = None):
+        super().__init__()
+        self.failures = failures
+        self.attempts = {}
+
+    def deliver(self, alert):
+        attempts = self.attempts[alert['alert_id']] = self.attempts.get(alert['alert_id'], 0) + 1
+        if self.failures is None or attempts <= self.failures:
+            raise ConnectionError('downstream unavailable')
+        super().deliver(alert)
+
+
+class BlockingSink(RecordingSink):
+    name = 'blocking'
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def deliver(self, alert):
+        self.release.wait(10)
+        super().deliver(alert)
+
+
+def _pipeline(sinks, **kwargs):
+    kwargs.setdefault('retries', 2)
+    kwargs.setdefault('retry_backoff', 0.001)
+    kwargs.setdefault('poll_interval', 0.005)
+    return CrisisAlertPipeline(sinks, **kwargs)
+
+
+def _submit(pipeline, alerts):
+    for index in range(alerts):
+        assert pipeline.submit(CRISIS_RESULT, f'student-{index}') == 'queued'
+
+
+def test_every_sink_accepting_counts_as_delivered():
+    sinks = [RecordingSink(), RecordingSink()]
+    pipeline = _pipeline(sinks)
+    _submit(pipeline, 5)
+    assert pipeline.drain(5)
+    report = pipeline.slo_report()
+    pipeline.close()
+
+    assert report['counters']['delivered'] == 5
+    assert report['dead_lettered'] == 0
+    assert all(len(sink.alerts) == 5 for sink in sinks)
+
+
+def test_failing_sink_dead_letters_instead_of_delivering():
+    recording, failing = RecordingSink(), FailingSink()
+    pipeline = _pipeline([recording, failing])
+    _submit(pipeline, 4)
+    assert pipeline.drain(5)
+    report = pipeline.slo_report()
+    pipeline.close()
+
+    assert report['counters']['delivered'] == 0
+    assert report['dead_lettered'] == 4
+    # The first attempt plus every retry failed
+    assert report['counters']['sink_failures'] == 4 * (1 + pipeline.retries)
+    assert len(pipeline.dead_letters) == 4
+    assert pipeline.dead_letters[0]['failed_sinks'][0]['sink'] == 'failing'
+    # The healthy sink still got every alert
+    assert len(recording.alerts) == 4
+
+
+def test_transient_failure_is_retried_and_delivered():
+    failing = FailingSink(failures=1)
+    pipeline = _pipeline([failing])
+    _submit(pipeline, 3)
+    assert pipeline.drain(5)
+    report = pipeline.slo_report()
+    pipeline.close()
+
+    assert report['counters']['delivered'] == 3
+    assert report['counters']['sink_failures'] == 3
+    assert report['dead_lettered'] == 0
+    assert len(failing.alerts) == 3
+
+
+def test_blocked_sink_does_not_hold_up_other_sinks():
+    recording, blocking = RecordingSink(), BlockingSink()
+    pipeline = _pipeline([recording, blocking])
+    _submit(pipeline, 3)
+    try:
+        for _ in range(1000):
+            if len(recording.alerts) == 3:
+                break
+            threading.Event().wait(0.005)
+        assert len(recording.alerts) == 3
+        # Nothing is delivered until the blocked sink has accepted it too
+        assert pipeline.slo_report()['counters']['delivered'] == 0
+    finally:
+        blocking.release.set()
+    assert pipeline.drain(5)
+    assert pipeline.slo_report()['counters']['delivered'] == 3
+    pipeline.close()
+
+
+@pytest.mark.parametrize('result, outcome', [
+    (dict(CRISIS_RESULT, enhanced_stress_level='Good'), 'not_crisis'),
+    (CRISIS_RESULT, 'duplicate'),
+])
+def test_non_crisis_and_duplicate_results_are_not_queued(result, outcome):
+    pipeline = _pipeline([RecordingSink()])
+    assert pipeline.submit(CRISIS_RESULT, 'student') == 'queued'
+    assert pipeline.submit(result, 'student') == outcome
+    pipeline.close()
+    assert pipeline.slo_report()['counters']['queued'] == 1
+
+
+class SlowSink(RecordingSink):
+    name = 'slow'
+
+    def deliver(self, alert):
+        threading.Event().wait(0.05)
+        super().deliver(alert)
+
+
+def test_slow_sink_backlog_is_bounded_and_overflow_drops():
+    slow = SlowSink()
+    pipeline = _pipeline([RecordingSink(), slow], max_queue=10, max_in_flight=5)
+    outcomes = Counter(pipeline.submit(CRISIS_RESULT, f'student-{index}') for index in range(200))
+    report = pipeline.slo_report()
+    assert report['in_flight'] <= 5
+    assert report['sink_backlog']['slow'] <= 5
+    assert report['queue_depth'] <= 10
+    # Overflow is dropped at submit instead of piling up behind the slow sink
+    assert outcomes['dropped'] >= 200 - 10 - 5 - 5
+    pipeline.close()
+    counters = pipeline.slo_report()['counters']
+    assert counters['delivered'] == outcomes['queued'] == len(slow.alerts)
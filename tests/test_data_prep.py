@@ -0,0 +1,87 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+import data_prep
+from data_prep import DATA_PATH, cache_path, fit_statistics, load_training_frame
+
+
+@pytest.fixture
+def survey(tmp_path):
+    path = tmp_path / 'survey.csv'
+    shutil.copy(DATA_PATH, path)
+    return str(path)
+
+
+def test_prepared_dtypes(survey, tmp_path):
+    frame = load_training_frame(survey, str(tmp_path / 'cache'))
+    assert frame['sal_expect'].dtype == np.int32
+    # Decimal entries such as 61.67 keep the marks, height and weight at float64
+    for col in ('marks_10', 'marks_12', 'marks_grad', 'height', 'weight'):
+        assert frame[col].dtype == np.float64
+    for col in ('gender_encoded', 'money_status_encoded', 'dept_encoded', 'stress_levels_encoded'):
+        assert frame[col].dtype == np.int8
+    assert isinstance(frame['dept'].dtype, pd.CategoricalDtype)
+    assert (frame['dept_encoded'] == frame['dept'].cat.codes).all()
+
+    lossy = load_training_frame(survey, str(tmp_path / 'cache'), float32=True)
+    assert lossy['marks_12'].dtype == np.float32 and lossy['bmi'].dtype == np.float32
+    assert lossy['sal_expect'].dtype == np.int32
+
+
+def test_cache_hit_and_miss(survey, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    builds = []
+    build_cache = data_prep.build_cache
+    monkeypatch.setattr(data_prep, 'build_cache', lambda *args: builds.append(args) or build_cache(*args))
+
+    first = load_training_frame(survey, cache_dir)
+    second = load_training_frame(survey, cache_dir)
+    assert len(builds) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+    # Any edit to the source changes the hash, so the next load rebuilds
+    with open(survey) as f:
+        first_row = f.read().splitlines()[1]
+    with open(survey, 'a') as f:
+        f.write(first_row + '\n')
+    assert not os.path.exists(cache_path(survey, cache_dir))
+    third = load_training_frame(survey, cache_dir)
+    assert len(builds) == 2
+    assert len(third) == len(first) + 1
+
+
+@pytest.mark.parametrize('content', ['', 'Gender,10th Mark,Stress Level\n'])
+def test_empty_input_raises_before_writing(tmp_path, content):
+    path = tmp_path / 'empty.csv'
+    path.write_text(content)
+    cache_dir = tmp_path / 'cache'
+    with pytest.raises(ValueError, match='has no data rows'):
+        load_training_frame(str(path), str(cache_dir))
+    assert not cache_dir.exists() or not list(cache_dir.iterdir())
+
+
+def test_non_numeric_entries_are_coerced(tmp_path):
+    path = tmp_path / 'survey.csv'
+    path.write_text('Gender,10th Mark\nMale,abc\nFemale,70\nMale,90\n')
+    stats = fit_statistics(str(path))
+    assert stats['coerce_numerics'] is True
+    assert stats['median']['10th Mark'] == 80.0
+
+
+def test_only_numeric_parse_errors_are_retried(tmp_path, monkeypatch):
+    calls = []
+
+    def failing(csv_path, chunk_rows, coerce_numerics):
+        calls.append(coerce_numerics)
+        raise ValueError('something else went wrong')
+
+    monkeypatch.setattr(data_prep, '_fit_statistics', failing)
+    with pytest.raises(ValueError, match='something else'):
+        fit_statistics(str(tmp_path / 'survey.csv'))
+    assert calls == [False]
@@ -0,0 +1,53 @@
+import pytest
+
+from drift_monitor import (DriftMonitor, build_reference_profile, chi_square_homogeneity, population_stability_index,
+                           serving_features, simulate, social_media_range)
+
+
+@pytest.fixture(scope='module')
+def profile():
+    return build_reference_profile()
+
+
+@pytest.mark.parametrize('hours, answer', [
+    (0, '0 Minute'), (0.25, '1 - 30 Minute'), (1, '30 - 60 Minute'), (2, '1.30 - 2 hour'),
+    (3, 'More than 2 hour'), (24, 'More than 2 hour'),
+])
+def test_social_media_hours_bucket_into_survey_answers(hours, answer):
+    assert social_media_range(hours) == answer
+
+
+def test_default_app_input_has_survey_reference(profile):
+    # The slider's default of 3 hours falls in a range the survey actually answered
+    spec = profile['categorical']['social_media_time']
+    answer = serving_features(70, 70, 70, 3, 50, 'Good', 'Neutral', [])['social_media_time']
+    assert spec['counts'][spec['categories'].index(answer)] > 0
+
+
+def test_survey_traffic_raises_no_alerts(profile):
+    report = simulate(profile, requests=3000, window=1000, traffic='survey')
+    assert report['alerts'] == 0
+
+
+def test_app_traffic_is_detected(profile):
+    report = simulate(profile, requests=2000, window=1000, traffic='app')
+    assert 'social_media_time' in report['alerted_features']
+
+
+def test_empty_bins_stay_finite():
+    assert population_stability_index([0, 100], [0, 100]) == pytest.approx(0.0)
+    assert population_stability_index([0, 100], [5, 95]) < 1.0
+    statistic, critical = chi_square_homogeneity([50, 50, 0], [50, 50, 0])
+    assert statistic == pytest.approx(0.0) and critical > 0
+
+
+def test_trigger_samples_count_assessments(profile):
+    now = [0]
+    monitor = DriftMonitor(profile, window_seconds=100, min_samples=5, clock=lambda: now[0],
+                           on_alert=lambda alert: None)
+    for _ in range(10):
+        monitor.observe(serving_features(70, 70, 70, 1, 50, 'Good', 'Neutral',
+                                         ['Academic pressure', 'Exam failure', 'Peer pressure']))
+    now[0] = 100
+    report = monitor.flush()
+    assert report['features']['triggers']['samples'] == 10
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from load_test import generate_assessment, load_locations
+from recommendation_engine import (
+    DEFAULT_SCORING_PROFILE, PersonalizedRecommendationEngine, scoring_profile, score_assessment
+)
+
+TRAUMA_CONTEXTS = ['', 'I was abused as a child and still have flashbacks', 'Exams are close and I cannot sleep']
+
+
+def _uncached(engine):
+    """Route the engine's memoized lookups straight to what they wrap"""
+    engine._level_results = engine._compute_level_results
+    engine._facilities = engine.location_recommendations.get_nearby_facilities
+    return engine
+
+
+@pytest.fixture(scope='module')
+def assessments():
+    rng = random.Random(11)
+    locations = load_locations() + [('Karnataka', 'Nowhere'), ('Nowhere', 'Nowhere')]
+    assessments = []
+    for _ in range(400):
+        assessment = generate_assessment(rng, locations)
+        assessment['context'] = rng.choice(TRAUMA_CONTEXTS + [assessment['context']])
+        if rng.random() < 0.1:
+            assessment['course'] = 'Underwater Basket Weaving'
+        assessments.append(assessment)
+    return assessments
+
+
+def test_cached_results_equal_uncached(assessments):
+    cached = PersonalizedRecommendationEngine()
+    uncached = _uncached(PersonalizedRecommendationEngine(cached.location_recommendations))
+    # Warm the caches in one order and compare in another, so a key missing an input shows up as a stale hit
+    for assessment in assessments:
+        score_assessment(cached, assessment)
+    levels = set()
+    for assessment in reversed(assessments):
+        expected = score_assessment(uncached, assessment)
+        assert score_assessment(cached, assessment) == expected
+        levels.add(expected['enhanced_stress_level'])
+    assert cached._level_results.cache_info().hits > 0
+    assert cached._facilities.cache_info().hits > 0
+    assert len(levels) >= 3
+
+
+def test_results_do_not_share_cached_facilities(assessments):
+    engine = PersonalizedRecommendationEngine()
+    assessment = next(a for a in assessments if a['state'] != 'Nowhere')
+    first = score_assessment(engine, assessment)
+    facilities = first['location_based_facilities']
+    kind = next(kind for kind in ('hospitals', 'counseling_centers') if facilities[kind])
+    facilities[kind][0]['name'] = 'Edited'
+    facilities[kind][0]['services'].append('Edited')
+    facilities['emergency_numbers'][0]['number'] = '000'
+    facilities[kind].append({'name': 'Added'})
+
+    second = score_assessment(engine, assessment)['location_based_facilities']
+    assert second == score_assessment(_uncached(PersonalizedRecommendationEngine()), assessment)['location_based_facilities']
+    assert second[kind][0]['name'] != 'Edited'
+
+
+def test_engine_keeps_its_own_copy_of_the_profile():
+    profile = scoring_profile({'thresholds': {'Awful': 0.9}})
+    engine = PersonalizedRecommendationEngine(profile=profile)
+    profile['thresholds']['Awful'] = 0.1
+    profile['ml_weight'] = 0.0
+    assert engine.scoring_profile['thresholds']['Awful'] == 0.9
+    assert engine.scoring_profile['ml_weight'] == DEFAULT_SCORING_PROFILE['ml_weight']
+
+    default_engine = PersonalizedRecommendationEngine()
+    default_engine.scoring_profile['thresholds']['Good'] = 0.0
+    assert DEFAULT_SCORING_PROFILE['thresholds']['Good'] == 0.4
+
+
+def test_invalid_profile_is_rejected():
+    with pytest.raises(ValueError):
+        PersonalizedRecommendationEngine(profile={'thresholds': {'Awful': 0.1, 'Bad': 0.6, 'Good': 0.4}})
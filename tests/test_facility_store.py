@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from facility_store import DEFAULT_JSON_PATH, SQLiteFacilityProvider, import_facilities_json
+from load_test import load_locations
+from recommendation_engine import LocationBasedRecommendations
+
+
+@pytest.fixture(scope='module')
+def providers(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp('facilities') / 'facilities.db')
+    import_facilities_json(DEFAULT_JSON_PATH, db_path)
+    sqlite_provider = SQLiteFacilityProvider(db_path)
+    yield LocationBasedRecommendations(), sqlite_provider
+    sqlite_provider.close()
+
+
+def test_providers_agree_for_every_city(providers):
+    json_provider, sqlite_provider = providers
+    with open(DEFAULT_JSON_PATH) as f:
+        facilities = json.load(f)
+    locations = set(load_locations())
+    locations |= {(state, city) for state, cities in facilities.items() for city in cities}
+    locations |= {('Karnataka', 'Nowhere'), ('Nowhere', 'Nowhere')}
+    for state, city in sorted(locations):
+        assert sqlite_provider.get_nearby_facilities(state, city) == json_provider.get_nearby_facilities(state, city)
+
+
+def test_city_without_facilities_falls_back_in_both(tmp_path):
+    data = {
+        'Goa': {
+            'Margao': {'hospitals': [], 'counseling_centers': [], 'support_groups': []},
+            'Panaji': {'hospitals': [{'name': 'GMC', 'address': 'Bambolim', 'services': ['Psychiatry']}]},
+        }
+    }
+    json_path, db_path = tmp_path / 'facilities.json', str(tmp_path / 'facilities.db')
+    json_path.write_text(json.dumps(data))
+    import_facilities_json(str(json_path), db_path)
+    json_provider = LocationBasedRecommendations(str(json_path))
+    sqlite_provider = SQLiteFacilityProvider(db_path)
+    try:
+        result = sqlite_provider.get_nearby_facilities('Goa', 'Margao')
+        assert result == json_provider.get_nearby_facilities('Goa', 'Margao')
+        assert result['hospitals'][0]['name'] == 'GMC'
+        assert 'Panaji' in result['fallback_note']
+    finally:
+        sqlite_provider.close()
+
+
+def test_search_matches_name_address_and_services(providers):
+    _, sqlite_provider = providers
+    results = sqlite_provider.search_facilities('psychiatry')
+    assert results
+    for result in results:
+        text = ' '.join([result['name'], result.get('address', '')] + result.get('services', []))
+        assert 'psychiatry' in text.lower()
+    assert all({'state', 'city', 'kind'} <= set(result) for result in results)
+
+
+def test_search_state_filter_and_limit(providers):
+    _, sqlite_provider = providers
+    results = sqlite_provider.search_facilities('hospital', state='Kerala', limit=3)
+    assert 0 < len(results) <= 3
+    assert {result['state'] for result in results} == {'Kerala'}
+
+
+@pytest.mark.parametrize('query', ['', '   ', 'NEAR(psychiatry', '"unbalanced', 'a OR', '*'])
+def test_search_treats_input_as_plain_terms(providers, query):
+    _, sqlite_provider = providers
+    # Never raises on FTS5 operators or quotes typed by a user
+    assert isinstance(sqlite_provider.search_facilities(query), list)
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from recommendation_engine import EmotionalAnalyzer, IncrementalContextAnalyzer
+
+ANALYZER = EmotionalAnalyzer()
+VOCABULARY = (
+    ANALYZER.NEGATIVE_WORDS + ANALYZER.POSITIVE_WORDS + list(ANALYZER.trauma_keywords)
+    + ['i', 'feel', 'so', 'the', 'exam', 'AWFUL', 'Happy', 'sadness', 'grapes', 'İstanbul', 'straße']
+)
+SEPARATORS = [' ', '  ', '\n', '\t', ', ', '', '.']
+
+
+def _random_text(rng: random.Random, words: int) -> str:
+    return ''.join(rng.choice(VOCABULARY) + rng.choice(SEPARATORS) for _ in range(words))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_edits_match_full_analysis(seed):
+    rng = random.Random(seed)
+    incremental = IncrementalContextAnalyzer(ANALYZER)
+    for _ in range(300):
+        text = incremental.text
+        start = rng.randint(0, len(text))
+        end = rng.randint(start, min(len(text), start + rng.choice([0, 1, 3, 12, 40])))
+        replacement = _random_text(rng, rng.randint(0, 3)) if rng.random() < 0.8 else rng.choice(VOCABULARY)[:3]
+        assert incremental.replace(start, end, replacement) == ANALYZER.analyze_context(incremental.text)
+
+
+def test_typing_and_set_text_match_full_analysis():
+    text = 'I feel hopeless and tired, but my friends are great and I am hopeful about the exams'
+    incremental = IncrementalContextAnalyzer(ANALYZER)
+    for character in text:
+        assert incremental.append(character) == ANALYZER.analyze_context(incremental.text)
+
+    # Widget-style updates: the whole new value, which differs from the old one in a single span
+    for value in (text.replace('hopeless', 'happy'), text[:20], '', 'Abused and scared', 'abused'):
+        assert incremental.set_text(value) == ANALYZER.analyze_context(value)
+        assert incremental.text == value
+
+
+def test_edit_outside_text_is_rejected():
+    incremental = IncrementalContextAnalyzer(ANALYZER, 'short')
+    with pytest.raises(ValueError):
+        incremental.replace(3, 10, 'x')
@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from online_learning import (MIN_CONFIRMED_HOLDOUT, AssessmentLog, IncrementalTrainer, ModelServer,
+                             ensure_bootstrapped, is_holdout)
+
+
+@pytest.fixture
+def store(tmp_path):
+    server = ModelServer(str(tmp_path / 'models'))
+    ensure_bootstrapped(server)
+    log = AssessmentLog(str(tmp_path / 'log.db'))
+    return server, log, tmp_path
+
+
+def _confirm_rows(server, log, count, seed=0, label=None):
+    """Log and confirm `count` assessments with random features; returns their ids"""
+    rng = random.Random(seed)
+    version = server.current
+    ids = []
+    for _ in range(count):
+        features = [rng.uniform(0, 10) for _ in version.scaler.mean_]
+        assessment_id = log.append(features)
+        log.confirm(assessment_id, label or rng.choice(version.class_names))
+        ids.append(assessment_id)
+    return ids
+
+
+def test_confirm_rejects_unknown_label(store):
+    server, log, _ = store
+    assessment_id = log.append([0.0] * len(server.current.scaler.mean_))
+    with pytest.raises(ValueError, match='awful'):
+        log.confirm(assessment_id, 'awful', server.current.class_names)
+    assert log.confirmed_since(0, 10) == []
+    log.confirm(assessment_id, server.current.class_names[0], server.current.class_names)
+    assert len(log.confirmed_since(0, 10)) == 1
+
+
+def test_holdout_skips_unknown_labels(store):
+    server, log, _ = store
+    # Stored without validation, the way rows from before label checking were
+    ids = _confirm_rows(server, log, MIN_CONFIRMED_HOLDOUT * 5, label='awful')
+    assert sum(is_holdout(i) for i in ids) >= MIN_CONFIRMED_HOLDOUT
+    trainer = IncrementalTrainer(server, log, batch_size=4)
+    X, y = trainer._holdout(server.current)
+    # Falls back to the distilled sample instead of failing on labels it cannot index
+    assert len(y) == len(server.current.distilled_holdout[1])
+
+
+def test_training_resumes_past_unusable_rows(store):
+    server, log, _ = store
+    _confirm_rows(server, log, 200, label='awful')
+    trainer = IncrementalTrainer(server, log, batch_size=32, tolerance=10.0)
+    # Nothing to train on yet, but the unusable rows are consumed rather than re-read
+    assert trainer.run_once() is None
+    assert trainer.cursor == server.trainer_cursor == 200
+
+    _confirm_rows(server, log, 500, seed=1)
+    outcome = trainer.run_once()
+    assert outcome is not None and outcome['rows'] == 32
+    assert trainer.cursor > 200
+
+
+def test_partial_batch_is_not_consumed(store):
+    server, log, _ = store
+    _confirm_rows(server, log, 50, label='awful')
+    _confirm_rows(server, log, 10, seed=1)
+    trainer = IncrementalTrainer(server, log, batch_size=32, tolerance=10.0)
+    assert trainer.run_once() is None
+    # Skips the leading unusable rows but keeps the valid ones for the next batch
+    assert trainer.cursor == 50
+    _confirm_rows(server, log, 40, seed=2)
+    assert trainer.run_once()['rows'] == 32
+
+
+def test_superseded_confirmations_are_not_trained_on(store):
+    server, log, _ = store
+    class_names = server.current.class_names
+    features = [1.0] * len(server.current.scaler.mean_)
+    first = log.append(features)
+    log.confirm(first, class_names[0])
+    second = log.append(features)
+    log.confirm(second, class_names[1])
+    log.confirm(first, class_names[2])
+    rows = log.confirmed_since(0, 10)
+    assert [(row[1], row[3]) for row in rows] == [(second, class_names[1]), (first, class_names[2])]
+
+
+def test_rollback_survives_reload(store):
+    server, log, tmp_path = store
+    first = server.current.version
+    _confirm_rows(server, log, 200)
+    trainer = IncrementalTrainer(server, log, batch_size=8, tolerance=10.0)
+    assert trainer.run_once()['published']
+    assert trainer.run_once()['published']
+    second, third = server.current.parent, server.current.version
+    assert server.rollback().version == second
+
+    reloaded = ModelServer(server.store_dir)
+    assert reloaded.load().version == second
+    assert reloaded.rollback().version == first
+    with pytest.raises(RuntimeError):
+        reloaded.rollback()
+    # The rolled-back version is not resurrected, and its number is never reused
+    assert reloaded.next_version() == third + 1
+
+
+def test_rejected_batches_advance_persisted_cursor(store):
+    server, log, _ = store
+    # Ids 1-10: two holdout rows and exactly one training batch
+    _confirm_rows(server, log, 10)
+    trainer = IncrementalTrainer(server, log, batch_size=8, tolerance=-1.0)
+    outcome = trainer.run_once()
+    assert outcome is not None and not outcome['published']
+    served = server.current.version
+
+    reloaded = ModelServer(server.store_dir)
+    assert reloaded.load().version == served
+    restarted = IncrementalTrainer(reloaded, log, batch_size=8, tolerance=-1.0)
+    assert restarted.cursor == trainer.cursor > 0
+    # Resumes after the rejected batch rather than replaying it
+    assert restarted.run_once() is None
@@ -0,0 +1,79 @@
+import datetime
+import random
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from load_test import generate_assessment, load_locations
+from recommendation_engine import PersonalizedRecommendationEngine, score_assessment
+from results_export import FACILITY_KINDS, ResultsExporter, copied_bytes, facility_ids, inspect, open_results
+
+
+@pytest.fixture(scope='module')
+def scored():
+    rng = random.Random(7)
+    locations = load_locations()
+    engine = PersonalizedRecommendationEngine()
+    assessments = [generate_assessment(rng, locations) for _ in range(25)]
+    return [(assessment, score_assessment(engine, assessment)) for assessment in assessments]
+
+
+def _export(path, scored, **options):
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    with ResultsExporter(str(path), batch_rows=10, **options) as exporter:
+        for row, (assessment, results) in enumerate(scored):
+            exporter.write(results, assessment['course'], assessment['state'], assessment['city'],
+                           recorded_at=start + datetime.timedelta(seconds=row))
+    return exporter
+
+
+def test_round_trip_matches_engine_output(tmp_path, scored):
+    path = tmp_path / 'results.arrow'
+    exporter = _export(path, scored)
+    table = open_results(str(path))
+    assert exporter.rows_written == table.num_rows == len(scored)
+    assert table['assessment_id'].num_chunks == 3
+
+    index = facility_ids()
+    for row, ((assessment, results), exported) in enumerate(zip(scored, table.to_pylist())):
+        analysis = results['emotional_analysis']
+        facilities = results['location_based_facilities']
+        assert exported['assessment_id'] == row
+        assert exported['recorded_at'] == datetime.datetime(2024, 1, 1, 0, 0, row, tzinfo=datetime.timezone.utc)
+        assert (exported['state'], exported['city'], exported['course']) == (
+            assessment['state'], assessment['city'], assessment['course'])
+        assert exported['emotion'] == analysis['analysis_summary']['primary_emotion']
+        assert exported['ml_prediction'] == results['original_ml_prediction']
+        assert exported['stress_level'] == results['enhanced_stress_level']
+        assert exported['triggers'] == analysis['analysis_summary']['trigger_events']
+        assert exported['final_score'] == results['stress_score_breakdown']['final_score']
+        assert exported['emotion_score'] == analysis['emotion_score']
+        assert exported['trigger_score'] == analysis['trigger_score']
+        assert exported['sentiment_score'] == analysis['sentiment_score']
+        assert exported['trauma_detected'] == bool(analysis['trauma_detected'])
+        assert exported['facility_ids'] == [
+            index[(facility.get('name'), facility.get('address'), facility.get('phone'))]
+            for kind in FACILITY_KINDS for facility in facilities.get(kind, ())
+        ]
+        assert exported['facility_fallback'] == ('fallback_note' in facilities)
+
+
+def test_uncompressed_export_is_read_without_copies(tmp_path, scored):
+    path = tmp_path / 'results.arrow'
+    _export(path, scored)
+    assert copied_bytes(str(path)) == 0
+    assert inspect(str(path))['copied_bytes'] == 0
+
+
+def test_compressed_export_is_copied_on_read(tmp_path, scored):
+    path = tmp_path / 'results.arrow'
+    _export(path, scored, compression='zstd')
+    assert copied_bytes(str(path)) > 0
+    assert open_results(str(path)).to_pylist() == open_results(str(_export(tmp_path / 'plain.arrow', scored).path)).to_pylist()
+
+
+def test_repeated_facility_keeps_one_id():
+    index = facility_ids()
+    assert len(set(index.values())) == len(index)
+    assert min(index.values()) == 1
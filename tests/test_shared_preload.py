@@ -0,0 +1,54 @@
+import gc
+import json
+import random
+import urllib.error
+import urllib.request
+
+import pytest
+
+from load_test import generate_assessment, load_locations
+from recommendation_engine import score_assessment
+from shared_preload import predict_features, preload, release, start_server, stop_server
+
+ROW = [72.0, 21.5, 1.1, 0, 1, 2, 70, 75, 72, 30000]
+
+
+@pytest.fixture
+def state():
+    state = preload()
+    yield state
+    release(state)
+    gc.unfreeze()
+
+
+def _post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def test_release_keeps_models_usable(state):
+    assert state['shared_arrays']
+    before = predict_features(state['model_package'], [ROW])
+    # Must not raise BufferError while estimators still hold the shared arrays
+    release(state)
+    assert state['shared_arrays'] == []
+    assert predict_features(state['model_package'], [ROW]) == before
+
+
+def test_preforked_workers_serve_from_preloaded_state(state):
+    listener, pids = start_server(state, workers=2, port=0)
+    try:
+        url = f'http://127.0.0.1:{listener.getsockname()[1]}'
+        assessment = generate_assessment(random.Random(3), load_locations())
+        expected = json.loads(json.dumps(score_assessment(state['engine'], assessment)))
+        assert _post(url + '/assess', assessment) == expected
+
+        response = _post(url + '/predict', {'features': [ROW, ROW]})
+        assert response['probabilities'] == predict_features(state['model_package'], [ROW, ROW])
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            _post(url + '/assess', {'course': 'Law'})
+        assert error.value.code == 400
+    finally:
+        stop_server(listener, pids)
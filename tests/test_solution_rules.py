@@ -0,0 +1,108 @@
+import random
+
+import numpy as np
+import pytest
+
+from recommendation_engine import EMOTION_OPTIONS, SOLUTION_RULES, TRIGGER_OPTIONS, SolutionRuleSet
+
+BASE_SOLUTIONS = {rule['levels'][0]: rule['solutions'] for rule in SOLUTION_RULES[:4]}
+TRIGGER_SOLUTIONS = {solution for rule in SOLUTION_RULES if 'trigger_contains' in rule for solution in rule['solutions']}
+CONTEXTS = [
+    '', 'tired', 'I cannot sleep before the exam next week',
+    'My friend stopped talking to me and I feel tired all the time',
+    'Social events make me anxious, studying for exams too',
+]
+
+
+def legacy_solutions(stress_level, emotion, trigger_events, trauma_detected, context_text):
+    """The if/elif chains SOLUTION_RULES replaced, de-duplicated in the order they appended"""
+    solutions = list(BASE_SOLUTIONS.get(stress_level, BASE_SOLUTIONS['Good']))
+    if emotion in ['Anxious', 'Panicked']:
+        solutions.extend([
+            'Practice deep breathing exercises (4-7-8 technique)',
+            'Try progressive muscle relaxation',
+            'Limit caffeine intake which can worsen anxiety'
+        ])
+    elif emotion in ['Depressed', 'Hopeless']:
+        solutions.extend([
+            'Establish daily sunlight exposure routine',
+            'Engage in physical activity, even light walking',
+            'Reach out to support network regularly'
+        ])
+    elif emotion in ['Overwhelmed']:
+        solutions.extend([
+            'Break large tasks into smaller, manageable steps',
+            'Use time-blocking technique for better organization',
+            'Practice saying "no" to non-essential commitments'
+        ])
+    for trigger in trigger_events:
+        if 'Academic pressure' in trigger:
+            solutions.append('Discuss academic expectations with professors or academic advisor')
+        elif 'Financial problems' in trigger:
+            solutions.append('Explore financial aid options and scholarship opportunities')
+        elif 'Relationship issues' in trigger:
+            solutions.append('Consider relationship counseling or focus on self-care during this transition')
+        elif 'Family conflicts' in trigger:
+            solutions.append('Practice setting healthy boundaries with family members')
+    if trauma_detected:
+        solutions.extend([
+            'Consider trauma-informed therapy (EMDR, CBT)',
+            'Explore support groups for trauma survivors',
+            'Practice grounding techniques during flashbacks or triggers',
+            'Create a safety plan with trusted individuals'
+        ])
+    if context_text and len(context_text) > 20:
+        context_lower = context_text.lower()
+        if 'sleep' in context_lower or 'tired' in context_lower:
+            solutions.append('Prioritize sleep hygiene - aim for 7-9 hours nightly')
+        if 'study' in context_lower or 'exam' in context_lower:
+            solutions.append('Implement active study techniques like spaced repetition')
+        if 'friend' in context_lower or 'social' in context_lower:
+            solutions.append('Nurture existing friendships and consider joining social activities')
+    return list(dict.fromkeys(solutions))
+
+
+def random_requests(count, seed=0):
+    rng = random.Random(seed)
+    free_text = ['Financial problems and Academic pressure', 'Family conflicts at home', 'Something else']
+    for _ in range(count):
+        triggers = rng.sample(TRIGGER_OPTIONS + free_text, rng.choice([0, 1, 1, 2, 3, 4]))
+        yield (
+            rng.choice(['Fabulous', 'Good', 'Bad', 'Awful', 'Unknown']),
+            rng.choice(EMOTION_OPTIONS + ['Calm']),
+            triggers,
+            rng.random() < 0.2,
+            rng.choice(CONTEXTS),
+        )
+
+
+def test_matches_legacy_rules_including_order():
+    rules = SolutionRuleSet()
+    position = {solution: index for index, solution in enumerate(rules.solution_table)}
+    single_trigger_rule = 0
+    for request in random_requests(5000):
+        expected = legacy_solutions(*request)
+        actual = rules.evaluate(*request)
+        # Solutions come in table order; the chains appended trigger solutions in trigger order instead
+        assert actual == sorted(expected, key=position.__getitem__)
+        if len(TRIGGER_SOLUTIONS.intersection(expected)) <= 1:
+            single_trigger_rule += 1
+            assert actual == expected
+    assert single_trigger_rule > 1000
+
+
+def test_evaluate_batch_matches_evaluate():
+    rules = SolutionRuleSet()
+    requests = list(random_requests(500, seed=1))
+    masks = [rules.request_mask(*request) for request in requests]
+    matrix = rules.evaluate_batch(masks)
+    assert matrix.shape == (len(requests), len(rules.solution_table))
+    for row, request in zip(matrix, requests):
+        assert [rules.solution_table[index] for index in np.flatnonzero(row)] == rules.evaluate(*request)
+
+
+def test_more_rules_than_mask_bits_is_rejected():
+    rules = [{'levels': ['Good'], 'solutions': [f'Solution {index}']} for index in range(SolutionRuleSet.MAX_RULES)]
+    assert len(SolutionRuleSet(rules).solution_table) == SolutionRuleSet.MAX_RULES
+    with pytest.raises(ValueError, match='at most 64 rules'):
+        SolutionRuleSet(rules + [{'trauma': True, 'solutions': ['One too many']}])
@@ -0,0 +1,65 @@
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from load_test import generate_assessment, load_locations
+from recommendation_engine import (DEFAULT_SCORING_PROFILE, PersonalizedRecommendationEngine, predict_stress_level,
+                                   scoring_profile)
+from whatif_sweep import STRESS_LEVELS, _NullFacilities, build_cohort, sweep, synthesize_cohort
+
+STUDENTS = 400
+
+
+@pytest.fixture(scope='module')
+def assessments():
+    rng = random.Random(7)
+    locations = load_locations()
+    return [generate_assessment(rng, locations) for _ in range(STUDENTS)]
+
+
+def _engine_levels(assessments, profile):
+    """Stress level of every assessment scored one at a time by the engine under `profile`"""
+    engine = PersonalizedRecommendationEngine(location_recommendations=_NullFacilities(), profile=profile)
+    levels = []
+    for a in assessments:
+        _, probabilities = predict_stress_level(
+            a['mark10th'], a['mark12th'], a['collegemark'], a['carrer_willing'], a['smtime'], a['financial']
+        )
+        _, course_factor, emotion_score, trigger_score, trauma = engine.score_components(
+            probabilities, a['course'], a['emotion'], a['triggers'], a['context']
+        )
+        score = engine._calculate_enhanced_stress_score(probabilities, course_factor, {
+            'emotion_score': emotion_score, 'trigger_score': trigger_score, 'trauma_detected': trauma
+        })
+        levels.append(STRESS_LEVELS.index(engine._determine_stress_level(score)))
+    return levels
+
+
+def test_default_profile_reproduces_engine_baseline():
+    report = sweep(synthesize_cohort(STUDENTS), [DEFAULT_SCORING_PROFILE])
+    assert report['students'] == STUDENTS
+    assert report['baseline_mismatches'] == 0
+    # Under the baseline profile itself nobody changes level
+    transitions = report['transitions'][0]
+    assert np.array_equal(np.diag(np.diag(transitions)), transitions)
+    assert np.diag(transitions).tolist() == report['baseline_distribution']
+
+
+@pytest.mark.parametrize('overrides', [
+    {'ml_weight': 0.55, 'emotion_weight': 0.25},
+    {'trauma_bonus': 0.3, 'thresholds': {'Awful': 0.7, 'Bad': 0.5, 'Good': 0.3}},
+    {'ml_weight': 0.9, 'course_weight': 0.0, 'emotion_weight': 0.05, 'trigger_weight': 0.05},
+])
+def test_sweep_matches_engine_per_student(assessments, overrides):
+    profile = scoring_profile(overrides)
+    report = sweep(build_cohort(assessments), [DEFAULT_SCORING_PROFILE, profile])
+    assert report['baseline_mismatches'] == 0
+
+    expected = np.zeros((4, 4), dtype=np.int64)
+    pairs = Counter(zip(_engine_levels(assessments, DEFAULT_SCORING_PROFILE), _engine_levels(assessments, profile)))
+    for (before, after), count in pairs.items():
+        expected[before, after] = count
+    assert report['transitions'][1].tolist() == expected.tolist()
+    assert report['transitions'][0].sum(axis=1).tolist() == report['baseline_distribution']
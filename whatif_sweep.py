@@ -0,0 +1,317 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from recommendation_engine import (
+    ENGINE_SCRIPT_DIR, DEFAULT_SCORING_PROFILE, PersonalizedRecommendationEngine,
+    predict_stress_level, scoring_profile
+)
+
+# 🔑 What-if sweep: score a stored cohort under many scoring profiles in one broadcast (profiles x students)
+DEFAULT_COHORT_PATH = os.path.join(ENGINE_SCRIPT_DIR, 'whatif_cohort.npz')
+
+# Level index order; a score's index is the number of thresholds it reaches
+STRESS_LEVELS = ('Fabulous', 'Good', 'Bad', 'Awful')
+COMPONENTS = ('ml_score', 'course_factor', 'emotion_score', 'trigger_score')
+WEIGHT_KEYS = ('ml_weight', 'course_weight', 'emotion_weight', 'trigger_weight')
+
+# Block shape of the broadcast; profile x student float64 blocks stay cache-resident
+PROFILE_BLOCK = 64
+STUDENT_BLOCK = 1024
+
+
+class _NullFacilities:
+    """Facility provider for cohort building, which never looks up facilities"""
+
+    def get_nearby_facilities(self, state, city):
+        return {}
+
+
+def build_cohort(assessments: List[Dict]) -> Dict[str, np.ndarray]:
+    """Profile-independent score components of each assessment, plus its level under the default profile"""
+    engine = PersonalizedRecommendationEngine(location_recommendations=_NullFacilities())
+    columns = {name: np.empty(len(assessments)) for name in COMPONENTS}
+    trauma = np.empty(len(assessments), dtype=bool)
+    engine_level = np.empty(len(assessments), dtype=np.int8)
+    level_index = {level: index for index, level in enumerate(STRESS_LEVELS)}
+
+    for row, a in enumerate(assessments):
+        _, probabilities = predict_stress_level(
+            a['mark10th'], a['mark12th'], a['collegemark'], a['carrer_willing'], a['smtime'], a['financial']
+        )
+        ml_score, course_factor, emotion_score, trigger_score, trauma_detected = engine.score_components(
+            probabilities, a['course'], a['emotion'], a['triggers'], a['context']
+        )
+        columns['ml_score'][row] = ml_score
+        columns['course_factor'][row] = course_factor
+        columns['emotion_score'][row] = emotion_score
+        columns['trigger_score'][row] = trigger_score
+        trauma[row] = trauma_detected
+        # Scored through the engine itself so sweeps can check the baseline reproduces it exactly
+        score = engine._calculate_enhanced_stress_score(probabilities, course_factor, {
+            'emotion_score': emotion_score, 'trigger_score': trigger_score, 'trauma_detected': trauma_detected
+        })
+        engine_level[row] = level_index[engine._determine_stress_level(score)]
+
+    return dict(columns, trauma=trauma, engine_level=engine_level)
+
+
+def synthesize_cohort(students: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Cohort of random assessments drawn from the app's option lists and widget ranges"""
+    from load_test import generate_assessment, load_locations
+
+    rng = random.Random(seed)
+    locations = load_locations()
+    return build_cohort([generate_assessment(rng, locations) for _ in range(students)])
+
+
+def save_cohort(cohort: Dict[str, np.ndarray], path: str):
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **cohort)
+    os.replace(tmp_path, path)
+
+
+def load_cohort(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def collapse_cohort(cohort: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Merge students with identical components into weighted rows; levels only depend on the components"""
+    names = list(COMPONENTS) + ['trauma'] + (['engine_level'] if 'engine_level' in cohort else [])
+    order = np.lexsort([cohort[name] for name in names])
+    columns = {name: cohort[name][order] for name in names}
+    changed = np.zeros(len(order), dtype=bool)
+    changed[:1] = True
+    for values in columns.values():
+        changed[1:] |= values[1:] != values[:-1]
+    starts = np.flatnonzero(changed)
+    collapsed = {name: values[starts] for name, values in columns.items()}
+    collapsed['count'] = np.diff(np.append(starts, len(order)))
+    return collapsed
+
+
+def profile_grid(values: Dict[str, List[float]]) -> List[Dict]:
+    """Cartesian product of candidate values; unlisted settings keep their defaults"""
+    keys = list(WEIGHT_KEYS) + ['trauma_bonus'] + list(STRESS_LEVELS[:0:-1])
+    choices = []
+    for key in keys:
+        if key in DEFAULT_SCORING_PROFILE:
+            default = DEFAULT_SCORING_PROFILE[key]
+        else:
+            default = DEFAULT_SCORING_PROFILE['thresholds'][key]
+        choices.append(values.get(key) or [default])
+
+    profiles = []
+    for combination in itertools.product(*choices):
+        settings = dict(zip(keys, combination))
+        thresholds = {level: settings.pop(level) for level in STRESS_LEVELS[1:]}
+        # Threshold combinations that are out of order are not valid profiles
+        if thresholds['Awful'] >= thresholds['Bad'] >= thresholds['Good']:
+            profiles.append(scoring_profile(dict(settings, thresholds=thresholds)))
+    return profiles
+
+
+def _profile_arrays(profiles: List[Dict]) -> Dict[str, np.ndarray]:
+    """One (profiles, 1) column per setting, ready to broadcast against student rows"""
+    arrays = {key: np.array([[p[key]] for p in profiles], dtype=np.float64) for key in WEIGHT_KEYS}
+    arrays['trauma_bonus'] = np.array([[p['trauma_bonus']] for p in profiles], dtype=np.float64)
+    for level in STRESS_LEVELS[1:]:
+        arrays[level] = np.array([[p['thresholds'][level]] for p in profiles], dtype=np.float64)
+    return arrays
+
+
+def _scores(arrays: Dict[str, np.ndarray], rows: Dict[str, np.ndarray], block: slice, trauma: bool) -> np.ndarray:
+    """Enhanced score of every (profile, student) cell for a block of students sharing a trauma flag"""
+    # Same operation order as the engine so the default profile reproduces its levels bit for bit
+    score = arrays['ml_weight'] * rows['ml_score'][block]
+    score += arrays['course_weight'] * rows['course_factor'][block]
+    score += arrays['emotion_weight'] * rows['emotion_score'][block]
+    score += arrays['trigger_weight'] * rows['trigger_score'][block]
+    if trauma:
+        score += arrays['trauma_bonus']
+        np.minimum(score, 1.0, out=score)
+    return score
+
+
+def _levels(profile: Dict, rows: Dict[str, np.ndarray]) -> np.ndarray:
+    """Level index of every row under a single profile"""
+    arrays = _profile_arrays([profile])
+    levels = np.zeros(len(rows['trauma']), dtype=np.int8)
+    for trauma in (False, True):
+        selected = np.flatnonzero(rows['trauma'] == trauma)
+        score = _scores(arrays, rows, selected, trauma)[0]
+        levels[selected] = sum(score >= arrays[level][0] for level in STRESS_LEVELS[1:])
+    return levels
+
+
+def sweep(cohort: Dict[str, np.ndarray], profiles: List[Dict], baseline: Dict = None) -> Dict:
+    """Level distribution and baseline-to-profile transition matrix of the cohort under every profile"""
+    rows = collapse_cohort(cohort)
+    base_levels = _levels(baseline or DEFAULT_SCORING_PROFILE, rows)
+
+    # Rows sorted into (baseline level, trauma) segments so every block has one transition row and one bonus rule
+    segment_keys = base_levels * 2 + rows['trauma']
+    order = np.argsort(segment_keys, kind='stable')
+    rows = {name: values[order] for name, values in rows.items()}
+    segment_keys = segment_keys[order]
+    bounds = np.flatnonzero(np.diff(segment_keys)) + 1
+    segments = zip(np.append(0, bounds), np.append(bounds, len(order)))
+
+    counts = rows['count'].astype(np.float64)
+    arrays = _profile_arrays(profiles)
+    thresholds = np.stack([arrays[level][:, 0] for level in STRESS_LEVELS[1:]])
+    # reached[b, k - 1, p]: students at baseline level b whose score under profile p reaches threshold k
+    reached = np.zeros((4, 3, len(profiles)))
+    totals = np.zeros(4)
+    for start, end in segments:
+        base_level, trauma = divmod(int(segment_keys[start]), 2)
+        totals[base_level] += counts[start:end].sum()
+        for block_start in range(start, end, STUDENT_BLOCK):
+            block = slice(block_start, min(end, block_start + STUDENT_BLOCK))
+            for profile_start in range(0, len(profiles), PROFILE_BLOCK):
+                chunk = slice(profile_start, profile_start + PROFILE_BLOCK)
+                score = _scores({key: values[chunk] for key, values in arrays.items()}, rows, block, trauma)
+                for k in range(3):
+                    reached[base_level, k, chunk] += (score >= thresholds[k, chunk, None]) @ counts[block]
+
+    # Thresholds are ordered, so the reached sets are nested and level counts are their differences
+    reached = np.rint(reached).astype(np.int64)
+    at_least = np.concatenate([np.broadcast_to(totals.astype(np.int64)[:, None, None], (4, 1, len(profiles))),
+                               reached, np.zeros((4, 1, len(profiles)), dtype=np.int64)], axis=1)
+    transitions = (at_least[:, :-1] - at_least[:, 1:]).transpose(2, 0, 1)
+
+    report = {
+        'students': int(totals.sum()),
+        'distinct_rows': len(order),
+        'levels': list(STRESS_LEVELS),
+        'baseline': baseline or DEFAULT_SCORING_PROFILE,
+        'baseline_distribution': totals.astype(np.int64).tolist(),
+        'transitions': transitions,
+    }
+    if 'engine_level' in rows and baseline in (None, DEFAULT_SCORING_PROFILE):
+        report['baseline_mismatches'] = int(counts[rows['engine_level'] != base_levels[order]].sum())
+    return report
+
+
+def summarize(report: Dict, profiles: List[Dict], top: int = 10) -> Dict:
+    """JSON-friendly report; profiles ranked by the share of students whose level changes"""
+    transitions = report['transitions']
+    students = report['students']
+    unchanged = np.trace(transitions, axis1=1, axis2=2)
+    results = [
+        {
+            'profile': profile,
+            'distribution': dict(zip(STRESS_LEVELS, transitions[i].sum(axis=0).tolist())),
+            'changed_share': round(1 - unchanged[i] / students, 4) if students else 0.0,
+            'transitions': transitions[i].tolist(),
+        }
+        for i, profile in enumerate(profiles)
+    ]
+    summary = {key: value for key, value in report.items() if key != 'transitions'}
+    summary['baseline_distribution'] = dict(zip(STRESS_LEVELS, report['baseline_distribution']))
+    summary['profiles'] = results
+    summary['most_disruptive'] = sorted(results, key=lambda r: r['changed_share'], reverse=True)[:top]
+    return summary
+
+
+def _random_profiles(count: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(count):
+        good = round(rng.uniform(0.3, 0.5), 3)
+        bad = round(rng.uniform(good, 0.7), 3)
+        awful = round(rng.uniform(bad, 0.9), 3)
+        profiles.append(scoring_profile({
+            'ml_weight': round(rng.uniform(0.5, 0.85), 3),
+            'course_weight': round(rng.uniform(0.0, 0.2), 3),
+            'emotion_weight': round(rng.uniform(0.0, 0.2), 3),
+            'trigger_weight': round(rng.uniform(0.0, 0.2), 3),
+            'trauma_bonus': round(rng.uniform(0.0, 0.2), 3),
+            'thresholds': {'Awful': awful, 'Bad': bad, 'Good': good},
+        }))
+    return profiles
+
+
+def _float_list(text: str) -> List[float]:
+    return [float(value) for value in text.split(',') if value]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='What-if sweep of scoring profiles over a stored cohort')
+    parser.add_argument('--cohort', default=DEFAULT_COHORT_PATH)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build-cohort', help='Store score components of synthetic assessments')
+    build_parser.add_argument('--students', type=int, default=100000)
+    build_parser.add_argument('--seed', type=int, default=0)
+    build_parser.add_argument('--repeat', type=int, default=1,
+                              help='Tile the synthetic cohort this many times (large benchmark cohorts)')
+
+    sweep_parser = subparsers.add_parser('sweep', help='Evaluate a grid of profiles against the cohort')
+    sweep_parser.add_argument('--profiles', help='JSON file with a list of scoring profile overrides')
+    for key in WEIGHT_KEYS + ('trauma_bonus',):
+        sweep_parser.add_argument('--' + key.replace('_', '-'), type=_float_list, help='Comma-separated values')
+    for level in STRESS_LEVELS[1:]:
+        sweep_parser.add_argument('--' + level.lower(), type=_float_list, help=f'Comma-separated {level} cut-offs')
+    sweep_parser.add_argument('--top', type=int, default=10)
+    sweep_parser.add_argument('--output', help='Write the full per-profile report here')
+
+    benchmark_parser = subparsers.add_parser('benchmark', help='Time random profiles against the cohort')
+    benchmark_parser.add_argument('--profiles', type=int, default=1000)
+    benchmark_parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == 'build-cohort':
+        start = time.perf_counter()
+        cohort = synthesize_cohort(args.students, args.seed)
+        if args.repeat > 1:
+            cohort = {name: np.tile(values, args.repeat) for name, values in cohort.items()}
+        save_cohort(cohort, args.cohort)
+        print(json.dumps({'students': len(cohort['trauma']), 'path': args.cohort,
+                          'seconds': round(time.perf_counter() - start, 2)}, indent=2))
+        return
+
+    cohort = load_cohort(args.cohort)
+    if args.command == 'benchmark':
+        profiles = _random_profiles(args.profiles, args.seed)
+        start = time.perf_counter()
+        report = sweep(cohort, profiles)
+        elapsed = time.perf_counter() - start
+        print(json.dumps({
+            'profiles': len(profiles),
+            'students': report['students'],
+            'distinct_rows': report['distinct_rows'],
+            'baseline_mismatches': report.get('baseline_mismatches'),
+            'seconds': round(elapsed, 3),
+        }, indent=2))
+        return
+
+    if args.profiles:
+        with open(args.profiles, 'r') as f:
+            profiles = [scoring_profile(overrides) for overrides in json.load(f)]
+    else:
+        values = {key: getattr(args, key) for key in WEIGHT_KEYS + ('trauma_bonus',)}
+        values.update({level: getattr(args, level.lower()) for level in STRESS_LEVELS[1:]})
+        profiles = profile_grid(values)
+    if not profiles:
+        parser.error('The grid has no valid profiles (thresholds must satisfy Awful >= Bad >= Good)')
+
+    start = time.perf_counter()
+    summary = summarize(sweep(cohort, profiles), profiles, args.top)
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    summary.pop('profiles')
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()